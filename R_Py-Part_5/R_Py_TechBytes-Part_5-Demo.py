@@ -91,6 +91,11 @@
 #  v.1.1     2020-04-02     Code simplified with case, sample teradataml funcs.
 #                           Additional information about connections.
 #  v.1.1.1   2020-04-24     Bug fix: Missing colon in when stmt, and blank line.
+#  v.1.2     2026-10-18     Model export in the array-based format of stoRFForest.py
+#  v.1.3     2026-10-18     Model files for scoring with installed model files
+#  v.1.4     2026-10-18     Saving of the model fitted on all data in Vantage
+#  v.1.5     2026-10-18     Compression of the model with stoRFCompress.py
+#  v.1.6     2026-10-18     Scoring query with the columns of the feature manifest
 # ##############################################################################
 
 # Load teradataml and dependency packages to use in both use cases.
@@ -104,6 +109,11 @@ import pandas as pd
 import numpy as np
 import pickle
 import base64
+# The helper module stoRFForest.py of the present demo Part 5 exports models in
+# a compact array-based format, and the helper module stoRFModel.py decodes the
+# models of use case [2]; place them in the same folder as this file.
+from stoRFForest import export_forest
+from stoRFModel import decode_transport
 
 ###
 ### Connection
@@ -223,6 +233,42 @@ classifierPklB64 = base64.b64encode(classifierPkl)
 with open('RFmodel_py.out', 'wb') as fOut:  # Use "wb" to write in binary format
     fOut.write(classifierPklB64)
 
+# Alternatively, save the model in the compact array-based format of the helper
+# module "stoRFForest.py" into a file that we name "RFmodel_arr.out". This file
+# is about half the size of the pickled model. In the database, the model loads
+# much faster, and it is scored with NumPy alone, without scikit-learn. The
+# scores are identical to the ones of the pickled model.
+# To score with this model, install the file in Section 2 as well, and add the
+# option "--model-file <DBNAME>/RFmodel_arr.out" to the SCRIPT_COMMAND clause
+# of the scoring query.
+classifierArr = export_forest(classifier)
+classifierArrB64 = base64.b64encode(classifierArr)
+with open('RFmodel_arr.out', 'wb') as fOut:  # Use "wb" to write in binary format
+    fOut.write(classifierArrB64)
+
+# The 500 trees of the model are more than most rows need. The client tool
+# "stoRFCompress.py" of the present demo Part 5 compresses a model file into a
+# model with fewer trees, which is smaller and faster to score, as long as its
+# AUC on holdout rows is at most 0.002 (option "--max-auc-drop") below the AUC
+# of the original model. With the options "--max-kb" and "--max-us-per-row",
+# it keeps the most accurate model within a file size or scoring time budget.
+# Save the rows of ADS_Py that are not in the training sample into a CSV
+# file with the following code, which is commented out here, and run the tool
+# on a command line. Then install and score the compressed model file like the
+# original one.
+#holdout_df = tdADS_Py.to_pandas().reset_index()
+#holdout_df = holdout_df[~holdout_df["cust_id"].isin(tdTrain_df.reset_index()["cust_id"])]
+#holdout_df.to_csv('ADS_holdout.csv', index=False)
+# python3 stoRFCompress.py RFmodel_arr.out ADS_holdout.csv RFmodel_small.out
+#
+# The model uses only the predictor columns of ADS_Py, and its trees may not
+# even test all of them. The helper module "stoRFForest.py" reads the feature
+# manifest of a model, which lists the columns that its splits test, off the
+# model file. The client tool "stoRFProject.py" of the present demo Part 5
+# generates a scoring query that sends only these columns to the scoring
+# script, rather than all columns of ADS_Py, as follows:
+# python3 stoRFProject.py RFmodel_py.out --output RFmodel_py.sql
+#
 # The saved model will then need to be installed on the target Vantage system
 # (see following Section 2) together with the scoring script in file
 # "stoRFScore.py" so you can perform the scoring operation with the SCRIPT
@@ -239,6 +285,19 @@ with open('RFmodel_py.out', 'wb') as fOut:  # Use "wb" to write in binary format
 # On MacOS, specify a path like     : "/Users/me/Path/To/RFmodel_py.out"
 # On Linux, specify a path like     : "/home/me/Path/To/RFmodel_py.out"
 #
+# Alternatively, the model can be fitted in the Advanced SQL Engine on all rows
+# of the table ADS_Py, rather than on the client with a 25% sample. To do so,
+# run the queries in "Alternative: Model fitting on all data in the Advanced
+# SQL Engine" of the "Use Case [1]" section in the SQL script file
+# "R_Py_TechBytes-Part_5-Demo.sql". They store the model in chunks of rows in
+# the table "RFModelPy". Then, save the model into the "RFmodel_py.out" file
+# with the following code, which is commented out here, and install the file
+# as described in Section 2.
+#tdModel_df = DataFrame("RFModelPy").to_pandas()
+#modelSer = decode_transport(zip(tdModel_df["chunk_id"], tdModel_df["rf_model"]))
+#with open('RFmodel_py.out', 'wb') as fOut:
+#    fOut.write(base64.b64encode(modelSer))
+#
 # At this point, you can review the scoring script file "stoRFScore.py" that is
 # distributed with the present TechBytes demo material.
 # Similarly to the model path, also look up the full path of the script file
@@ -639,6 +698,29 @@ remove_context()
 # propensity, partitioned by state code, of the financial services customers
 # in the test table to open a credit card account.
 
+# Alternatively, the multiple models can be installed in the target Vantage
+# system as model files, one per state code, and "stoRFScoreMM.py" can look up
+# the model of every state code among these files. The scoring query then sends
+# only the test/score data rows through the SCRIPT Table Operator, rather than
+# the models, too. To use this alternative, first save the models from the
+# table "RFStateCodeModelsPy" into the files "RFmodel_<statecode>.out" on your
+# client machine with the following code, which is commented out here. The
+# table "RFStateCodeModelsPy" only exists after you have run the queries of
+# "Part (A): Model fitting" in Section 2, and the teradataml session of the
+# present file has been removed at the end of Section 1. Therefore, run the
+# code only after Part (A), and in a new teradataml session, as follows.
+# Then, use the code in "Part (C): Scoring with installed model files" of the
+# "Use Case [2]" section in the SQL script file "R_Py_TechBytes-Part_5-Demo.sql"
+# to install the files and score.
+#td_context = create_context(host="<HOSTNAME>", username="<UID>", password="<PWD>")
+#tdModels_df = DataFrame("RFStateCodeModelsPy").to_pandas()
+#for statecode, modelRows in tdModels_df.groupby("statecode"):
+#    # Reassemble every model from its chunks
+#    modelSer = decode_transport(zip(modelRows["chunk_id"], modelRows["rf_model"]))
+#    with open('RFmodel_' + statecode.strip() + '.out', 'wb') as fOut:  # Use "wb" to write in binary format
+#        fOut.write(base64.b64encode(modelSer))
+#remove_context()
+
 ################################################################################
 ################################################################################
 # END OF USE CASE [2]: Multiple models fitting and scoring example
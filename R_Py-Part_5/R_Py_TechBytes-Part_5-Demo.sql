@@ -75,6 +75,31 @@
 --  v.1.0     2019-10-29     First release
 --  v.1.1     2020-04-02     Added change log; no code changes in present file
 --  v.1.1.1   2020-04-24     Bug fix: Column "sampleid" confused with keyword
+--  v.1.2     2026-10-18     Install the helper module stoRFIO.py with the scripts
+--  v.1.3     2026-10-18     Install stoRFForest.py; models in the array-based format
+--  v.1.4     2026-10-18     Install stoRFModel.py; node-local decoded-model cache
+--  v.1.5     2026-10-18     Notes on the memory-mapped model cache
+--  v.1.6     2026-10-18     Compressed models in chunks of rows in use case 2
+--  v.1.7     2026-10-18     Part (C): Scoring with installed model files
+--  v.1.8     2026-10-18     Notes on the pipelined scoring mode
+--  v.1.9     2026-10-18     Install stoRFFit.py; parallel tree building in Part (A)
+--  v.1.10    2026-10-18     Part (D): Model fitting with sub-partitions of large state codes
+--  v.1.11    2026-10-18     Use Case [1] alternative: model fitting on all data in Vantage
+--  v.1.12    2026-10-18     Part (E): Incremental refresh of the models
+--  v.1.13    2026-10-18     Part (F): Refitting only the models of drifted state codes
+--  v.1.14    2026-10-18     Part (G): Cross-validation of the models
+--  v.1.15    2026-10-18     Part (H): Model fitting with per-state parameters from a grid
+--  v.1.16    2026-10-18     Install stoRFBins.py; binned model fitting in Part (A)
+--  v.1.17    2026-10-18     Notes on the early-exit scoring mode
+--  v.1.18    2026-10-18     Notes on the QuickScorer scoring engine
+--  v.1.19    2026-10-18     Alternative: Scoring with a compiled SQL query
+--  v.1.20    2026-10-18     Notes on the projected scoring input (--columns)
+--  v.1.21    2026-10-18     Alternative: Scoring several targets in one pass
+--  v.1.22    2026-10-18     Notes on the score cache (--score-cache)
+--  v.1.23    2026-10-18     Notes on the private cache directories
+--  v.1.24    2026-10-18     Notes on the deterministic early-exit bound
+--  v.1.25    2026-10-18     Compiled-query example that fits the request size limit
+--  v.1.26    2026-10-18     Notes on the score cache report
 --------------------------------------------------------------------------------
 
 
@@ -104,6 +129,14 @@ call SYSUIF.REMOVE_FILE('RFmodel_py',1);
 --          modelPATH = /Users/me/RFmodel_py.out
 call SYSUIF.INSTALL_FILE('RFmodel_py','RFmodel_py.out','cz!modelPATH');
 
+-- Optionally, import also the model file "RFmodel_arr.out" with the same model
+-- in the compact array-based format. Replace "arrmodelPATH" with the full path
+-- to this file on your client machine. To score with this model, append the
+-- option "--model-file <DBNAME>/RFmodel_arr.out" to the script name in the
+-- SCRIPT_COMMAND clause of the scoring query below.
+call SYSUIF.REMOVE_FILE('RFmodel_arr',1);
+call SYSUIF.INSTALL_FILE('RFmodel_arr','RFmodel_arr.out','cz!arrmodelPATH');
+
 -- Now import into Vantage the scoring script that uses the model.
 -- If you modify the script, then you need to re-install it in the database.
 --
@@ -118,9 +151,98 @@ CALL SYSUIF.REMOVE_FILE('stoRFScore',1);
 --          scriptPATH = /Users/me/stoRFScore.py
 CALL SYSUIF.INSTALL_FILE('stoRFScore','stoRFScore.py','cz!scriptPATH');
 
+-- The scoring script imports the helper module "stoRFIO.py" with the input and
+-- output routines that are shared by all Python scripts of the present Part 5.
+-- Import the module into Vantage in the same database as the scripts.
+-- If you modify the module, then you need to re-install it in the database.
+--
+-- The SYSUIF.REMOVE_FILE() XSP removes the old version. If no previous version
+-- of the file exists in the database, then the following statement will fail.
+CALL SYSUIF.REMOVE_FILE('stoRFIO',1);
+-- The SYSUIF.INSTALL_FILE() XSP installs the specified file into the database.
+-- Before you execute the following statement, replace "ioscrPATH" with the
+-- full path to the Python helper module file on your client machine.
+-- Example: Assume you are on the MacOS platform and you want to store the
+--          "stoRFIO.py" module file in your home directory /Users/me. Then
+--          ioscrPATH = /Users/me/stoRFIO.py
+CALL SYSUIF.INSTALL_FILE('stoRFIO','stoRFIO.py','cz!ioscrPATH');
+
+-- The scoring script also imports the helper module "stoRFForest.py" that
+-- loads and scores models in the array-based format. Import the module into
+-- Vantage in the same way. Replace "forestscrPATH" with the full path to the
+-- module file on your client machine.
+CALL SYSUIF.REMOVE_FILE('stoRFForest',1);
+CALL SYSUIF.INSTALL_FILE('stoRFForest','stoRFForest.py','cz!forestscrPATH');
+
+-- The scoring script loads the model through the helper module "stoRFModel.py".
+-- Import this module, too. Replace "modelscrPATH" with the full path to the
+-- module file on your client machine.
+CALL SYSUIF.REMOVE_FILE('stoRFModel',1);
+CALL SYSUIF.INSTALL_FILE('stoRFModel','stoRFModel.py','cz!modelscrPATH');
+
 -- Invoke the Python interpreter from SCRIPT and specify the script name to
 -- execute for scoring the ADS_Py rows on every AMP with your imported model.
 -- The script should account for a graceful exit on AMPs that have no data.
+-- The script reads and scores its input in batches of 10000 rows by default,
+-- so that its memory use does not grow with the number of rows on an AMP. To
+-- use a different batch size, append the option "--batch-size <N>" to the
+-- script name in the SCRIPT_COMMAND clause.
+-- The scoring scripts of both use cases send the probabilities at full
+-- precision. To round them to N decimals, append the option "--precision <N>".
+-- The first scoring script instance on every node stores the decoded model in
+-- a node-local cache directory, from where the other instances and later
+-- queries load it much faster. The options "--cache-dir <path>" and
+-- "--cache-mb <N>" set the cache location and size bound; "--cache-mb 0"
+-- turns the cache off. The cache follows any re-installation of the model.
+-- By default, the cache directories of the model and score caches are created
+-- in the temporary directory of the node, accessible only by the operating
+-- system user that runs the scripts. A cache directory that belongs to another
+-- user, or that other users can write to, is not used. Only models in the
+-- array-based format are cached; other pickled models are decoded anew.
+-- The cached model is memory-mapped, so that all script instances on a node
+-- share a single copy of it in memory; the option "--no-mmap" turns this off.
+-- With the option "--pipeline", the script reads, scores and writes batches
+-- concurrently, and writes the time that every stage spent busy and stalled
+-- to the SCRIPT log. This helps when the script waits on its input or output.
+-- With the option "--early-exit <TOL>", the script stops evaluating the trees
+-- once the probabilities of the rows are known within TOL from the trees
+-- evaluated so far; with "--early-exit-threshold <P>", it stops for a row once
+-- its class at the probability threshold P is settled, and the row gets the
+-- same class as with all trees. The scoring script of use case 2 takes these
+-- options as well. With a forest of 500 trees, the threshold 0.5 scored about
+-- 1.5 times as fast, and a tolerance of 0.05 about 1.2 times as fast. The
+-- option "--early-exit-bound statistical" exits by a confidence bound of 3
+-- standard errors instead, which scored up to 4.4 times as fast, but changed
+-- the class of some rows. The average number of trees evaluated per row and
+-- the scoring time are written to the SCRIPT log.
+-- The option "--engine quickscorer" scores with a predictor that replaces the
+-- traversal of the trees by lookups in sorted threshold lists and bitwise ANDs
+-- of leaf bit vectors, with the same probabilities. It is fastest for forests
+-- of small trees, such as forests fitted with a max_depth of 6 or less. For
+-- fully grown trees, it is still about twice as fast as the array-based
+-- predictor with the state code models of use case 2, of about 100 leaves per
+-- tree, and somewhat faster with larger trees. Forests with trees of more than
+-- 2048 leaves keep the array-based predictor. The scoring script of use case 2
+-- takes this option as well.
+-- The input query below sends all 28 columns of ADS_Py to the script, which
+-- uses only cust_id, cc_acct_ind and the predictor columns that the model
+-- tests. The client tool "stoRFProject.py" generates the same query with an
+-- input query that selects only these columns, with the integer columns cast
+-- to narrow types, from the feature manifest of the model file:
+--   python3 stoRFProject.py RFmodel_py.out --output RFmodel_py.sql
+-- The option "--columns <list>" in the SCRIPT_COMMAND clause of the generated
+-- query tells the script the layout of its input. The rows are then shorter
+-- to send, and faster to decode.
+-- When the query runs regularly, such as every night, most rows of ADS_Py are
+-- the same as in the run before. With the option "--score-cache", the script
+-- keeps the probabilities of the scored rows in a node-local cache, keyed by
+-- the model file and a hash of the predictor values, and only scores the rows
+-- that are not in the cache; the others are looked up, with the same
+-- probabilities. The options "--score-cache-dir <path>" and
+-- "--score-cache-mb <N>" set the cache location and size bound. The cache of
+-- a model that has been replaced is dropped after 12 hours without use. The
+-- hit rate, the lookup time and the scoring time saved are written to the
+-- SCRIPT log.
 --
 -- Before you execute the following statement, replace <DBNAME> with the
 -- database name you specified in the beginning of Use Case [1] in this file,
@@ -135,6 +257,138 @@ FROM SCRIPT( ON(SELECT *
              RETURNS ('oc1 INTEGER, oc3 FLOAT, oc4 FLOAT, oc5 INTEGER')
            ) AS d;
 
+-- Alternative: Scoring several targets in one pass
+--------------------------------------------------------------------------------
+--
+-- Models for further targets, such as the propensity to open a checking or a
+-- savings account, score the same ADS_Py rows. Rather than a SCRIPT query
+-- per model, in which every script instance reads and decodes the same input
+-- rows again, the scoring script scores all models in a single pass with the
+-- option "--target <target column>=<model file path>" for every model. Every
+-- output row then holds cust_id, followed by the probabilities and the actual
+-- value of every target in the order of the options. Every model is scored on
+-- the predictor columns it was fitted with. For example, with a model file
+-- "RFmodel_ck.out" fitted for the target column ck_acct_ind and installed
+-- like the model file above:
+SELECT d.oc1 AS cust_id,
+       d.oc2 AS cc_Prob0,
+       d.oc3 AS cc_Prob1,
+       d.oc4 AS cc_Actual,
+       d.oc5 AS ck_Prob0,
+       d.oc6 AS ck_Prob1,
+       d.oc7 AS ck_Actual
+FROM SCRIPT( ON(SELECT *
+                FROM ADS_Py)
+             SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFScore.py --target cc_acct_ind=<DBNAME>/RFmodel_py.out --target ck_acct_ind=<DBNAME>/RFmodel_ck.out')
+             RETURNS ('oc1 INTEGER, oc2 FLOAT, oc3 FLOAT, oc4 INTEGER, oc5 FLOAT, oc6 FLOAT, oc7 INTEGER')
+           ) AS d;
+
+-- Alternative: Scoring with a compiled SQL query
+--------------------------------------------------------------------------------
+--
+-- The client tool "stoRFToSQL.py" compiles a model file into a plain SQL query
+-- that scores the rows of "ADS_Py" without SCRIPT. Every tree becomes a nested
+-- CASE expression of its splits, and the query averages the leaf
+-- probabilities of all trees. The query returns the same columns as the
+-- scoring query above, and is executed like any other query. The query grows
+-- with the number of tree nodes, and the 500 fully grown trees of the demo
+-- model compile into a query of several MB, far beyond the 1 MB limit of a
+-- SQL request; the tool warns about such queries. Compile forests of shallow
+-- trees, or compressed forests, instead; the options
+-- "--max-trees <N>" and "--max-depth <D>" keep only the first N trees, and
+-- cut the trees off at the depth D, at some loss of accuracy. Deep trees can
+-- also exceed the nesting limit of CASE expressions; trees deeper than 16 are
+-- therefore compiled into a single CASE expression with a WHEN clause for
+-- every leaf instead, at a larger query size ("--layout nested" or
+-- "--layout flat" sets the layout). For example, the first 20 trees cut off
+-- at the depth 6 compile into a query of 93 KB, whose probabilities differ
+-- from the ones of the model by 3.3E-16 at most in the "--check" test:
+--   python3 stoRFToSQL.py RFmodel_py.out --max-trees 20 --max-depth 6
+--                         --output RFmodel_py.sql
+-- For use case 2, the tool compiles the model files "RFmodel_<statecode>.out"
+-- saved at the end of "R_Py_TechBytes-Part_5-Demo.py" into a query on the
+-- "MultiModelTest_Py" table, which scores the rows of every state code with
+-- the model of the state code:
+--   python3 stoRFToSQL.py CA=RFmodel_CA.out NY=RFmodel_NY.out ...
+--                         --max-depth 8 --output RFStateCodeModels_py.sql
+-- The option "--check <CSV file>" runs the query on rows saved from the table
+-- in a local SQLite database, and compares the probabilities with the ones of
+-- the model; when SQLite cannot parse the query of deep trees, the tool
+-- suggests the options to compile it with instead. Run the tool with the
+-- option "--help" for the other options.
+
+-- Alternative: Model fitting on all data in the Advanced SQL Engine
+--------------------------------------------------------------------------------
+--
+-- Rather than fitting the model on the client with a 25% sample of "ADS_Py",
+-- the model can be fitted in the Advanced SQL Engine on all rows of the table,
+-- without moving the data off the database. The SCRIPT query splits the rows
+-- into as many hash slices as there are AMPs, and the training script
+-- "stoRFTrain.py" fits a partial forest with a share of the 500 trees on every
+-- slice. The merging script "stoRFMerge.py" then joins the partial forests into
+-- one model. Save this model into the "RFmodel_py.out" file on your client with
+-- the code at the end of use case [1] Section 1 in "R_Py_TechBytes-Part_5-Demo.py",
+-- install the file as shown at the beginning of Use Case [1], and score with
+-- the query above.
+--
+-- Import into Vantage the training and merging scripts, and the helper module
+-- "stoRFFit.py" with the model fitting routines. Before you execute the
+-- following statements, replace "trainscrPATH", "mergescrPATH" and "fitscrPATH"
+-- with the full paths to the files on your client machine.
+CALL SYSUIF.REMOVE_FILE('stoRFTrain',1);
+CALL SYSUIF.INSTALL_FILE('stoRFTrain','stoRFTrain.py','cz!trainscrPATH');
+CALL SYSUIF.REMOVE_FILE('stoRFMerge',1);
+CALL SYSUIF.INSTALL_FILE('stoRFMerge','stoRFMerge.py','cz!mergescrPATH');
+CALL SYSUIF.REMOVE_FILE('stoRFFit',1);
+CALL SYSUIF.INSTALL_FILE('stoRFFit','stoRFFit.py','cz!fitscrPATH');
+
+-- Use following statements, if applicable, to remove existing table versions.
+-- If a table is not in the database, then the respective statement will fail.
+DROP TABLE RFPartialModelsPy;
+DROP TABLE RFModelPy;
+
+-- Invoke the Python interpreter from SCRIPT, and specify the training script
+-- to fit a partial forest on every hash slice of the rows. Every input row
+-- carries its slice number and the number of slices, which equals the number
+-- of AMPs, in two more columns. The output holds the chunks of the partial
+-- forest of every slice. The options of the fitting script "stoRFFitMM.py" in
+-- Use Case [2] work here as well; for example, "--model-format arrays" fits
+-- the model in the array-based format, and "--n-jobs" builds the trees with
+-- several workers.
+--
+-- Before you execute the following statement, replace <DBNAME> with the
+-- database name you specified in the beginning of Use Case [1] in this file.
+CREATE TABLE RFPartialModelsPy AS (
+    SELECT d.oc1 AS slice_id,
+           d.oc2 AS chunk_id,
+           d.oc3 AS rf_model
+    FROM SCRIPT ( ON (SELECT a.*,
+                             HASHBUCKET(HASHROW(a.cust_id)) MOD (HASHAMP() + 1) AS slice_id,
+                             HASHAMP() + 1 AS n_slices
+                      FROM ADS_Py a)
+                  PARTITION BY slice_id
+                  SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFTrain.py')
+                  RETURNS ('oc1 INTEGER, oc2 INTEGER, oc3 CLOB')
+                ) AS d
+   ) WITH DATA
+     PRIMARY INDEX (slice_id);
+
+-- Invoke the Python interpreter from SCRIPT to join the partial forests into
+-- one model. The merging script joins the models of every value of its first
+-- input column; here, all partial forests carry the same model name.
+CREATE TABLE RFModelPy AS (
+    SELECT d.oc1 AS model_name,
+           d.oc2 AS chunk_id,
+           d.oc3 AS rf_model
+    FROM SCRIPT ( ON (SELECT 'RFmodel_py' AS model_name, slice_id, chunk_id, rf_model
+                      FROM RFPartialModelsPy)
+                  PARTITION BY model_name
+                  SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFMerge.py')
+                  RETURNS ('oc1 VARCHAR(10), oc2 INTEGER, oc3 CLOB')
+                ) AS d
+   ) WITH DATA
+     PRIMARY INDEX (model_name);
+
 
 --------------------------------------------------------------------------------
 -- Use Case [2]: Simultaneously build multiple models based upon state code
@@ -147,6 +401,18 @@ FROM SCRIPT( ON(SELECT *
 DATABASE <DBNAME>;
 SET SESSION SEARCHUIFDBPATH = <DBNAME>;
 
+-- Both the fitting and the scoring scripts import the helper modules "stoRFIO.py",
+-- "stoRFForest.py" and "stoRFModel.py". If you have not installed the modules
+-- in the present database in Use Case [1], then install them now. Before you
+-- execute the following statements, replace "ioscrPATH", "forestscrPATH" and
+-- "modelscrPATH" with the full paths to the module files on your client machine.
+CALL SYSUIF.REMOVE_FILE('stoRFIO',1);
+CALL SYSUIF.INSTALL_FILE('stoRFIO','stoRFIO.py','cz!ioscrPATH');
+CALL SYSUIF.REMOVE_FILE('stoRFForest',1);
+CALL SYSUIF.INSTALL_FILE('stoRFForest','stoRFForest.py','cz!forestscrPATH');
+CALL SYSUIF.REMOVE_FILE('stoRFModel',1);
+CALL SYSUIF.INSTALL_FILE('stoRFModel','stoRFModel.py','cz!modelscrPATH');
+
 -- Part (A): Model fitting
 --------------------------------------------------------------------------------
 --
@@ -163,6 +429,16 @@ CALL SYSUIF.REMOVE_FILE('stoRFFitMM',1);
 --          "stoRFFitMM.py" script file in your home directory /Users/me. Then
 --          mmfitscrPATH = /Users/me/stoRFFitMM.py
 CALL SYSUIF.INSTALL_FILE('stoRFFitMM','stoRFFitMM.py','cz!mmfitscrPATH');
+-- The fitting script imports the helper module "stoRFFit.py" with the model
+-- fitting routines. Replace "fitscrPATH" with the full path to the module file
+-- on your client machine.
+CALL SYSUIF.REMOVE_FILE('stoRFFit',1);
+CALL SYSUIF.INSTALL_FILE('stoRFFit','stoRFFit.py','cz!fitscrPATH');
+-- The fitting script also imports the helper module "stoRFBins.py" for the
+-- binned model fitting. Replace "binsscrPATH" with the full path to the module
+-- file on your client machine.
+CALL SYSUIF.REMOVE_FILE('stoRFBins',1);
+CALL SYSUIF.INSTALL_FILE('stoRFBins','stoRFBins.py','cz!binsscrPATH');
 
 -- Use following statement, if applicable, to remove an existing table version.
 -- If the table in not in the database, then the following statement will fail.
@@ -172,11 +448,40 @@ DROP TABLE RFStateCodeModelsPy;
 -- run and fit one model on every AMP that has a training data partition on it.
 -- The SQL query shows that each AMP is expected to return the state code for
 -- which it has data, and the fitted model for the corresponding partition.
+-- The script compresses the model, and returns it in one or more rows with
+-- consecutive chunk numbers 1, 2, ..., and a chunk of the model text each.
+-- This way, models of any size can be stored in CLOB columns.
 -- When AMPs happen to host multiple partitions, as when there are more state
 -- codes than AMPs on the Advanced SQL Engine, then the script will accordingly
 -- produce a model for each partition. If there are fewer state codes than
 -- AMPs on the Vantage Advanced SQL Engine, then some AMPs will receive no data.
 -- The script should account for a graceful exit for AMPs with no data.
+-- The script pickles the fitted models. To store them in the compact
+-- array-based format instead, append the option "--model-format arrays" to the
+-- script name in the SCRIPT_COMMAND clause. The scoring script in Part (B)
+-- reads models in either format. The script compresses the models with zlib
+-- by default; append the option "--compression lzma" for smaller models at a
+-- longer fitting time, or "--compression none". The option "--chunk-size <N>"
+-- sets the maximum number of characters of a model chunk (default: 1000000).
+-- The script builds the trees of a forest one at a time. Append the option
+-- "--n-jobs <N>" to build them with N worker threads, or with N worker
+-- processes when you also append "--backend processes". All AMPs of a node
+-- fit their models at the same time, so the script caps N by the share of the
+-- node CPU cores of every AMP; specify the number of AMPs per node of your
+-- system with the option "--amps-per-node <M>". The option "--n-jobs 0" uses
+-- the whole share. The fitted models do not depend on the number of workers.
+-- For large partitions, append the option "--binned" to fit the trees on the
+-- bin codes of the predictor columns, each quantized into at most 256 bins,
+-- or into the number of bins given by the option "--max-bins <B>". This cuts
+-- the fitting time at a small loss of accuracy, though by less than one might
+-- hope: in our measurements, the binned fitting was 1.5 to 2.5 times as fast
+-- as the exact fitting of scikit-learn, with the larger gains on partitions
+-- of many rows and on trees of limited depth, and the AUC differed by at most
+-- 0.003. Run "stoRFBench.py binned" to compare the fitting time and AUC of
+-- both ways on your client. The binned models are stored
+-- in the array-based format, and are scored in Part (B) like the others.
+-- To select the model parameters of every state code from a grid of values,
+-- see Part (H).
 --
 -- Before you execute the following statement, replace <DBNAME> with the
 -- database name you specified in the beginning of Use Case [2] earlier.
@@ -184,7 +489,8 @@ DROP TABLE RFStateCodeModelsPy;
 -- enclosed in quotes to differentiate the name from the SQL keyword sampleid.
 CREATE TABLE RFStateCodeModelsPy AS (
     SELECT d.oc1 AS statecode,
-           d.oc2 AS rf_model
+           d.oc2 AS chunk_id,
+           d.oc3 AS rf_model
     FROM SCRIPT ( ON (SELECT cust_id, cast(tot_income as FLOAT) as tot_income,
                              tot_age, tot_cust_years, tot_children, female_ind,
                              single_ind, married_ind, separated_ind,
@@ -196,7 +502,7 @@ CREATE TABLE RFStateCodeModelsPy AS (
                       FROM MultiModelTrain_Py)
                   PARTITION BY scode
                   SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFFitMM.py')
-                  RETURNS ('oc1 VARCHAR(10), oc2 CLOB')
+                  RETURNS ('oc1 VARCHAR(10), oc2 INTEGER, oc3 CLOB')
                 ) AS d
    ) WITH DATA
      PRIMARY INDEX (statecode);
@@ -222,13 +528,15 @@ call SYSUIF.install_file('stoRFScoreMM','stoRFScoreMM.py','cz!mmscoscrPATH');
 -- score one model on every AMP that has a test/scoring data partition on it
 -- for the corresponding state code.
 -- Observe the input data sent to the script: Essentially the test/scoring data
--- partition is passed to the script plus an additional column. We specify the
--- corresponding model for this partition's state code to be passed in the first
--- row of this extra column, and null in the rest of the rows. For this trick
--- to work correctly, it is critical to specify the "ORDER BY nRow" clause.
--- The script code should account for reading in the model from the input data
--- set first row. The script should also account for a graceful exit on AMPs
--- that have no data.
+-- partition is passed to the script plus two additional columns, the nRow and
+-- rf_model columns that are null in the data rows. The model rows of the
+-- partition's state code are appended to the data rows with UNION ALL; they
+-- have null data columns, and carry the chunk number and model chunk text in
+-- the nRow and rf_model columns. Every scoring AMP thus receives every model
+-- chunk once. The script code should account for separating the model rows
+-- from the data rows, and for reassembling the model from its chunks in the
+-- order of their chunk numbers. The script should also account for a graceful
+-- exit on AMPs that have no data.
 --
 -- Before you execute the following statement, replace <DBNAME> with the
 -- database name you specified in the beginning of Use Case [2] earlier.
@@ -239,9 +547,220 @@ SELECT d.oc1 AS cust_id,
        d.oc3 AS Prob0,
        d.oc4 AS Prob1,
        d.oc5 AS Actual
-FROM SCRIPT( ON(SELECT s.*,
-                       CASE WHEN nRow=1 THEN m.rf_model ELSE null END
-                FROM (SELECT x.cust_id, CAST (x.tot_income as FLOAT) as tot_income,
+FROM SCRIPT( ON(SELECT x.cust_id, CAST (x.tot_income as FLOAT) as tot_income,
+                       x.tot_age, x.tot_cust_years, x.tot_children, x.female_ind,
+                       x.single_ind, x.married_ind, x.separated_ind,
+                       TRANSLATE(x.statecode USING UNICODE_TO_LATIN) AS scode,
+                       x.ck_acct_ind, x.sv_acct_ind, x.cc_acct_ind, x.ck_avg_bal,
+                       x.sv_avg_bal, x.cc_avg_bal, x.ck_avg_tran_amt, x.sv_avg_tran_amt,
+                       x.cc_avg_tran_amt, x.q1_trans_cnt, x.q2_trans_cnt,
+                       x.q3_trans_cnt, x.q4_trans_cnt, x."sampleid",
+                       CAST (null AS INTEGER) AS nRow,
+                       CAST (null AS CLOB) AS rf_model
+                FROM MultiModelTest_Py x
+                WHERE TRANSLATE(x.statecode USING UNICODE_TO_LATIN)
+                      IN (SELECT statecode FROM RFStateCodeModelsPy)
+                UNION ALL
+                SELECT null, null, null, null, null, null, null, null, null,
+                       m.statecode,
+                       null, null, null, null, null, null, null, null, null,
+                       null, null, null, null, null,
+                       m.chunk_id, m.rf_model
+                FROM RFStateCodeModelsPy m)
+             PARTITION BY scode
+             SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFScoreMM.py')
+             RETURNS ('oc1 INTEGER, oc2 VARCHAR(10), oc3 FLOAT, oc4 FLOAT, oc5 INTEGER')
+           ) AS d;
+
+-- Part (C): Scoring with installed model files
+--------------------------------------------------------------------------------
+--
+-- As an alternative to Part (B), the models can be installed in the database as
+-- model files, one per state code. The scoring script then looks up the model
+-- of every state code among the installed files, and the SCRIPT query sends only
+-- the test/scoring data rows to the script. The models need to be installed
+-- once after every fitting, rather than be sent along with the data in every
+-- scoring query.
+--
+-- Save the models from the table "RFStateCodeModelsPy" into the model files
+-- "RFmodel_<statecode>.out" on your client machine, as shown at the end of the
+-- "R_Py_TechBytes-Part_5-Demo.py" file. Then install the model files. Before
+-- you execute the following statements, replace "mmmodelDIR" with the full
+-- path to the folder with the model files on your client machine.
+-- If no previous version of a file exists in the database, then the respective
+-- SYSUIF.REMOVE_FILE() statement will fail.
+CALL SYSUIF.REMOVE_FILE('RFmodel_CA',1);
+CALL SYSUIF.INSTALL_FILE('RFmodel_CA','RFmodel_CA.out','cz!mmmodelDIR/RFmodel_CA.out');
+CALL SYSUIF.REMOVE_FILE('RFmodel_NY',1);
+CALL SYSUIF.INSTALL_FILE('RFmodel_NY','RFmodel_NY.out','cz!mmmodelDIR/RFmodel_NY.out');
+CALL SYSUIF.REMOVE_FILE('RFmodel_TX',1);
+CALL SYSUIF.INSTALL_FILE('RFmodel_TX','RFmodel_TX.out','cz!mmmodelDIR/RFmodel_TX.out');
+CALL SYSUIF.REMOVE_FILE('RFmodel_IL',1);
+CALL SYSUIF.INSTALL_FILE('RFmodel_IL','RFmodel_IL.out','cz!mmmodelDIR/RFmodel_IL.out');
+CALL SYSUIF.REMOVE_FILE('RFmodel_AZ',1);
+CALL SYSUIF.INSTALL_FILE('RFmodel_AZ','RFmodel_AZ.out','cz!mmmodelDIR/RFmodel_AZ.out');
+CALL SYSUIF.REMOVE_FILE('RFmodel_OH',1);
+CALL SYSUIF.INSTALL_FILE('RFmodel_OH','RFmodel_OH.out','cz!mmmodelDIR/RFmodel_OH.out');
+CALL SYSUIF.REMOVE_FILE('RFmodel_OTHER',1);
+CALL SYSUIF.INSTALL_FILE('RFmodel_OTHER','RFmodel_OTHER.out','cz!mmmodelDIR/RFmodel_OTHER.out');
+
+-- Invoke the Python interpreter from SCRIPT with the option "--model-dir" that
+-- points the scoring script to the installed model files. The query needs no
+-- PARTITION BY clause, since every script instance can score rows of any state
+-- code. Every script instance loads each model it needs once; through the
+-- node-local cache of decoded models, the instances on a node share a single
+-- memory-mapped copy of every model. Rows of state codes without an installed
+-- model file are not scored. The options "--batch-size", "--precision",
+-- "--cache-dir", "--cache-mb" and "--pipeline" work as with the "stoRFScore.py"
+-- script.
+--
+-- Before you execute the following statement, replace <DBNAME> with the
+-- database name you specified in the beginning of Use Case [2] earlier.
+-- In the following statement, the "sampleid" column of the input table is
+-- enclosed in quotes to differentiate the name from the SQL keyword sampleid.
+SELECT d.oc1 AS cust_id,
+       d.oc2 AS statecode,
+       d.oc3 AS Prob0,
+       d.oc4 AS Prob1,
+       d.oc5 AS Actual
+FROM SCRIPT( ON(SELECT x.cust_id, CAST (x.tot_income as FLOAT) as tot_income,
+                       x.tot_age, x.tot_cust_years, x.tot_children, x.female_ind,
+                       x.single_ind, x.married_ind, x.separated_ind,
+                       TRANSLATE(x.statecode USING UNICODE_TO_LATIN) AS scode,
+                       x.ck_acct_ind, x.sv_acct_ind, x.cc_acct_ind, x.ck_avg_bal,
+                       x.sv_avg_bal, x.cc_avg_bal, x.ck_avg_tran_amt, x.sv_avg_tran_amt,
+                       x.cc_avg_tran_amt, x.q1_trans_cnt, x.q2_trans_cnt,
+                       x.q3_trans_cnt, x.q4_trans_cnt, x."sampleid"
+                FROM MultiModelTest_Py x)
+             SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFScoreMM.py --model-dir <DBNAME>')
+             RETURNS ('oc1 INTEGER, oc2 VARCHAR(10), oc3 FLOAT, oc4 FLOAT, oc5 INTEGER')
+           ) AS d;
+
+-- Part (D): Model fitting with sub-partitions of large state codes
+--------------------------------------------------------------------------------
+--
+-- As an alternative to Part (A), the models can be fitted with the work spread
+-- more evenly across the AMPs. In Part (A), every state code partition is fitted
+-- by one AMP, and the fitting takes as long as the fitting of the largest
+-- partition; here, the partition of the "Other" state codes holds most of the
+-- training data. In the present part, every state code partition is split into
+-- as many hash sub-partitions of the customer IDs as it holds times the average
+-- partition size, rounded up. Small state codes keep a single sub-partition.
+-- Every sub-partition fits a sub-forest with its share of the 500 trees on its
+-- own AMP, and the "stoRFMerge.py" script then joins the sub-forests of every
+-- state code into one model. The fitting thus takes about as long as the
+-- fitting of an average partition. The trees of a sub-forest are fitted on the
+-- rows of their sub-partition only; a state code with a single sub-partition
+-- gets the same model as in Part (A).
+--
+-- Import into Vantage the model merging script. Before you execute the
+-- following statements, replace "mergescrPATH" with the full path to the
+-- Python merging script file on your client machine.
+CALL SYSUIF.REMOVE_FILE('stoRFMerge',1);
+CALL SYSUIF.INSTALL_FILE('stoRFMerge','stoRFMerge.py','cz!mergescrPATH');
+
+-- Use following statements, if applicable, to remove existing table versions.
+-- If a table is not in the database, then the respective statement will fail.
+DROP TABLE RFStateCodeSubModelsPy;
+DROP TABLE RFStateCodeModelsPy;
+
+-- Invoke the Python interpreter from SCRIPT with the option "--sub-forests" of
+-- the fitting script. The input rows carry the sub-partition number "subpart"
+-- and the number of sub-partitions "nsub" of their state code in two more
+-- columns, and are partitioned by both the state code and the sub-partition.
+-- The output holds the chunks of the sub-forest of every sub-partition. All
+-- options of the fitting script in Part (A) work here as well.
+--
+-- Before you execute the following statement, replace <DBNAME> with the
+-- database name you specified in the beginning of Use Case [2] earlier.
+CREATE TABLE RFStateCodeSubModelsPy AS (
+    SELECT d.oc1 AS statecode,
+           d.oc2 AS subpart_id,
+           d.oc3 AS chunk_id,
+           d.oc4 AS rf_model
+    FROM SCRIPT ( ON (SELECT t.cust_id, cast(t.tot_income as FLOAT) as tot_income,
+                             t.tot_age, t.tot_cust_years, t.tot_children, t.female_ind,
+                             t.single_ind, t.married_ind, t.separated_ind,
+                             TRANSLATE(t.statecode USING UNICODE_TO_LATIN) AS scode,
+                             t.ck_acct_ind, t.sv_acct_ind, t.cc_acct_ind, t.ck_avg_bal,
+                             t.sv_avg_bal, t.cc_avg_bal, t.ck_avg_tran_amt, t.sv_avg_tran_amt,
+                             t.cc_avg_tran_amt, t.q1_trans_cnt, t.q2_trans_cnt,
+                             t.q3_trans_cnt, t.q4_trans_cnt, t."sampleid",
+                             HASHBUCKET(HASHROW(t.cust_id)) MOD s.nsub AS subpart,
+                             s.nsub
+                      FROM MultiModelTrain_Py t
+                      JOIN (SELECT p.statecode,
+                                   CAST(CEILING(p.nRows * a.nStates / a.nTotal) AS INTEGER) AS nsub
+                            FROM (SELECT statecode, CAST(COUNT(*) AS FLOAT) AS nRows
+                                  FROM MultiModelTrain_Py GROUP BY statecode) p
+                            CROSS JOIN
+                                 (SELECT CAST(COUNT(DISTINCT statecode) AS FLOAT) AS nStates,
+                                         CAST(COUNT(*) AS FLOAT) AS nTotal
+                                  FROM MultiModelTrain_Py) a
+                           ) s
+                      ON t.statecode = s.statecode)
+                  PARTITION BY scode, subpart
+                  SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFFitMM.py --sub-forests')
+                  RETURNS ('oc1 VARCHAR(10), oc2 INTEGER, oc3 INTEGER, oc4 CLOB')
+                ) AS d
+   ) WITH DATA
+     PRIMARY INDEX (statecode);
+
+-- Invoke the Python interpreter from SCRIPT to join the sub-forests of every
+-- state code. The output table "RFStateCodeModelsPy" holds one model per state
+-- code in the same layout as in Part (A), and is scored as in Part (B), or
+-- saved into model files for Part (C). The options "--compression" and
+-- "--chunk-size" work as with the fitting script.
+--
+-- Before you execute the following statement, replace <DBNAME> with the
+-- database name you specified in the beginning of Use Case [2] earlier.
+CREATE TABLE RFStateCodeModelsPy AS (
+    SELECT d.oc1 AS statecode,
+           d.oc2 AS chunk_id,
+           d.oc3 AS rf_model
+    FROM SCRIPT ( ON (SELECT statecode, subpart_id, chunk_id, rf_model
+                      FROM RFStateCodeSubModelsPy)
+                  PARTITION BY statecode
+                  SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFMerge.py')
+                  RETURNS ('oc1 VARCHAR(10), oc2 INTEGER, oc3 CLOB')
+                ) AS d
+   ) WITH DATA
+     PRIMARY INDEX (statecode);
+
+-- Part (E): Incremental refresh of the models
+--------------------------------------------------------------------------------
+--
+-- As an alternative to refitting all models from the full training data, the
+-- existing models in the table "RFStateCodeModelsPy" can be refreshed with
+-- recent training data. The fitting script then fits a number of new trees on
+-- the recent rows of every state code, and adds them to the existing model of
+-- the state code; the oldest trees can be dropped to keep the model size
+-- fixed. The cost of a refresh thus depends on the amount of recent data, and
+-- not on the full training history.
+--
+-- The query assumes a table "MultiModelRecent_Py" with the recent training rows
+-- in the layout of "MultiModelTrain_Py", such as the rows of the customers that
+-- changed since the last fitting. Like the scoring query in Part (B), the query
+-- sends the model rows of every state code along with its data rows. State
+-- codes with a model but without recent rows keep their model, and state codes
+-- with recent rows but without a model get a new model.
+-- The option "--add-trees <N>" sets the number of new trees per state code,
+-- and the option "--keep-trees <M>" drops the oldest trees beyond M trees. The
+-- new trees are fitted with a random seed that is computed from the recent
+-- rows, or with the seed given by the option "--seed <S>". A refreshed model
+-- keeps the format of the existing model.
+--
+-- Use following statement, if applicable, to remove an existing table version.
+-- If the table in not in the database, then the following statement will fail.
+DROP TABLE RFStateCodeModelsPy_new;
+
+-- Before you execute the following statement, replace <DBNAME> with the
+-- database name you specified in the beginning of Use Case [2] earlier.
+CREATE TABLE RFStateCodeModelsPy_new AS (
+    SELECT d.oc1 AS statecode,
+           d.oc2 AS chunk_id,
+           d.oc3 AS rf_model
+    FROM SCRIPT ( ON (SELECT x.cust_id, CAST (x.tot_income as FLOAT) as tot_income,
                              x.tot_age, x.tot_cust_years, x.tot_children, x.female_ind,
                              x.single_ind, x.married_ind, x.separated_ind,
                              TRANSLATE(x.statecode USING UNICODE_TO_LATIN) AS scode,
@@ -249,11 +768,265 @@ FROM SCRIPT( ON(SELECT s.*,
                              x.sv_avg_bal, x.cc_avg_bal, x.ck_avg_tran_amt, x.sv_avg_tran_amt,
                              x.cc_avg_tran_amt, x.q1_trans_cnt, x.q2_trans_cnt,
                              x.q3_trans_cnt, x.q4_trans_cnt, x."sampleid",
-                             row_number() OVER (PARTITION BY x.cust_id ORDER BY x.cust_id) AS nRow
-                      FROM MultiModelTest_Py x) AS s, RFStateCodeModelsPy m
-                WHERE s.scode = m.statecode)
-             PARTITION BY scode
-             ORDER BY nRow
-             SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFScoreMM.py')
-             RETURNS ('oc1 INTEGER, oc2 VARCHAR(10), oc3 FLOAT, oc4 FLOAT, oc5 INTEGER')
-           ) AS d;
+                             CAST (null AS INTEGER) AS nRow,
+                             CAST (null AS CLOB) AS rf_model
+                      FROM MultiModelRecent_Py x
+                      UNION ALL
+                      SELECT null, null, null, null, null, null, null, null, null,
+                             m.statecode,
+                             null, null, null, null, null, null, null, null, null,
+                             null, null, null, null, null,
+                             m.chunk_id, m.rf_model
+                      FROM RFStateCodeModelsPy m)
+                  PARTITION BY scode
+                  SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFFitMM.py --add-trees 50 --keep-trees 500')
+                  RETURNS ('oc1 VARCHAR(10), oc2 INTEGER, oc3 CLOB')
+                ) AS d
+   ) WITH DATA
+     PRIMARY INDEX (statecode);
+
+-- Replace the models with the refreshed ones.
+DROP TABLE RFStateCodeModelsPy;
+RENAME TABLE RFStateCodeModelsPy_new TO RFStateCodeModelsPy;
+
+-- Part (F): Refitting only the models of drifted state codes
+--------------------------------------------------------------------------------
+--
+-- When the training table "MultiModelTrain_Py" is refreshed, the models of the
+-- state codes whose data have not changed much need not be refitted. To this
+-- end, fit the models with the option "--sketch" of the fitting script. The
+-- script then stores a compact summary sketch of the predictor columns of its
+-- training data in the column "sketch" of the first model row of every state
+-- code; the rest of the model table is as in Part (A).
+--
+-- Before you execute the following statement, replace <DBNAME> with the
+-- database name you specified in the beginning of Use Case [2] earlier.
+DROP TABLE RFStateCodeModelsPy;
+
+CREATE TABLE RFStateCodeModelsPy AS (
+    SELECT d.oc1 AS statecode,
+           d.oc2 AS chunk_id,
+           d.oc3 AS rf_model,
+           d.oc4 AS sketch
+    FROM SCRIPT ( ON (SELECT cust_id, cast(tot_income as FLOAT) as tot_income,
+                             tot_age, tot_cust_years, tot_children, female_ind,
+                             single_ind, married_ind, separated_ind,
+                             TRANSLATE(statecode USING UNICODE_TO_LATIN) AS scode,
+                             ck_acct_ind, sv_acct_ind, cc_acct_ind, ck_avg_bal,
+                             sv_avg_bal, cc_avg_bal, ck_avg_tran_amt, sv_avg_tran_amt,
+                             cc_avg_tran_amt, q1_trans_cnt, q2_trans_cnt,
+                             q3_trans_cnt, q4_trans_cnt, "sampleid"
+                      FROM MultiModelTrain_Py)
+                  PARTITION BY scode
+                  SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFFitMM.py --sketch')
+                  RETURNS ('oc1 VARCHAR(10), oc2 INTEGER, oc3 CLOB, oc4 CLOB')
+                ) AS d
+   ) WITH DATA
+     PRIMARY INDEX (statecode);
+
+-- After the training table has been refreshed, import into Vantage the drift
+-- scoring script. Before you execute the following statements, replace
+-- "driftscrPATH" with the full path to the script file on your client machine.
+CALL SYSUIF.REMOVE_FILE('stoRFDriftMM',1);
+CALL SYSUIF.INSTALL_FILE('stoRFDriftMM','stoRFDriftMM.py','cz!driftscrPATH');
+
+-- Use following statements, if applicable, to remove existing table versions.
+-- If a table is not in the database, then the respective statement will fail.
+DROP TABLE RFStateCodeDriftPy;
+DROP TABLE RFStateCodeModelsPy_new;
+
+-- Invoke the Python interpreter from SCRIPT, and specify the drift scoring
+-- script to compare the refreshed training data of every state code with the
+-- sketch of its model. Like the scoring query in Part (B), the query sends the
+-- sketch row of every state code along with its data rows. The script reads
+-- the data in a single pass, without fitting anything, and returns the drift
+-- score of the state code: the largest population stability index (PSI) of any
+-- predictor column, together with that column. A state code is marked for
+-- refitting when its drift score exceeds 0.1, or the value of the option
+-- "--threshold <T>", and when it has data but no model yet.
+CREATE TABLE RFStateCodeDriftPy AS (
+    SELECT d.oc1 AS statecode,
+           d.oc2 AS nrows,
+           d.oc3 AS drift,
+           d.oc4 AS drift_column,
+           d.oc5 AS refit
+    FROM SCRIPT ( ON (SELECT x.cust_id, CAST (x.tot_income as FLOAT) as tot_income,
+                             x.tot_age, x.tot_cust_years, x.tot_children, x.female_ind,
+                             x.single_ind, x.married_ind, x.separated_ind,
+                             TRANSLATE(x.statecode USING UNICODE_TO_LATIN) AS scode,
+                             x.ck_acct_ind, x.sv_acct_ind, x.cc_acct_ind, x.ck_avg_bal,
+                             x.sv_avg_bal, x.cc_avg_bal, x.ck_avg_tran_amt, x.sv_avg_tran_amt,
+                             x.cc_avg_tran_amt, x.q1_trans_cnt, x.q2_trans_cnt,
+                             x.q3_trans_cnt, x.q4_trans_cnt, x."sampleid",
+                             CAST (null AS CLOB) AS sketch
+                      FROM MultiModelTrain_Py x
+                      UNION ALL
+                      SELECT null, null, null, null, null, null, null, null, null,
+                             m.statecode,
+                             null, null, null, null, null, null, null, null, null,
+                             null, null, null, null, null,
+                             m.sketch
+                      FROM RFStateCodeModelsPy m
+                      WHERE m.chunk_id = 1)
+                  PARTITION BY scode
+                  SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFDriftMM.py')
+                  RETURNS ('oc1 VARCHAR(10), oc2 INTEGER, oc3 FLOAT, oc4 VARCHAR(30), oc5 INTEGER')
+                ) AS d
+   ) WITH DATA
+     PRIMARY INDEX (statecode);
+
+-- Refit the models of the state codes that are marked for refitting, and keep
+-- the models of the other state codes.
+CREATE TABLE RFStateCodeModelsPy_new AS (
+    SELECT d.oc1 AS statecode,
+           d.oc2 AS chunk_id,
+           d.oc3 AS rf_model,
+           d.oc4 AS sketch
+    FROM SCRIPT ( ON (SELECT cust_id, cast(tot_income as FLOAT) as tot_income,
+                             tot_age, tot_cust_years, tot_children, female_ind,
+                             single_ind, married_ind, separated_ind,
+                             TRANSLATE(statecode USING UNICODE_TO_LATIN) AS scode,
+                             ck_acct_ind, sv_acct_ind, cc_acct_ind, ck_avg_bal,
+                             sv_avg_bal, cc_avg_bal, ck_avg_tran_amt, sv_avg_tran_amt,
+                             cc_avg_tran_amt, q1_trans_cnt, q2_trans_cnt,
+                             q3_trans_cnt, q4_trans_cnt, "sampleid"
+                      FROM MultiModelTrain_Py
+                      WHERE TRANSLATE(statecode USING UNICODE_TO_LATIN)
+                            IN (SELECT statecode FROM RFStateCodeDriftPy WHERE refit = 1))
+                  PARTITION BY scode
+                  SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFFitMM.py --sketch')
+                  RETURNS ('oc1 VARCHAR(10), oc2 INTEGER, oc3 CLOB, oc4 CLOB')
+                ) AS d
+   ) WITH DATA
+     PRIMARY INDEX (statecode);
+
+INSERT INTO RFStateCodeModelsPy_new
+SELECT statecode, chunk_id, rf_model, sketch
+FROM RFStateCodeModelsPy
+WHERE statecode NOT IN (SELECT statecode FROM RFStateCodeDriftPy WHERE refit = 1);
+
+-- Replace the models with the refitted and kept ones.
+DROP TABLE RFStateCodeModelsPy;
+RENAME TABLE RFStateCodeModelsPy_new TO RFStateCodeModelsPy;
+
+-- Part (G): Cross-validation of the models
+--------------------------------------------------------------------------------
+--
+-- Before settling on the model settings of Part (A), estimate the accuracy of
+-- the models of every state code by k-fold cross-validation in Vantage. The
+-- following query assigns the rows of every state code to 5 folds by the hash
+-- of the customer ID, and sends all rows of a state code to each one of its 5
+-- fold partitions, where the rows of the fold are marked as held out. The
+-- cross-validation script "stoRFCVMM.py" fits a model on the rows that are not
+-- held out and scores the held-out rows, so that the single query fits the
+-- models of all folds of all state codes in parallel across the AMPs. For 10
+-- folds, replace 5 with 10 in the query.
+--
+-- Import into Vantage the cross-validation script. Before you execute the
+-- following statements, replace "cvscrPATH" with the full path to the script
+-- file on your client machine.
+CALL SYSUIF.REMOVE_FILE('stoRFCVMM',1);
+CALL SYSUIF.INSTALL_FILE('stoRFCVMM','stoRFCVMM.py','cz!cvscrPATH');
+
+-- Use following statement, if applicable, to remove existing table version.
+-- If the table is not in the database, then the statement will fail.
+DROP TABLE RFStateCodeCVPy;
+
+-- The script returns a row for every fold of every state code with the
+-- numbers of training and held-out rows, and the AUC, accuracy and log loss
+-- of the model on the held-out rows. The models are fitted with the settings
+-- of Part (A); the options "--trees <N>" and "--max-features <M>" in the
+-- SCRIPT_COMMAND clause cross-validate other settings. The options "--n-jobs",
+-- "--amps-per-node" and "--backend" of the fitting script work here as well.
+-- Before you execute the following statement, replace <DBNAME> with the
+-- database name you specified in the beginning of Use Case [2] earlier.
+CREATE TABLE RFStateCodeCVPy AS (
+    SELECT d.oc1 AS statecode,
+           d.oc2 AS fold_id,
+           d.oc3 AS n_train,
+           d.oc4 AS n_test,
+           d.oc5 AS auc,
+           d.oc6 AS accuracy,
+           d.oc7 AS log_loss
+    FROM SCRIPT ( ON (SELECT t.cust_id, CAST (t.tot_income as FLOAT) as tot_income,
+                             t.tot_age, t.tot_cust_years, t.tot_children, t.female_ind,
+                             t.single_ind, t.married_ind, t.separated_ind,
+                             TRANSLATE(t.statecode USING UNICODE_TO_LATIN) AS scode,
+                             t.ck_acct_ind, t.sv_acct_ind, t.cc_acct_ind, t.ck_avg_bal,
+                             t.sv_avg_bal, t.cc_avg_bal, t.ck_avg_tran_amt, t.sv_avg_tran_amt,
+                             t.cc_avg_tran_amt, t.q1_trans_cnt, t.q2_trans_cnt,
+                             t.q3_trans_cnt, t.q4_trans_cnt, t."sampleid",
+                             f.fold_id,
+                             CASE WHEN HASHBUCKET(HASHROW(t.cust_id)) MOD 5 = f.fold_id
+                                  THEN 1 ELSE 0 END AS holdout
+                      FROM MultiModelTrain_Py t
+                      CROSS JOIN (SELECT day_of_calendar - 1 AS fold_id
+                                  FROM sys_calendar.calendar
+                                  WHERE day_of_calendar <= 5) f)
+                  PARTITION BY scode, fold_id
+                  SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFCVMM.py')
+                  RETURNS ('oc1 VARCHAR(10), oc2 INTEGER, oc3 INTEGER, oc4 INTEGER, oc5 FLOAT, oc6 FLOAT, oc7 FLOAT')
+                ) AS d
+   ) WITH DATA
+     PRIMARY INDEX (statecode);
+
+-- Cross-validated metrics of every state code: the mean over the folds, and
+-- the standard deviation of the AUC across the folds.
+SELECT statecode,
+       COUNT(*) AS n_folds,
+       AVG(auc) AS mean_auc,
+       STDDEV_SAMP(auc) AS sd_auc,
+       AVG(accuracy) AS mean_accuracy,
+       AVG(log_loss) AS mean_log_loss
+FROM RFStateCodeCVPy
+GROUP BY statecode
+ORDER BY statecode;
+
+-- Part (H): Model fitting with per-state parameters from a grid
+--------------------------------------------------------------------------------
+--
+-- Rather than refitting all models in Part (A) once for every candidate
+-- parameter setting, the fitting script can fit all candidates of a parameter
+-- grid on the partition that it has read once, and keep the best candidate of
+-- every state code. Specify the grid with one option "--grid <name>=<values>"
+-- for every parameter, where the name is n_estimators, max_features,
+-- min_samples_leaf or max_depth, and the values are comma-separated integers.
+-- Parameters that are not in the grid keep their values of Part (A). The
+-- script keeps the candidate with the best out-of-bag (OOB) AUC, which needs
+-- no held-out rows; use Part (G) to compare settings on held-out rows instead.
+-- The candidates that differ only in their number of trees share their trees,
+-- so that n_estimators values cost only as much as the largest one.
+-- The script returns one more column with the parameters and the OOB AUC of
+-- the kept model of every state code, as JSON text in the first model row.
+-- The rest of the model table is as in Part (A), and is scored as in Part (B).
+--
+-- Before you execute the following statement, replace <DBNAME> with the
+-- database name you specified in the beginning of Use Case [2] earlier.
+DROP TABLE RFStateCodeModelsPy;
+
+CREATE TABLE RFStateCodeModelsPy AS (
+    SELECT d.oc1 AS statecode,
+           d.oc2 AS chunk_id,
+           d.oc3 AS rf_model,
+           d.oc4 AS params
+    FROM SCRIPT ( ON (SELECT cust_id, cast(tot_income as FLOAT) as tot_income,
+                             tot_age, tot_cust_years, tot_children, female_ind,
+                             single_ind, married_ind, separated_ind,
+                             TRANSLATE(statecode USING UNICODE_TO_LATIN) AS scode,
+                             ck_acct_ind, sv_acct_ind, cc_acct_ind, ck_avg_bal,
+                             sv_avg_bal, cc_avg_bal, ck_avg_tran_amt, sv_avg_tran_amt,
+                             cc_avg_tran_amt, q1_trans_cnt, q2_trans_cnt,
+                             q3_trans_cnt, q4_trans_cnt, "sampleid"
+                      FROM MultiModelTrain_Py)
+                  PARTITION BY scode
+                  SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFFitMM.py --grid max_features=3,5,7 --grid min_samples_leaf=1,5 --grid n_estimators=250,500')
+                  RETURNS ('oc1 VARCHAR(10), oc2 INTEGER, oc3 CLOB, oc4 VARCHAR(200)')
+                ) AS d
+   ) WITH DATA
+     PRIMARY INDEX (statecode);
+
+-- Parameters of the model of every state code
+SELECT statecode, params
+FROM RFStateCodeModelsPy
+WHERE chunk_id = 1
+ORDER BY statecode;
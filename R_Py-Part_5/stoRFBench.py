@@ -0,0 +1,877 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFBench.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# The present file contains micro-benchmarks for the building blocks of the
+# Python scripts that run with the SCRIPT Table Operator in the present demo
+# Part 5. The benchmarks run on a client machine or on a single Vantage node
+# against synthetic data in the text format that SCRIPT sends to the scripts,
+# so that no connection to a Vantage system is needed.
+#
+# Usage: python3 stoRFBench.py <benchmark> [options]
+# where <benchmark> is one of:
+#   decode   Decoding of Teradata FLOAT text columns
+#   parse    Decoding of ADS_Py input rows into typed columns
+#   write    Output of scoring results to the database
+#   forest   Model size, load and scoring time of the array-based forest format
+#   cache    Model loading with and without the decoded-model cache
+#   memory   Node memory of concurrent scoring processes (Linux only)
+#   transport Model size and decoding time of the model transport formats
+#   pipeline Sequential against pipelined scoring of row batches
+#   fit      Model fitting time against the number of fitting workers
+#   binned   Model fitting time and AUC of binned against exact fitting
+#   earlyexit Scoring time and trees per row of early-exit scoring
+#   engines  Scoring throughput of the scoring engines against scikit-learn
+#   projection Input bytes and decoding time of all ADS_Py columns against
+#            the columns that a model uses
+#   scorecache Scoring time with the score cache against the share of rows
+#            that changed since the last run
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+#  v.1.3     2026-10-18     Added the parse benchmark
+#  v.1.4     2026-10-18     Added the write benchmark
+#  v.1.5     2026-10-18     Added the forest benchmark
+#  v.1.6     2026-10-18     Added the cache benchmark
+#  v.1.7     2026-10-18     Added the memory benchmark
+#  v.1.8     2026-10-18     Added the transport benchmark
+#  v.1.9     2026-10-18     Added the pipeline benchmark
+#  v.1.10    2026-10-18     Added the fit benchmark
+#  v.1.11    2026-10-18     Added the binned benchmark
+#  v.1.12    2026-10-18     Added the earlyexit benchmark
+#  v.1.13    2026-10-18     Added the engines benchmark
+#  v.1.14    2026-10-18     Added the projection benchmark
+#  v.1.15    2026-10-18     Added the scorecache benchmark
+#  v.1.16    2026-10-18     Early-exit benchmark of both bounds
+#  v.1.17    2026-10-18     TableDecoder in the decode benchmark
+################################################################################
+
+import argparse
+import base64
+import contextlib
+import io
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from stoRFIO import decode_td_float, TableDecoder, ResultWriter, ADS_PY_SCHEMA, project_schema
+from stoRFIO import run_pipeline, PipelineStats
+from stoRFForest import ArrayForest, QuickScorerForest, export_forest, loads_model
+from stoRFForest import EARLY_EXIT_BOUNDS
+from stoRFModel import ModelCache, read_model_file, encode_transport, decode_transport
+from stoRFModel import ScoreCache
+from stoRFFit import fit_forest, available_cores, roc_auc, BACKENDS
+from stoRFBins import HistogramForestClassifier
+
+
+def td_float_text(values):
+    # Format numbers the way the database sends FLOAT values to SCRIPT; e.g.,
+    # 1.0 is sent as 1.00000000000000E 000.
+    out = []
+    for v in values:
+        mantissa, exponent = ('%.14E' % v).split('E')
+        exponent = int(exponent)
+        out.append('%sE%s%03d' % (mantissa, ' ' if exponent >= 0 else '-', abs(exponent)))
+    return out
+
+
+def synthetic_rows(schema, rows, seed=0):
+    # Tab-delimited input lines (bytes) for the given input schema, with values
+    # that resemble the demo data set.
+    rng = np.random.RandomState(seed)
+    states = np.array(['CA', 'NY', 'TX', 'IL', 'AZ', 'OH', 'OTHER'])
+    columns = []
+    for name, dtype in schema:
+        if name == 'cust_id':
+            values = [str(v) for v in 1362480 + np.arange(rows)]
+        elif dtype == 'float64':
+            values = td_float_text(np.where(rng.rand(rows) < 0.3, 0.0,
+                                            np.round(rng.gamma(2.0, 2000.0, rows), 2)))
+        elif dtype == 'int8':
+            values = [str(v) for v in rng.randint(0, 2, rows)]
+        elif dtype == 'category':
+            values = list(states[rng.randint(0, len(states), rows)])
+        else:
+            values = [str(v) for v in rng.randint(0, 40, rows)]
+        columns.append(values)
+    return [('\t'.join(row) + '\n').encode('ascii') for row in zip(*columns)]
+
+
+def legacy_parse(lines, schema):
+    # The input parsing previously used in the Part 5 scripts: a DataFrame of
+    # Python strings that is converted column by column.
+    inputData = [line.decode('utf-8').rstrip('\r\n').split('\t') for line in lines]
+    df = pd.DataFrame(inputData, columns=[name for name, dtype in schema])
+    del inputData
+    for name, dtype in schema:
+        if dtype == 'float64':
+            df[name] = df[name].apply(lambda x: "".join(x.split()))
+            df[name] = pd.to_numeric(df[name])
+        elif dtype == 'category':
+            df[name] = df[name].apply(lambda x: x.replace('"', ''))
+        else:
+            df[name] = pd.to_numeric(df[name])
+    return df
+
+
+def peak_memory(func):
+    # Peak memory in MB that is allocated while func() runs.
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def best_time(func, repeat):
+    # Smallest wall time in seconds out of repeat calls of func().
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+###
+### Benchmark: decode
+###
+
+def bench_decode(args):
+    rng = np.random.RandomState(args.seed)
+    text = pd.Series(td_float_text(rng.normal(3000.0, 2000.0, args.rows)))
+
+    def legacy():
+        # The per-value cleaning previously used in the Part 5 scripts.
+        col = text.apply(lambda x: "".join(x.split()))
+        return pd.to_numeric(col).values
+
+    def bulk():
+        return decode_td_float(text)
+
+    # The same column as SCRIPT input lines, decoded by the schema decoder
+    decoder = TableDecoder([('value', 'float64')])
+    lines = [(value + '\n').encode('utf-8') for value in text]
+
+    def table():
+        return decoder.decode(lines)['value'].values
+
+    if not np.array_equal(legacy(), bulk()):
+        raise SystemExit('decode_td_float() results differ from the legacy decoding')
+    if not np.array_equal(legacy(), table()):
+        raise SystemExit('TableDecoder results differ from the legacy decoding')
+
+    tLegacy = best_time(legacy, args.repeat)
+    tBulk = best_time(bulk, args.repeat)
+    tTable = best_time(table, args.repeat)
+    print('Decoding %d Teradata FLOAT values (best of %d runs)' % (args.rows, args.repeat))
+    print('  apply(lambda) + pd.to_numeric : %8.3f s' % tLegacy)
+    print('  decode_td_float               : %8.3f s   %6.1fx' % (tBulk, tLegacy / tBulk))
+    print('  TableDecoder                  : %8.3f s   %6.1fx' % (tTable, tLegacy / tTable))
+
+
+###
+### Benchmark: parse
+###
+
+def bench_parse(args):
+    lines = synthetic_rows(ADS_PY_SCHEMA, args.rows, args.seed)
+    decoder = TableDecoder(ADS_PY_SCHEMA)
+
+    def legacy():
+        return legacy_parse(lines, ADS_PY_SCHEMA)
+
+    def typed():
+        return decoder.decode(lines)
+
+    old, new = legacy(), typed()
+    for name in new.columns:
+        if not np.array_equal(old[name].values, new[name].values):
+            raise SystemExit('TableDecoder results differ from the legacy parsing in column ' + name)
+
+    print('Parsing %d ADS_Py input rows (best of %d runs)' % (args.rows, args.repeat))
+    print('                           time [s]   peak memory [MB]   result [MB]')
+    for label, func, df in (('string DataFrame + casts', legacy, old),
+                            ('TableDecoder', typed, new)):
+        print('  %-24s %9.3f %18.1f %13.1f' % (label, best_time(func, args.repeat),
+                                                peak_memory(func),
+                                                df.memory_usage(deep=True).sum() / 1e6))
+
+
+###
+### Benchmark: write
+###
+
+def bench_write(args):
+    rng = np.random.RandomState(args.seed)
+    proba = rng.rand(args.rows)
+    df = pd.DataFrame({'cust_id': 1362480 + np.arange(args.rows, dtype=np.int32),
+                       'statecode': pd.Categorical(np.array(['CA', 'NY', 'OTHER'])[rng.randint(0, 3, args.rows)]),
+                       'Prob0': 1.0 - proba, 'Prob1': proba,
+                       'cc_acct_ind': rng.randint(0, 2, args.rows).astype(np.int8)})
+    delimiter = '\t'
+
+    def legacy():
+        # The row-by-row output previously used in "stoRFScoreMM.py".
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            for index, row in df.iterrows():
+                print(row['cust_id'], delimiter, row['statecode'], delimiter,
+                      row['Prob0'], delimiter, row['Prob1'], delimiter, row['cc_acct_ind'])
+        return out.getvalue().encode('utf-8')
+
+    def bulk():
+        out = io.BytesIO()
+        writer = ResultWriter(out, delimiter)
+        writer.write(df['cust_id'].values, df['statecode'].values, df['Prob0'].values,
+                     df['Prob1'].values, df['cc_acct_ind'].values)
+        return out.getvalue()
+
+    if legacy() != bulk():
+        raise SystemExit('ResultWriter output differs from the legacy output')
+
+    tLegacy = best_time(legacy, args.repeat)
+    tBulk = best_time(bulk, args.repeat)
+    print('Writing %d result rows (best of %d runs)' % (args.rows, args.repeat))
+    print('  iterrows() + print : %8.3f s' % tLegacy)
+    print('  ResultWriter       : %8.3f s' % tBulk)
+    print('  speedup            : %8.1fx' % (tLegacy / tBulk))
+
+
+###
+### Benchmark: forest
+###
+
+PREDICTOR_COLUMNS = ["tot_income", "tot_age", "tot_cust_years", "tot_children",
+                     "female_ind", "single_ind", "married_ind", "separated_ind",
+                     "ck_acct_ind", "sv_acct_ind", "ck_avg_bal", "sv_avg_bal",
+                     "ck_avg_tran_amt", "sv_avg_tran_amt", "q1_trans_cnt",
+                     "q2_trans_cnt", "q3_trans_cnt", "q4_trans_cnt"]
+
+
+def synthetic_training(rows, seed=0):
+    # Predictors and labels of synthetic ADS_Py rows
+    df = TableDecoder(ADS_PY_SCHEMA).decode(synthetic_rows(ADS_PY_SCHEMA, rows, seed))
+    X = df[PREDICTOR_COLUMNS]
+    # Noisy labels, so that the trees grow as deep as with the demo data
+    rng = np.random.RandomState(seed)
+    odds = np.exp((df['tot_income'] - 4000.0) / 2000.0 + df['ck_acct_ind'] - 0.5)
+    y = (rng.rand(rows) < odds / (1.0 + odds)).astype(int)
+    return X, y
+
+
+def synthetic_forest(rows, trees, seed=0):
+    # A Random Forest fitted to synthetic ADS_Py rows, and the predictors
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = synthetic_training(rows, seed)
+    classifier = RandomForestClassifier(n_estimators=trees, max_features=5,
+                                        random_state=0).fit(X, y)
+    return classifier, X
+
+
+def bench_forest(args):
+    classifier, X = synthetic_forest(args.rows, args.trees, args.seed)
+
+    pickled = base64.b64encode(pickle.dumps(classifier))
+    arrays = base64.b64encode(export_forest(classifier))
+    forest = loads_model(base64.b64decode(arrays))
+    if not np.array_equal(classifier.predict_proba(X), forest.predict_proba(X)):
+        raise SystemExit('Array-based forest probabilities differ from predict_proba()')
+
+    print('Random Forest with %d trees, scoring %d rows (best of %d runs)'
+          % (args.trees, args.rows, args.repeat))
+    print('                      model [MB]   load [s]   score [s]')
+    for label, payload, model in (('pickle + sklearn', pickled, classifier),
+                                  ('array-based format', arrays, forest)):
+        tLoad = best_time(lambda: loads_model(base64.b64decode(payload)), args.repeat)
+        tScore = best_time(lambda: model.predict_proba(X), args.repeat)
+        print('  %-18s %12.1f %10.3f %11.3f' % (label, len(payload) / 1e6, tLoad, tScore))
+
+    # A scoring process that unpickles the model must also import scikit-learn
+    def python(statement):
+        return lambda: subprocess.check_call([sys.executable, '-c', statement])
+    tImport = (best_time(python('import numpy, sklearn.ensemble'), args.repeat) -
+               best_time(python('import numpy'), args.repeat))
+    print('  scikit-learn import time, needed by pickled models only: %.3f s' % tImport)
+
+
+###
+### Benchmark: cache
+###
+
+def bench_cache(args):
+    classifier, X = synthetic_forest(args.rows, args.trees, args.seed)
+    workDir = tempfile.mkdtemp()
+    try:
+        modelFile = os.path.join(workDir, 'RFmodel_py.out')
+        with open(modelFile, 'wb') as fOut:
+            fOut.write(base64.b64encode(pickle.dumps(classifier)))
+        cache = ModelCache(os.path.join(workDir, 'cache'))
+
+        def missed():
+            shutil.rmtree(cache.directory, ignore_errors=True)
+            return cache.load(modelFile)
+
+        if not np.array_equal(classifier.predict_proba(X), missed().predict_proba(X)):
+            raise SystemExit('Cached model probabilities differ from predict_proba()')
+
+        print('Loading a pickled Random Forest with %d trees (best of %d runs)'
+              % (args.trees, args.repeat))
+        print('  base64 + unpickle          : %8.3f s'
+              % best_time(lambda: loads_model(read_model_file(modelFile)), args.repeat))
+        print('  cache miss (decode + store): %8.3f s' % best_time(missed, args.repeat))
+        print('  cache hit                  : %8.3f s'
+              % best_time(lambda: cache.load(modelFile), args.repeat))
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+
+
+###
+### Benchmark: memory
+###
+
+# Scoring process started by the memory benchmark. It loads the model in the
+# given mode, reads through all model arrays so that all their pages are
+# resident, and reports its resident (RSS) and proportional (PSS) memory in kB
+# once all processes are running. PSS splits the shared pages evenly across the processes that
+# map them, so that the PSS of all processes adds up to the node memory used.
+_MEMORY_PROCESS = '''
+import sys
+import numpy as np
+from stoRFForest import ArrayForest, loads_model
+from stoRFModel import ModelCache, read_model_file
+mode, modelFile, cacheDir = sys.argv[1:4]
+if mode == 'pickle':
+    model = loads_model(read_model_file(modelFile))
+elif mode != 'none':
+    model = ModelCache(cacheDir, use_mmap=(mode == 'mmap')).load(modelFile)
+    for name in ArrayForest._ARRAYS:
+        getattr(model, name).ravel().view(np.uint8).sum()
+print('ready', flush=True)
+sys.stdin.readline()
+memory = {}
+with open('/proc/self/smaps_rollup') as fIn:
+    for line in fIn:
+        fields = line.split()
+        if fields[0] in ('Rss:', 'Pss:'):
+            memory[fields[0]] = int(fields[1])
+print(memory['Rss:'], memory['Pss:'], flush=True)
+sys.stdin.read()
+'''
+
+
+def bench_memory(args):
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        raise SystemExit('The memory benchmark needs Linux with /proc/self/smaps_rollup')
+    classifier, X = synthetic_forest(args.rows, args.trees, args.seed)
+    workDir = tempfile.mkdtemp()
+    try:
+        modelFile = os.path.join(workDir, 'RFmodel_py.out')
+        with open(modelFile, 'wb') as fOut:
+            fOut.write(base64.b64encode(pickle.dumps(classifier)))
+        cacheDir = os.path.join(workDir, 'cache')
+        ModelCache(cacheDir).load(modelFile)   # Fill the cache
+        scriptDir = os.path.dirname(os.path.abspath(__file__))
+
+        print('Memory of %d concurrent scoring processes, Random Forest with %d trees'
+              % (args.processes, args.trees))
+        print('                            RSS per process [MB]   total RSS [MB]   total PSS [MB]')
+        for mode, label in (('none', 'no model (baseline)'), ('pickle', 'unpickled sklearn'),
+                            ('private', 'array format, read'), ('mmap', 'array format, mmap')):
+            procs = [subprocess.Popen([sys.executable, '-c', _MEMORY_PROCESS, mode, modelFile,
+                                       cacheDir],
+                                      cwd=scriptDir, stdin=subprocess.PIPE,
+                                      stdout=subprocess.PIPE, universal_newlines=True)
+                     for i in range(args.processes)]
+            for proc in procs:
+                proc.stdout.readline()
+            # All processes hold their model now; measure them together.
+            for proc in procs:
+                proc.stdin.write('\n')
+                proc.stdin.flush()
+            usage = np.array([[int(v) for v in proc.stdout.readline().split()] for proc in procs])
+            for proc in procs:
+                proc.stdin.close()
+                proc.wait()
+            rss, pss = usage.sum(axis=0) / 1024.0
+            print('  %-24s %22.1f %16.1f %16.1f' % (label, rss / len(procs), rss, pss))
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+
+
+###
+### Benchmark: transport
+###
+
+def bench_transport(args):
+    classifier, X = synthetic_forest(args.rows, args.trees, args.seed)
+    print('Transport of a Random Forest with %d trees through a table (best of %d runs)'
+          % (args.trees, args.repeat))
+    print('                               model text [MB]   encode [s]   decode [s]')
+    # The format previously used in "stoRFFitMM.py": the repr of base64 bytes
+    legacy = repr(base64.b64encode(pickle.dumps(classifier)))
+    print('  %-28s %15.1f %12s %12s' % ('pickle, repr(b64) (earlier)', len(legacy) / 1e6, '-', '-'))
+    for modelFormat, modelBytes in (('pickle', pickle.dumps(classifier)),
+                                    ('arrays', export_forest(classifier))):
+        for compression in ('none', 'zlib', 'lzma'):
+            chunks = encode_transport(modelBytes, compression)
+            numbered = list(enumerate(chunks, 1))
+            if decode_transport(numbered) != modelBytes:
+                raise SystemExit('Transport round trip fails with ' + compression)
+            tEncode = best_time(lambda: encode_transport(modelBytes, compression), args.repeat)
+            tDecode = best_time(lambda: decode_transport(numbered), args.repeat)
+            print('  %-28s %15.1f %12.3f %12.3f' % (modelFormat + ', ' + compression,
+                                                    sum(map(len, chunks)) / 1e6, tEncode, tDecode))
+
+
+###
+### Benchmark: pipeline
+###
+
+def bench_pipeline(args):
+    classifier, X = synthetic_forest(args.fit_rows, args.trees, args.seed)
+    lines = synthetic_rows(ADS_PY_SCHEMA, args.rows, args.seed)
+    decoder = TableDecoder(ADS_PY_SCHEMA)
+    inputWait = args.input_ms / 1000.0
+    outputWait = args.output_ms / 1000.0
+
+    # The stages of "stoRFScore.py". The database sends the input and takes
+    # the output through pipes; the sleeps stand for the time that the script
+    # waits on these pipes for every batch.
+    def make_reader():
+        starts = iter(range(0, len(lines), args.batch_size))
+
+        def read():
+            start = next(starts, None)
+            if start is None:
+                return None
+            time.sleep(inputWait)
+            return decoder.decode(lines[start:start + args.batch_size])
+        return read
+
+    def process(df):
+        return df, classifier.predict_proba(df[PREDICTOR_COLUMNS])
+
+    def make_writer(out):
+        writer = ResultWriter(out)
+
+        def write(result):
+            df, proba = result
+            writer.write(df['cust_id'].values, proba[:, 0], proba[:, 1],
+                         df['cc_acct_ind'].values)
+            time.sleep(outputWait)
+        return write
+
+    def sequential():
+        out = io.BytesIO()
+        read, write = make_reader(), make_writer(out)
+        batch = read()
+        while batch is not None:
+            write(process(batch))
+            batch = read()
+        return out.getvalue()
+
+    stats = PipelineStats()
+
+    def pipelined():
+        out = io.BytesIO()
+        run_pipeline(make_reader(), process, make_writer(out), args.depth, stats)
+        return out.getvalue()
+
+    if sequential() != pipelined():
+        raise SystemExit('Pipelined output differs from the sequential output')
+
+    tSequential = best_time(sequential, args.repeat)
+    stats.__init__()
+    tPipelined = best_time(pipelined, 1)
+    print('Scoring %d rows in batches of %d with %d trees; %d ms input and %d ms '
+          'output wait per batch' % (args.rows, args.batch_size, args.trees,
+                                     args.input_ms, args.output_ms))
+    print('  sequential : %8.3f s' % tSequential)
+    print('  pipelined  : %8.3f s' % tPipelined)
+    print('  speedup    : %8.1fx' % (tSequential / tPipelined))
+    stats.report(sys.stdout)
+
+
+###
+### Benchmark: fit
+###
+
+def bench_fit(args):
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = synthetic_training(args.rows, args.seed)
+    if args.workers:
+        workers = [int(n) for n in args.workers.split(',')]
+    else:
+        workers = [1]
+        while workers[-1] * 2 <= available_cores():
+            workers.append(workers[-1] * 2)
+
+    def fit(nJobs, backend):
+        classifier = RandomForestClassifier(n_estimators=args.trees, max_features=5,
+                                            random_state=0)
+        return fit_forest(classifier, X, y, nJobs, backend)
+
+    reference = export_forest(fit(1, 'threads'))
+    print('Fitting a Random Forest with %d trees on %d rows on %d available cores '
+          '(best of %d runs)' % (args.trees, args.rows, available_cores(), args.repeat))
+    print('  backend      workers   fit [s]   speedup')
+    for backend in sorted(BACKENDS):
+        tSingle = None
+        for nJobs in workers:
+            if export_forest(fit(nJobs, backend)) != reference:
+                raise SystemExit('Forest fitted with %d %s differs' % (nJobs, backend))
+            tFit = best_time(lambda: fit(nJobs, backend), args.repeat)
+            tSingle = tSingle or tFit
+            print('  %-10s %9d %9.3f %8.1fx' % (backend, nJobs, tFit, tSingle / tFit))
+
+
+###
+### Benchmark: binned
+###
+
+def bench_binned(args):
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = synthetic_training(args.rows, args.seed)
+    XTest, yTest = synthetic_training(args.test_rows, args.seed + 1)
+
+    def fit(bins):
+        if bins is None:
+            classifier = RandomForestClassifier(n_estimators=args.trees, max_features=5,
+                                                max_depth=args.max_depth, random_state=0)
+            return ArrayForest.from_sklearn(classifier.fit(X, y))
+        classifier = HistogramForestClassifier(n_estimators=args.trees, max_features=5,
+                                               max_depth=args.max_depth, max_bins=bins,
+                                               random_state=0)
+        return classifier.fit(X, y).to_array_forest()
+
+    print('Fitting a Random Forest with %d trees on %d rows, AUC on %d other rows '
+          '(best of %d runs)' % (args.trees, args.rows, args.test_rows, args.repeat))
+    print('  bins        fit [s]   speedup   nodes/tree      AUC   AUC loss')
+    tExact = aucExact = None
+    for bins in [None] + [int(n) for n in args.bins.split(',')]:
+        tFit = best_time(lambda: fit(bins), args.repeat)
+        forest = fit(bins)
+        auc = roc_auc(yTest, forest.predict_proba(XTest)[:, 1])
+        if bins is None:
+            tExact = tFit
+            aucExact = auc
+        print('  %-8s %10.3f %8.1fx %12d %8.4f %+10.4f'
+              % ('exact' if bins is None else bins, tFit, tExact / tFit,
+                 len(forest.feature) // forest.n_estimators, auc, aucExact - auc))
+
+
+###
+### Benchmark: earlyexit
+###
+
+def bench_earlyexit(args):
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = synthetic_training(args.fit_rows, args.seed)
+    forest = ArrayForest.from_sklearn(RandomForestClassifier(
+        n_estimators=args.trees, max_features=5, random_state=0).fit(X, y))
+    XTest, yTest = synthetic_training(args.rows, args.seed + 1)
+    exact = forest.predict_proba(XTest)
+
+    print('Scoring %d rows with a Random Forest with %d trees fitted on %d other rows, '
+          'blocks of %d trees (best of %d runs)'
+          % (args.rows, args.trees, args.fit_rows, args.block, args.repeat))
+    print('  bound          mode              score [s]   speedup   trees/row   max |dp|   '
+          'class changes')
+    tFull = best_time(lambda: forest.predict_proba(XTest), args.repeat)
+    print('  %-14s %-16s %10.3f %8.2fx %11.1f %10.4f %15d'
+          % ('-', 'predict_proba', tFull, 1.0, args.trees, 0.0, 0))
+    modes = ([('tolerance', float(t)) for t in args.tolerances.split(',')] +
+             [('threshold', float(t)) for t in args.thresholds.split(',')])
+    for bound in args.bounds.split(','):
+        for mode, value in modes:
+            if mode == 'tolerance':
+                kwargs = {'tolerance': value}
+            else:
+                kwargs = {'threshold': value}
+            score = lambda: forest.predict_proba_early_exit(XTest, block_size=args.block,
+                                                            bound=bound, **kwargs)
+            tScore = best_time(score, args.repeat)
+            proba, used = score()
+            cut = 0.5 if mode == 'tolerance' else value
+            changes = int(np.sum((proba[:, 1] > cut) != (exact[:, 1] > cut)))
+            print('  %-14s %-16s %10.3f %8.2fx %11.1f %10.4f %15d'
+                  % (bound, '%s %g' % (mode, value), tScore, tFull / tScore, used.mean(),
+                     np.abs(proba - exact).max(), changes))
+
+
+###
+### Benchmark: engines
+###
+
+def bench_engines(args):
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = synthetic_training(args.fit_rows, args.seed)
+    classifier = RandomForestClassifier(n_estimators=args.trees, max_features=5,
+                                        max_depth=args.max_depth or None,
+                                        random_state=0).fit(X, y)
+    forest = ArrayForest.from_sklearn(classifier)
+    engines = [('scikit-learn', classifier), ('array-based', forest)]
+    try:
+        engines.append(('quickscorer', QuickScorerForest(forest)))
+    except ValueError as exc:
+        print('QuickScorer engine not available: %s' % exc)
+    XTest, yTest = synthetic_training(args.rows, args.seed + 1)
+    for name, engine in engines[1:]:
+        if not np.array_equal(engine.predict_proba(XTest), classifier.predict_proba(XTest)):
+            raise SystemExit('Probabilities of the %s engine differ from predict_proba()' % name)
+
+    print('Scoring %d rows with a Random Forest with %d trees of max_depth %s, '
+          '%d leaves per tree on average (best of %d runs)'
+          % (args.rows, args.trees, args.max_depth or 'None',
+             int(np.sum(forest.feature < 0)) // args.trees, args.repeat))
+    print('  engine        batch rows      rows/s   vs scikit-learn')
+    for batchSize in [int(n) for n in args.batch_sizes.split(',')]:
+        batches = [XTest[start:start + batchSize] for start in range(0, args.rows, batchSize)]
+        rate = {}
+        for name, engine in engines:
+            tScore = best_time(lambda: [engine.predict_proba(batch) for batch in batches],
+                               args.repeat)
+            rate[name] = args.rows / tScore
+            print('  %-13s %10d %11.0f %16.2fx'
+                  % (name, batchSize, rate[name], rate[name] / rate['scikit-learn']))
+
+
+###
+### Benchmark: projection
+###
+
+def bench_projection(args):
+    columns = args.columns.split(',') if args.columns else PREDICTOR_COLUMNS
+    lines = synthetic_rows(ADS_PY_SCHEMA, args.rows, args.seed)
+    # The same rows with only the columns of the projected input query
+    schema = project_schema(ADS_PY_SCHEMA, ['cust_id'] + columns + ['cc_acct_ind'])
+    names = [name for name, dtype in ADS_PY_SCHEMA]
+    keep = [names.index(name) for name, dtype in schema]
+    projected = [b'\t'.join(fields[i] for i in keep) + b'\n'
+                 for fields in (line.rstrip(b'\n').split(b'\t') for line in lines)]
+
+    fullDecoder = TableDecoder(ADS_PY_SCHEMA)
+    projectedDecoder = TableDecoder(schema)
+    full, narrow = fullDecoder.decode(lines), projectedDecoder.decode(projected)
+    for name in narrow.columns:
+        if not np.array_equal(full[name].values, narrow[name].values):
+            raise SystemExit('Projected decoding differs from the full decoding in column ' + name)
+
+    print('Decoding %d ADS_Py input rows with %d predictor columns (best of %d runs)'
+          % (args.rows, len(columns), args.repeat))
+    print('                      columns   bytes/row   time [us/row]')
+    for label, decoder, rows in (('SELECT *', fullDecoder, lines),
+                                 ('projected', projectedDecoder, projected)):
+        tDecode = best_time(lambda: decoder.decode(rows), args.repeat)
+        print('  %-18s %8d %11.1f %15.2f'
+              % (label, len(decoder.columns), sum(map(len, rows)) / float(args.rows),
+                 tDecode / args.rows * 1e6))
+
+
+###
+### Benchmark: scorecache
+###
+
+def bench_scorecache(args):
+    classifier, X = synthetic_forest(args.fit_rows, args.trees, args.seed)
+    forest = ArrayForest.from_sklearn(classifier)
+    XFirst = synthetic_training(args.rows, args.seed + 1)[0]
+    exact = forest.predict_proba(XFirst)
+    tFull = best_time(lambda: forest.predict_proba(XFirst), args.repeat)
+
+    print('Scoring %d rows with a Random Forest with %d trees after a first run with the score '
+          'cache (best of %d runs)' % (args.rows, args.trees, args.repeat))
+    print('  changed rows   hit rate   time [s]   speedup   lookup [s]')
+    print('  %-12s %10s %10.3f %9.2fx %12s' % ('no cache', '-', tFull, 1.0, '-'))
+    directory = tempfile.mkdtemp(prefix='stoRFBench-')
+    try:
+        first = ScoreCache('bench', forest.n_classes_, directory)
+        first.predict_proba(forest, XFirst)
+        first.save()
+        rng = np.random.RandomState(args.seed)
+        for fraction in [float(f) for f in args.changed.split(',')]:
+            # The next run, with a share of the rows changed in one predictor
+            XNext = XFirst.copy()
+            changed = rng.rand(args.rows) < fraction
+            XNext.loc[changed, 'tot_age'] += 1
+            times = []
+            for i in range(args.repeat):
+                cache = ScoreCache('bench', forest.n_classes_, directory)
+                start = time.perf_counter()
+                proba = cache.predict_proba(forest, XNext)
+                times.append(time.perf_counter() - start)
+            if not np.array_equal(proba[~changed], exact[~changed]):
+                raise SystemExit('Cached probabilities differ from predict_proba()')
+            print('  %-12s %9.1f%% %10.3f %9.2fx %12.3f'
+                  % ('%g%%' % (100.0 * fraction), 100.0 * cache.hits / cache.rows, min(times),
+                     tFull / min(times), cache.lookup_seconds))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+###
+### Command line
+###
+
+parser = argparse.ArgumentParser(description='Micro-benchmarks for the Part 5 SCRIPT scripts.')
+subparsers = parser.add_subparsers(dest='benchmark')
+subparsers.required = True
+
+p = subparsers.add_parser('decode', help='decoding of Teradata FLOAT text columns')
+p.add_argument('--rows', type=int, default=1000000)
+p.add_argument('--repeat', type=int, default=3)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_decode)
+
+p = subparsers.add_parser('parse', help='decoding of ADS_Py input rows into typed columns')
+p.add_argument('--rows', type=int, default=200000)
+p.add_argument('--repeat', type=int, default=3)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_parse)
+
+p = subparsers.add_parser('write', help='output of scoring results to the database')
+p.add_argument('--rows', type=int, default=200000)
+p.add_argument('--repeat', type=int, default=3)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_write)
+
+p = subparsers.add_parser('forest', help='model size, load and scoring time of the array-based forest format')
+p.add_argument('--rows', type=int, default=20000)
+p.add_argument('--trees', type=int, default=500)
+p.add_argument('--repeat', type=int, default=3)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_forest)
+
+p = subparsers.add_parser('cache', help='model loading with and without the decoded-model cache')
+p.add_argument('--rows', type=int, default=20000)
+p.add_argument('--trees', type=int, default=500)
+p.add_argument('--repeat', type=int, default=3)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_cache)
+
+p = subparsers.add_parser('memory', help='node memory of concurrent scoring processes (Linux only)')
+p.add_argument('--processes', type=int, default=8)
+p.add_argument('--rows', type=int, default=5000)
+p.add_argument('--trees', type=int, default=500)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_memory)
+
+p = subparsers.add_parser('transport', help='model size and decoding time of the model transport formats')
+p.add_argument('--rows', type=int, default=5000)
+p.add_argument('--trees', type=int, default=500)
+p.add_argument('--repeat', type=int, default=1)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_transport)
+
+p = subparsers.add_parser('pipeline', help='sequential against pipelined scoring of row batches')
+p.add_argument('--rows', type=int, default=200000)
+p.add_argument('--batch-size', type=int, default=10000)
+p.add_argument('--fit-rows', type=int, default=2500)
+p.add_argument('--trees', type=int, default=100)
+p.add_argument('--input-ms', type=int, default=50)
+p.add_argument('--output-ms', type=int, default=50)
+p.add_argument('--depth', type=int, default=2)
+p.add_argument('--repeat', type=int, default=1)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_pipeline)
+
+p = subparsers.add_parser('fit', help='model fitting time against the number of fitting workers')
+p.add_argument('--rows', type=int, default=50000)
+p.add_argument('--trees', type=int, default=100)
+p.add_argument('--workers', default=None,
+               help='comma-separated worker counts; default: powers of 2 up to the available cores')
+p.add_argument('--repeat', type=int, default=1)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_fit)
+
+p = subparsers.add_parser('binned', help='model fitting time and AUC of binned against exact fitting')
+p.add_argument('--rows', type=int, default=200000)
+p.add_argument('--test-rows', type=int, default=50000)
+p.add_argument('--trees', type=int, default=20)
+p.add_argument('--bins', default='256,64,16',
+               help='comma-separated maximum numbers of bins')
+p.add_argument('--max-depth', type=int, default=None,
+               help='maximum depth of the trees; fully grown by default')
+p.add_argument('--repeat', type=int, default=1)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_binned)
+
+p = subparsers.add_parser('earlyexit', help='scoring time and trees per row of early-exit scoring')
+p.add_argument('--rows', type=int, default=20000)
+p.add_argument('--fit-rows', type=int, default=5000)
+p.add_argument('--trees', type=int, default=500)
+p.add_argument('--block', type=int, default=50)
+p.add_argument('--tolerances', default='0,0.01,0.05,0.1',
+               help='comma-separated probability tolerances')
+p.add_argument('--thresholds', default='0.5',
+               help='comma-separated class thresholds')
+p.add_argument('--bounds', default=','.join(EARLY_EXIT_BOUNDS),
+               help='comma-separated early-exit bounds')
+p.add_argument('--repeat', type=int, default=1)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_earlyexit)
+
+p = subparsers.add_parser('engines', help='scoring throughput of the scoring engines against scikit-learn')
+p.add_argument('--rows', type=int, default=20000)
+p.add_argument('--fit-rows', type=int, default=5000)
+p.add_argument('--trees', type=int, default=500)
+p.add_argument('--max-depth', type=int, default=6,
+               help='maximum depth of the trees; 0 grows them fully')
+p.add_argument('--batch-sizes', default='100,1000,10000',
+               help='comma-separated numbers of rows scored per call')
+p.add_argument('--repeat', type=int, default=3)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_engines)
+
+p = subparsers.add_parser('projection', help='input bytes and decoding time of all ADS_Py columns '
+                                             'against the columns that a model uses')
+p.add_argument('--rows', type=int, default=200000)
+p.add_argument('--columns', default=None,
+               help='comma-separated predictor columns that the model uses; default: all 18')
+p.add_argument('--repeat', type=int, default=3)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_projection)
+
+p = subparsers.add_parser('scorecache', help='scoring time with the score cache against the share '
+                                             'of rows that changed since the last run')
+p.add_argument('--rows', type=int, default=100000)
+p.add_argument('--fit-rows', type=int, default=5000)
+p.add_argument('--trees', type=int, default=100)
+p.add_argument('--changed', default='0,0.05,0.2,1',
+               help='comma-separated shares of changed rows')
+p.add_argument('--repeat', type=int, default=3)
+p.add_argument('--seed', type=int, default=0)
+p.set_defaults(func=bench_scorecache)
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    args.func(args)
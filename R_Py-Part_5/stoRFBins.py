@@ -0,0 +1,551 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFBins.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# The present file is a helper module for the binned model fitting of the
+# fitting scripts of the present demo Part 5.
+#
+# The split search of scikit-learn sorts the values of the candidate features
+# of every tree node, and tries a split between any two distinct values. For
+# continuous columns like tot_income or ck_avg_bal, with tens of thousands of
+# distinct values in a large partition, this takes long. In the binned
+# fitting, every predictor column is quantized once per partition into at most
+# 256 bins, and the trees are grown on the 8-bit bin codes of the rows with
+# histogram split finding: the weighted class counts of the bins of a node are
+# summed up in one pass over its rows, and the best split of a candidate
+# feature is found from the running sums over its bins, without any sorting.
+# The trees are grown level by level, for all nodes of a level and a batch of
+# trees at once. As in scikit-learn, every tree is grown on a bootstrap sample
+# of the rows, and every node draws max_features candidate features among the
+# features that are not constant in the node.
+#
+# The split codes of the grown trees are mapped back to the bin edges, so that
+# the raw values of a row fall on the same side of a split as their bin codes.
+# The binned forest is exported in the array-based format of the helper module
+# stoRFForest.py, and is scored on the raw values by the scoring scripts like
+# any other model in this format.
+#
+# The module is used in the Vantage Advanced SQL Engine by the fitting scripts,
+# and must be installed together with them.
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+################################################################################
+
+import numpy as np
+from stoRFForest import ArrayForest
+
+# Largest number of bins of a column, so that the bin codes fit into uint8
+MAX_BINS = 256
+
+# Number of in-bag rows of the trees that are grown together in a batch
+BATCH_ROWS = 1 << 20
+
+
+class FeatureBinner(object):
+    """Quantization of the columns of a matrix into at most max_bins bins.
+
+    A column with few distinct values gets a bin for every value, with the bin
+    edges halfway between consecutive values. Any other column gets bins with
+    about the same number of rows, with edges at its quantiles. The bin code
+    of a value x is the number of edges below x, so that x <= edges[c] holds
+    if and only if the code of x is at most c. Values are binned in single
+    precision, in which the fitted trees compare them as well.
+    """
+
+    def __init__(self, max_bins=MAX_BINS):
+        if not 2 <= max_bins <= MAX_BINS:
+            raise ValueError('The number of bins must be between 2 and %d' % MAX_BINS)
+        self.max_bins = max_bins
+
+    def fit(self, X):
+        # As in scikit-learn, only string column names are kept as feature names
+        self.feature_names_ = None
+        if hasattr(X, 'columns') and all(isinstance(name, str) for name in X.columns):
+            self.feature_names_ = list(X.columns)
+        X = np.asarray(X, dtype=np.float32)
+        self.edges_ = []
+        for j in range(X.shape[1]):
+            values = X[:, j]
+            values = values[~np.isnan(values)]
+            distinct = np.unique(values)
+            if len(distinct) <= self.max_bins:
+                edges = ((distinct[:-1].astype(np.float64) + distinct[1:]) / 2).astype(np.float32)
+                # A midpoint that rounds up to the upper value falls back to the lower one
+                edges = np.where(edges < distinct[1:], edges, distinct[:-1])
+            else:
+                quantiles = np.linspace(0.0, 1.0, self.max_bins + 1)[1:-1]
+                edges = np.unique(np.quantile(values.astype(np.float64), quantiles)
+                                  .astype(np.float32))
+            self.edges_.append(edges)
+        return self
+
+    def transform(self, X):
+        """Bin codes of X, as a uint8 matrix. Missing values get the highest code
+        of their column, and go the same way as the largest values."""
+        X = np.asarray(X, dtype=np.float32)
+        codes = np.empty(X.shape, dtype=np.uint8)
+        for j, edges in enumerate(self.edges_):
+            codes[:, j] = np.searchsorted(edges, X[:, j], side='left')
+        return codes
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+
+###
+### Histogram split finding
+###
+
+def _starts(sizes):
+    # Start offsets of consecutive segments of the given sizes
+    starts = np.zeros(len(sizes), dtype=np.int64)
+    np.cumsum(sizes[:-1], out=starts[1:])
+    return starts
+
+
+def _pack(classWeights, bits):
+    """Pack the integer class weights of the rows into as few float64 arrays
+    as possible, with bits bits per class, so that one histogram of a packed
+    array adds up the weights of several classes at a time."""
+    perWord = max(1, 52 // bits)
+    words = []
+    for k in range(0, len(classWeights), perWord):
+        word = classWeights[k].copy()
+        for i, weights in enumerate(classWeights[k + 1:k + perWord], 1):
+            word += weights * float(2 ** (bits * i))
+        words.append(word)
+    return words
+
+
+def _unpack(words, nClasses, bits):
+    """Class weights of the packed sums of _pack(), as a list of arrays."""
+    perWord = max(1, 52 // bits)
+    classSums = []
+    for k, word in zip(range(0, nClasses, perWord), words):
+        parts = []
+        for i in range(min(perWord, nClasses - k) - 1, 0, -1):
+            part = np.floor(word / float(2 ** (bits * i)))
+            word = word - part * float(2 ** (bits * i))
+            parts.append(part)
+        classSums.extend([word] + parts[::-1])
+    return classSums
+
+
+def _bin_sums(key, nKeys, slotOfRow, words, countRows):
+    """Sums of the packed class weights of the rows of every nonempty bin.
+
+    Returns the sorted keys of the nonempty bins, the slot of every bin (or
+    None, if the caller is to look it up), the number of rows of every bin (or
+    None, without countRows), and the list of the bin sums of every packed
+    array. With fewer rows than half the number of bins, the rows are sorted by
+    their keys rather than counted into dense histograms.
+    """
+    if nKeys <= 2 * len(key):
+        sums = [np.bincount(key, weights=word, minlength=nKeys) for word in words]
+        keys = np.flatnonzero(sum(sums) > 0)
+        counts = np.bincount(key, minlength=nKeys)[keys] if countRows else None
+        return keys, None, counts, [binSum[keys] for binSum in sums]
+    order = np.argsort(key, kind='stable')
+    sortedKey = key[order]
+    isFirst = np.empty(len(key), dtype=bool)
+    isFirst[0] = True
+    np.not_equal(sortedKey[1:], sortedKey[:-1], out=isFirst[1:])
+    first = np.flatnonzero(isFirst)
+    counts = np.diff(np.append(first, len(key))) if countRows else None
+    sums = [np.add.reduceat(word[order], first) for word in words]
+    return sortedKey[first], slotOfRow[order[first]], counts, sums
+
+
+def _grow_trees(codes, nBins, yIndex, nClasses, seeds, maxFeatures,
+                minSamplesLeaf=1, maxDepth=None):
+    """Grow a tree for every seed on the bin codes of the rows, level by level.
+
+    Every tree is grown on the bootstrap sample that scikit-learn draws with
+    the seed of the tree, and depends on nothing but its seed. The nodes of
+    one level of all trees are split together: for every node and every drawn
+    feature, the rows of the node are counted into a histogram of class
+    weights over the bin codes, and the best split is found from the
+    cumulative sums of the histogram. Returns a list with the arrays
+    (feature, code, children, value) and the depth of every tree; a row goes
+    to the left child if its code is at most the split code.
+    """
+    n, nFeatures = codes.shape
+    nTrees = len(seeds)
+    rows = []
+    weight = []
+    for seed in seeds:
+        counts = np.bincount(np.random.RandomState(seed).randint(0, n, n), minlength=n)
+        inBag = np.flatnonzero(counts)
+        rows.append(inBag)
+        weight.append(counts[inBag].astype(np.float64))
+    size = np.array([len(inBag) for inBag in rows], dtype=np.int64)
+    rows = np.concatenate(rows)
+    weight = np.concatenate(weight)
+    classWeights = [np.where(yIndex[rows] == k, weight, 0.0) for k in range(nClasses)]
+    nodeWeights = np.column_stack([np.add.reduceat(w, _starts(size)) for w in classWeights])
+    # The cumulative bin sums of a level are at most the total weight of the
+    # rows of all trees, and fit into bits bits
+    bits = max(1, int(n * nTrees).bit_length())
+    words = _pack(classWeights, bits)
+    # The codes of a row are padded to a multiple of 8 bytes, so that the rows
+    # of a node can be compared 8 codes at a time as unsigned 64-bit words
+    width = (nFeatures + 7) // 8 * 8
+    current = np.zeros((len(rows), width), dtype=np.uint8)
+    current[:, :nFeatures] = codes[rows]
+    del rows, weight, classWeights
+    # Every tree draws its candidate features from a generator of its own,
+    # seeded with the seed of the tree as in scikit-learn, so that a tree does
+    # not depend on the other trees of its batch
+    rngs = [np.random.RandomState(seed) for seed in seeds]
+
+    # Nodes of the present level: node index, tree and class weights, and the
+    # number of rows in size. The rows of the present level are grouped by node.
+    nodeIds = np.arange(nTrees)
+    nodeTree = np.arange(nTrees)
+    nNodes = nTrees
+    depth = np.zeros(nTrees, dtype=np.int64)
+    values = [nodeWeights]
+    trees = [nodeTree]
+    splits = []
+    level = 0
+    while len(nodeIds) and (maxDepth is None or level < maxDepth):
+        # Pure nodes and nodes with too few rows are leaves
+        canSplit = (size >= max(2, 2 * minSamplesLeaf)) & ((nodeWeights > 0).sum(axis=1) > 1)
+        if not canSplit.all():
+            rowMask = np.repeat(canSplit, size)
+            current = np.compress(rowMask, current, axis=0)
+            words = [word[rowMask] for word in words]
+            nodeIds, nodeTree = nodeIds[canSplit], nodeTree[canSplit]
+            size, nodeWeights = size[canSplit], nodeWeights[canSplit]
+        nSlots = len(nodeIds)
+        if nSlots == 0:
+            break
+        starts = _starts(size)
+        slotOfRow = np.repeat(np.arange(nSlots), size)
+        rowOffset = np.arange(len(slotOfRow)) * width
+        flat = current.ravel()
+        totalWeight = nodeWeights.sum(axis=1)
+
+        # Draw the candidate features of every node among the features with
+        # more than one bin code in the node, as scikit-learn skips constant
+        # features while it draws them. A feature varies in a node if any row
+        # differs from the first row of the node in its code.
+        rowWords = current.view(np.uint64)
+        differ = np.bitwise_or.reduceat(
+            rowWords ^ np.repeat(np.take(rowWords, starts, axis=0), size, axis=0),
+            starts, axis=0)
+        varies = differ.view(np.uint8)[:, :nFeatures] > 0
+        treeSlots = np.bincount(nodeTree, minlength=nTrees)
+        draw = np.concatenate([rngs[t].rand(treeSlots[t], nFeatures)
+                               for t in np.flatnonzero(treeSlots)])
+        draw[~varies] = 2.0
+        drawn = np.argsort(draw, axis=1)
+        nDrawn = np.minimum(varies.sum(axis=1), maxFeatures)
+
+        bestProxy = np.full(nSlots, -np.inf)
+        bestFeature = np.zeros(nSlots, dtype=np.int64)
+        bestCode = np.zeros(nSlots, dtype=np.int64)
+        bestLeft = np.zeros((nSlots, nClasses))
+        for j in range(int(nDrawn.max())):
+            # Histograms of the j-th drawn feature of every node; the bins of a
+            # node follow the bins of the previous node
+            active = nDrawn > j
+            feature = np.where(active, drawn[:, j], 0)
+            slotBins = np.where(active, nBins[feature], 0)
+            binStart = _starts(slotBins)
+            if active.all():
+                rowSlot = slotOfRow
+                key = binStart[rowSlot] + flat[rowOffset + feature[rowSlot]]
+                rowWeights = words
+            else:
+                rowMask = active[slotOfRow]
+                rowSlot = slotOfRow[rowMask]
+                key = binStart[rowSlot] + flat[rowOffset[rowMask] + feature[rowSlot]]
+                rowWeights = [word[rowMask] for word in words]
+            keys, slot, binRows, sums = _bin_sums(key, int(slotBins.sum()), rowSlot,
+                                                  rowWeights, minSamplesLeaf > 1)
+            if slot is None:
+                slot = np.repeat(np.arange(nSlots), slotBins)[keys]
+            binCode = keys - binStart[slot]
+            nBinsOfSlot = np.bincount(slot, minlength=nSlots)
+            firstBin = np.minimum(_starts(nBinsOfSlot), len(keys) - 1)
+
+            # Class weights up to and including every bin, within its node, and
+            # the Gini impurity proxy of scikit-learn for splitting after the bin
+            cumulative = []
+            for binSum in sums:
+                packedSum = np.cumsum(binSum)
+                packedSum -= (packedSum - binSum)[firstBin][slot]
+                cumulative.append(packedSum)
+            left = _unpack(cumulative, nClasses, bits)
+            leftWeight = left[0]
+            leftSquares = left[0] * left[0]
+            rightSquares = 0.0
+            for k, leftK in enumerate(left):
+                if k > 0:
+                    leftWeight = leftWeight + leftK
+                    leftSquares += leftK * leftK
+                rightK = nodeWeights[:, k][slot] - leftK
+                rightSquares = rightSquares + rightK * rightK
+            rightWeight = totalWeight[slot] - leftWeight
+            valid = rightWeight > 0
+            if minSamplesLeaf > 1:
+                leftRows = np.cumsum(binRows)
+                leftRows -= (leftRows - binRows)[firstBin][slot]
+                valid &= (leftRows >= minSamplesLeaf) & (size[slot] - leftRows >= minSamplesLeaf)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                proxy = np.where(valid, leftSquares / leftWeight + rightSquares / rightWeight,
+                                 -np.inf)
+
+            # Best split of every node: the first bin with the largest proxy
+            hasBins = nBinsOfSlot > 0
+            largest = np.full(nSlots, -np.inf)
+            largest[hasBins] = np.maximum.reduceat(proxy, firstBin[hasBins])
+            candidate = np.where(proxy == largest[slot], np.arange(len(keys)), len(keys))
+            better = largest > bestProxy
+            at = np.minimum.reduceat(candidate, firstBin[hasBins])[better[hasBins]]
+            bestProxy[better] = largest[better]
+            bestFeature[better] = feature[better]
+            # Split halfway between the bin and the next nonempty bin of the node
+            bestCode[better] = (binCode[at] + binCode[at + 1]) // 2
+            bestLeft[better] = np.column_stack([c[at] for c in left])
+
+        # Split the nodes with a valid split into a left and right child
+        isSplit = bestProxy > -np.inf
+        if not isSplit.any():
+            break
+        if not isSplit.all():
+            rowMask = isSplit[slotOfRow]
+            current = np.compress(rowMask, current, axis=0)
+            words = [word[rowMask] for word in words]
+            rowOffset = np.arange(len(current)) * width
+            flat = current.ravel()
+        parents = nodeIds[isSplit]
+        parentSize = size[isSplit]
+        nSplit = len(parents)
+        leftIds = nNodes + 2 * np.arange(nSplit)
+        nNodes += 2 * nSplit
+        splits.append((parents, bestFeature[isSplit], bestCode[isSplit], leftIds))
+        leftWeights = bestLeft[isSplit]
+        nodeWeights = np.column_stack([leftWeights, nodeWeights[isSplit] - leftWeights]
+                                      ).reshape(-1, nClasses)
+        nodeTree = np.repeat(nodeTree[isSplit], 2)
+        values.append(nodeWeights)
+        trees.append(nodeTree)
+        level += 1
+        depth[nodeTree] = level
+
+        # Reorder the rows so that the rows of every child follow each other,
+        # the left child first, keeping the order of the rows within a child
+        slotOfRow = np.repeat(np.arange(nSplit), parentSize)
+        goRight = (flat[rowOffset + bestFeature[isSplit][slotOfRow]] >
+                   bestCode[isSplit][slotOfRow])
+        rightBefore = np.concatenate([[0], np.cumsum(goRight)])
+        parentStart = _starts(parentSize)
+        nRight = rightBefore[parentStart + parentSize] - rightBefore[parentStart]
+        size = np.column_stack([parentSize - nRight, nRight]).ravel()
+        childStart = _starts(size)
+        rightRank = rightBefore[:-1] - rightBefore[parentStart][slotOfRow]
+        position = np.where(goRight,
+                            childStart[2 * slotOfRow + 1] + rightRank,
+                            childStart[2 * slotOfRow] + np.arange(len(goRight)) -
+                            parentStart[slotOfRow] - rightRank)
+        order = np.empty(len(position), dtype=np.int64)
+        order[position] = np.arange(len(position))
+        current = np.take(current, order, axis=0)
+        words = [word[order] for word in words]
+        nodeIds = np.column_stack([leftIds, leftIds + 1]).ravel()
+
+    # Gather the nodes of every tree, and number them from 0 within the tree
+    feature = np.full(nNodes, -1, dtype=np.int64)
+    code = np.zeros(nNodes, dtype=np.int64)
+    children = np.repeat(np.arange(nNodes), 2).reshape(nNodes, 2)
+    for parents, splitFeature, splitCode, leftIds in splits:
+        feature[parents] = splitFeature
+        code[parents] = splitCode
+        children[parents, 0] = leftIds
+        children[parents, 1] = leftIds + 1
+    value = np.concatenate(values)
+    total = value.sum(axis=1, keepdims=True)
+    total[total == 0.0] = 1.0
+    value /= total
+    tree = np.concatenate(trees)
+    order = np.argsort(tree, kind='stable')
+    treeStart = _starts(np.bincount(tree, minlength=nTrees))
+    local = np.empty(nNodes, dtype=np.int64)
+    local[order] = np.arange(nNodes) - treeStart[tree[order]]
+    result = []
+    for t, nodes in enumerate(np.split(order, treeStart[1:])):
+        result.append(((feature[nodes], code[nodes], local[children[nodes]], value[nodes]),
+                       int(depth[t])))
+    return result
+
+
+###
+### Binned Random Forest classifier
+###
+
+class HistogramForestClassifier(object):
+    """Random Forest classifier that grows its trees on the bin codes of the
+    columns with histogram split finding.
+
+    The parameters have the same meaning as for the RandomForestClassifier of
+    scikit-learn, and max_bins is the maximum number of bins of a column. The
+    columns are binned once by a FeatureBinner when the forest is fitted. The
+    trees are grown in batches of trees that hold about BATCH_ROWS in-bag rows
+    together; with n_jobs workers, the batches are grown in parallel under the
+    joblib backend in effect, as by fit_forest() of stoRFFit.py. A tree
+    depends only on its seed, so that the fitted trees are the same for any
+    number of workers and any batch size. With warm_start, fitting
+    again adds the missing trees to the forest, on the bins of the first fit.
+
+    The fitted trees are held in estimators_ as single-tree forests in the
+    array-based format, with split thresholds on the raw values of the
+    columns, and to_array_forest() joins them into the model to export.
+    """
+
+    _PARAMETERS = ('n_estimators', 'max_features', 'min_samples_leaf', 'max_depth',
+                   'max_bins', 'oob_score', 'warm_start', 'n_jobs', 'random_state')
+
+    def __init__(self, n_estimators=100, max_features='sqrt', min_samples_leaf=1,
+                 max_depth=None, max_bins=MAX_BINS, oob_score=False, warm_start=False,
+                 n_jobs=None, random_state=None):
+        self.n_estimators = n_estimators
+        self.max_features = max_features
+        self.min_samples_leaf = min_samples_leaf
+        self.max_depth = max_depth
+        self.max_bins = max_bins
+        self.oob_score = oob_score
+        self.warm_start = warm_start
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def get_params(self, deep=True):
+        return dict((name, getattr(self, name)) for name in self._PARAMETERS)
+
+    def set_params(self, **params):
+        for name, value in params.items():
+            if name not in self._PARAMETERS:
+                raise ValueError('Invalid parameter %r of HistogramForestClassifier' % name)
+            setattr(self, name, value)
+        return self
+
+    def _max_features(self, nFeatures):
+        maxFeatures = self.max_features
+        if maxFeatures is None:
+            return nFeatures
+        if maxFeatures == 'sqrt':
+            return max(1, int(np.sqrt(nFeatures)))
+        if maxFeatures == 'log2':
+            return max(1, int(np.log2(nFeatures)))
+        if isinstance(maxFeatures, float):
+            return max(1, int(maxFeatures * nFeatures))
+        return max(1, min(int(maxFeatures), nFeatures))
+
+    def fit(self, X, y):
+        y = np.asarray(y)
+        if not (self.warm_start and getattr(self, 'estimators_', None)):
+            self.binner_ = FeatureBinner(self.max_bins).fit(X)
+            self.estimators_ = []
+            self.tree_seeds_ = []
+        self.classes_, yIndex = np.unique(y, return_inverse=True)
+        self.n_classes_ = len(self.classes_)
+        self.n_features_in_ = np.shape(X)[1]
+        if self.binner_.feature_names_ is not None:
+            self.feature_names_in_ = np.array(self.binner_.feature_names_, dtype=object)
+        codes = self.binner_.transform(X)
+        nBins = np.array([len(edges) + 1 for edges in self.binner_.edges_], dtype=np.int64)
+
+        # Draw the seeds of the new trees after the seeds of the existing ones,
+        # as scikit-learn does
+        rng = np.random.RandomState(self.random_state)
+        rng.randint(np.iinfo(np.int32).max, size=len(self.estimators_))
+        nNew = self.n_estimators - len(self.estimators_)
+        if nNew > 0:
+            seeds = rng.randint(np.iinfo(np.int32).max, size=nNew).tolist()
+            step = max(1, BATCH_ROWS // max(1, len(y)))
+            batches = [seeds[i:i + step] for i in range(0, nNew, step)]
+            args = (codes, nBins, yIndex, self.n_classes_)
+            kwargs = {'maxFeatures': self._max_features(codes.shape[1]),
+                      'minSamplesLeaf': self.min_samples_leaf, 'maxDepth': self.max_depth}
+            if self.n_jobs in (None, 0, 1) or len(batches) == 1:
+                grown = [_grow_trees(*args, seeds=batch, **kwargs) for batch in batches]
+            else:
+                from joblib import Parallel, delayed
+                grown = Parallel(n_jobs=self.n_jobs, prefer='threads')(
+                    delayed(_grow_trees)(*args, seeds=batch, **kwargs) for batch in batches)
+            trees = [self._tree_forest(arrays, depth) for batch in grown
+                     for arrays, depth in batch]
+            self.estimators_ = self.estimators_ + trees
+            self.tree_seeds_ = self.tree_seeds_ + seeds
+        if self.oob_score:
+            self._set_oob(X, y)
+        return self
+
+    def _tree_forest(self, arrays, depth):
+        # Single-tree ArrayForest of a grown tree, with the split codes mapped
+        # to the upper bin edges of the raw values
+        feature, code, children, value = arrays
+        split = feature >= 0
+        threshold32 = np.zeros(len(feature), dtype=np.float32)
+        for j in np.unique(feature[split]):
+            atJ = feature == j
+            threshold32[atJ] = self.binner_.edges_[j][code[atJ]]
+        featureType = np.int16 if self.n_features_in_ < 2 ** 15 else np.int32
+        header = {'n_features': int(self.n_features_in_),
+                  'feature_names': self.binner_.feature_names_,
+                  'classes': self.classes_.tolist(),
+                  'classes_dtype': self.classes_.dtype.str,
+                  'max_depth': depth,
+                  'n_nodes': len(feature)}
+        # Missing values have the highest bin code, and go to the right
+        arrays = {'roots': np.zeros(1, dtype=np.int32),
+                  'feature': feature.astype(featureType),
+                  'threshold': threshold32.astype(np.float64),
+                  'threshold32': threshold32,
+                  'children': children.astype(np.int32),
+                  'missing_left': np.zeros(len(feature), dtype=np.uint8),
+                  'value': value}
+        return ArrayForest(header, arrays)
+
+    def _set_oob(self, X, y):
+        # Out-of-bag class probabilities of the rows, averaged over the trees
+        # whose bootstrap sample misses a row; NaN for rows in all samples
+        X32 = self.estimators_[0]._as_matrix(X)
+        n = len(y)
+        proba = np.zeros((n, self.n_classes_))
+        nTrees = np.zeros(n)
+        for tree, seed in zip(self.estimators_, self.tree_seeds_):
+            inBag = np.bincount(np.random.RandomState(seed).randint(0, n, n), minlength=n)
+            oob = np.flatnonzero(inBag == 0)
+            proba[oob] += tree.value[tree.apply(X32[oob])[:, 0]]
+            nTrees[oob] += 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.oob_decision_function_ = proba / nTrees[:, np.newaxis]
+        seen = nTrees > 0
+        predicted = self.classes_[np.argmax(self.oob_decision_function_[seen], axis=1)]
+        self.oob_score_ = float(np.mean(predicted == y[seen])) if seen.any() else None
+
+    def to_array_forest(self):
+        """The fitted forest as one ArrayForest."""
+        return ArrayForest.concatenate(self.estimators_)
+
+    def predict_proba(self, X):
+        return self.to_array_forest().predict_proba(X)
@@ -0,0 +1,140 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFCVMM.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# This TechBytes demo utilizes a use case to predict the propensity of a
+# financial services customer base to open a credit card account.
+#
+# The present file is the Python cross-validation script to be used with the
+# SCRIPT table operator, as described in the following use case 2 of the
+# present demo Part 5:
+#
+# 2) Fitting and scoring multiple models
+#
+#    We utilize the statecode variable as a partition to built a Random
+#    Forest model for every state. To select the model settings, we estimate
+#    the accuracy of the models of every state code by k-fold cross-validation
+#    in the Advanced SQL Engine. The SCRIPT query assigns the rows of the
+#    MultiModelTrain_Py table to k folds, and sends all rows of a state code to
+#    each of its k fold partitions, where the rows of the fold are marked as
+#    held out. The present script runs with a PARTITION BY statecode and fold
+#    in the query, fits a model on the rows that are not held out, and scores
+#    the held-out rows in the same pass. A single query thus fits the k models
+#    of all state codes in parallel, and outputs the metrics of every fold.
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+################################################################################
+
+import sys
+import argparse
+from sklearn.ensemble import RandomForestClassifier
+from stoRFIO import TableDecoder, ResultWriter, MULTIMODEL_SCHEMA
+from stoRFFit import fit_forest, worker_count, positive_proba, classification_metrics
+from stoRFFit import BACKENDS
+
+###
+### Script arguments
+###
+
+# The models are fitted with the settings of "stoRFFitMM.py", which are 500
+# trees and 5 features per split. The options "--trees <N>" and
+# "--max-features <M>" in the SCRIPT_COMMAND clause of the SCRIPT query
+# cross-validate other settings. The options "--n-jobs", "--amps-per-node" and
+# "--backend" work as with the "stoRFFitMM.py" script.
+parser = argparse.ArgumentParser(description='Cross-validate the MultiModelTrain_Py state code models.')
+parser.add_argument('--trees', type=int, default=500,
+                    help='number of trees of the forests')
+parser.add_argument('--max-features', type=int, default=5,
+                    help='number of features to consider at every split')
+parser.add_argument('--n-jobs', type=int, default=1,
+                    help='number of tree building workers; 0 uses the whole per-AMP CPU budget')
+parser.add_argument('--amps-per-node', type=int, default=1,
+                    help='number of AMPs that share the CPU cores of a node')
+parser.add_argument('--backend', choices=sorted(BACKENDS), default='threads',
+                    help='worker pool for the tree building')
+args = parser.parse_args()
+
+###
+### Read input
+###
+
+# Know your data: You must know in advance the number and data types of the
+# incoming columns from the database!
+# The input schema of the MultiModelTrain_Py table is declared in the helper
+# module stoRFIO.py. In addition, the input here carries the fold number of
+# the partition, and a flag that is 1 for the held-out rows of the fold and 0
+# for the training rows. For numeric columns, the database sends in floats in
+# scientific format with a blank space when the exponential is positive; e.g.,
+# 1.0 is sent as 1.000E 000. The decoder deals with any such blank spaces.
+
+delimiter = '\t'
+decoder = TableDecoder(MULTIMODEL_SCHEMA + [('fold_id', 'int32'), ('holdout', 'int8')],
+                       delimiter)
+df = decoder.read(sys.stdin)
+
+###
+### If no data received, gracefully exit rather than producing an error later.
+###
+
+if df is None:
+    sys.exit()
+
+stateCode = df.iloc[0,9]
+foldId = int(df['fold_id'].iloc[0])
+
+###
+### Fit the model of the fold, and score the held-out rows
+###
+
+predictor_columns = ["tot_income", "tot_age", "tot_cust_years", "tot_children",
+                     "female_ind", "single_ind", "married_ind", "separated_ind",
+                     "ck_acct_ind", "sv_acct_ind", "ck_avg_bal", "sv_avg_bal",
+                     "ck_avg_tran_amt", "sv_avg_tran_amt", "q1_trans_cnt",
+                     "q2_trans_cnt", "q3_trans_cnt", "q4_trans_cnt"]
+# The models of all folds are fitted with the same random seed as the models
+# of "stoRFFitMM.py", so that the folds differ only in their training rows.
+isHeldOut = df['holdout'].values == 1
+train = df[~isHeldOut]
+test = df[isHeldOut]
+del df
+metrics = {'auc': None, 'accuracy': None, 'log_loss': None}
+if len(train) and len(test):
+    classifier = RandomForestClassifier(n_estimators=args.trees, max_features=args.max_features,
+                                        random_state=0)
+    nJobs = worker_count(args.n_jobs, args.amps_per_node)
+    classifier = fit_forest(classifier, train[predictor_columns], train["cc_acct_ind"],
+                            nJobs, args.backend)
+    score = positive_proba(classifier, test[predictor_columns])
+    metrics = classification_metrics(test["cc_acct_ind"].values, score)
+
+###
+### Send the state code, fold number and metrics as output from the present AMP.
+###
+
+# Export results to Advanced SQL Engine through standard output in expected
+# format: the state code, the fold number, the numbers of training and
+# held-out rows, and the AUC, accuracy and log loss on the held-out rows. A
+# metric that cannot be computed, such as the AUC of held-out rows of a single
+# class, is NULL.
+writer = ResultWriter(sys.stdout, delimiter)
+writer.write([stateCode], [foldId], [len(train)], [len(test)],
+             *[['' if metrics[name] is None else metrics[name]]
+               for name in ('auc', 'accuracy', 'log_loss')])
+writer.flush()
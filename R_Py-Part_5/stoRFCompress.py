@@ -0,0 +1,297 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFCompress.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# The present file is a client tool that compresses a Random Forest model file
+# of the present demo Part 5 into a model with fewer trees, for a smaller
+# model file and a shorter scoring time in the database.
+#
+# The 500 trees of the demo forests are many more than most rows need: after
+# the first few dozen trees, every further tree changes the AUC of the forest
+# very little. The tool orders the trees of a model by greedy forward
+# selection on a set of holdout rows: it starts with the best single tree,
+# and adds, at every step, the tree that gives the lowest Brier score of the
+# averaged probabilities. It then keeps the shortest such selection of trees
+# whose AUC on another part of the holdout rows, the validation rows, is at
+# most a given drop below the AUC of the whole forest. With a budget for the
+# model file size or the scoring time per row, it keeps the selection with the
+# best AUC within the budget instead, provided that the AUC drop is within
+# bounds too. A selection must also keep a minimum number of trees, and its log
+# loss on the validation rows must be at most a given rise above the log loss
+# of the whole forest: a few fully grown trees may rank the rows almost as
+# well as the forest, but their probabilities are close to 0 or 1, and far
+# off for the rows they get wrong.
+#
+# The compressed model is written in the format of the input model file, and
+# is scored by the scoring scripts like the original model. The tool prints
+# the size, the scoring time per row and the metrics of the model before and
+# after the compression. The metrics are computed on a third part of the
+# holdout rows, the test rows, which neither order the trees nor choose their
+# number, so that they are not biased by the selection.
+#
+# Usage: python3 stoRFCompress.py <model file> <holdout CSV file> <output file>
+#                                 [options]
+# The holdout CSV file holds the predictor columns and the label column
+# cc_acct_ind of rows that were not used to fit the model, such as the rows of
+# ADS_Py outside of the 25% sample of use case 1, saved with the to_pandas()
+# and to_csv() methods of a teradataml DataFrame. Run the tool with the option
+# "--help" for the options.
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+################################################################################
+
+import argparse
+import base64
+import pickle
+import time
+import numpy as np
+import pandas as pd
+
+from stoRFForest import ArrayForest, is_array_forest, loads_model
+from stoRFModel import read_model_file
+from stoRFFit import select_trees, positive_proba, roc_auc, classification_metrics
+
+PREDICTOR_COLUMNS = ["tot_income", "tot_age", "tot_cust_years", "tot_children",
+                     "female_ind", "single_ind", "married_ind", "separated_ind",
+                     "ck_acct_ind", "sv_acct_ind", "ck_avg_bal", "sv_avg_bal",
+                     "ck_avg_tran_amt", "sv_avg_tran_amt", "q1_trans_cnt",
+                     "q2_trans_cnt", "q3_trans_cnt", "q4_trans_cnt"]
+
+
+def node_depths(forest):
+    """Depth of every node of an ArrayForest; the roots have depth 0."""
+    depth = np.zeros(len(forest.feature), dtype=np.int32)
+    frontier = forest.roots.astype(np.int64)
+    level = 0
+    while frontier.size:
+        depth[frontier] = level
+        frontier = forest.children[frontier[forest.feature[frontier] >= 0]].ravel()
+        level += 1
+    return depth
+
+
+def tree_outputs(forest, X, positive=1):
+    """Probability of the positive class from every tree of an ArrayForest for
+    the rows of X, and the number of splits from the root to the leaf of every
+    row in every tree; both of shape (n_rows, n_trees)."""
+    classes = list(forest.classes_)
+    if positive not in classes:
+        raise ValueError('The model has not seen the positive class %r' % positive)
+    leaves = forest.apply(forest._as_matrix(X))
+    return forest.value[leaves, classes.index(positive)], node_depths(forest)[leaves]
+
+
+def greedy_tree_order(proba, y):
+    """Order of the trees by greedy forward selection without replacement.
+
+    proba holds the probability of the positive class from every tree for the
+    rows with the 0/1 labels y. Every step adds the tree that gives the lowest
+    Brier score of the averaged probabilities of the trees selected so far.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    nTrees = proba.shape[1]
+    squares = np.einsum('ij,ij->j', proba, proba)
+    total = np.zeros(len(y))
+    selected = np.zeros(nTrees, dtype=bool)
+    order = []
+    for k in range(1, nTrees + 1):
+        # k^2 times the Brier score with tree j is |total + p_j - k y|^2, which
+        # is |total - k y|^2 + 2 (total - k y).p_j + |p_j|^2.
+        loss = 2.0 * (total - k * y).dot(proba) + squares
+        loss[selected] = np.inf
+        tree = int(np.argmin(loss))
+        selected[tree] = True
+        order.append(tree)
+        total += proba[:, tree]
+    return np.array(order, dtype=np.int64)
+
+
+def prefix_metrics(proba, y, order):
+    """AUC and log loss of the averaged probabilities of the first k trees of
+    order, for k = 1, ..., len(order), as two arrays."""
+    total = np.zeros(proba.shape[0])
+    aucs = []
+    logLosses = []
+    for k, tree in enumerate(order, 1):
+        total += proba[:, tree]
+        metrics = classification_metrics(y, total / k)
+        aucs.append(metrics['auc'])
+        logLosses.append(metrics['log_loss'])
+    return np.array(aucs, dtype=np.float64), np.array(logLosses, dtype=np.float64)
+
+
+def choose_prefix(aucs, reference_auc, max_auc_drop, fits=None, allowed=None):
+    """Number of trees to keep, or None if no prefix qualifies.
+
+    Without a budget, this is the smallest number of trees with an AUC of at
+    least reference_auc - max_auc_drop. With the boolean array fits of the
+    prefixes that meet the budget, this is the number of trees with the best
+    AUC within the budget, if that AUC is within the bound. With the boolean
+    array allowed, only the allowed prefixes qualify.
+    """
+    good = aucs >= reference_auc - max_auc_drop
+    if allowed is not None:
+        good &= allowed
+    if fits is None:
+        return int(np.argmax(good)) + 1 if good.any() else None
+    candidates = np.flatnonzero(good & fits)
+    if not candidates.size:
+        return None
+    return int(candidates[np.argmax(aucs[candidates])]) + 1
+
+
+def per_row_seconds(forest, X, repeat=3, max_rows=2000):
+    # Smallest scoring time per row out of repeat runs of predict_proba() on
+    # the first max_rows rows of X
+    X = X[:max_rows]
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        forest.predict_proba(X)
+        times.append(time.perf_counter() - start)
+    return min(times) / len(X)
+
+
+def model_file_bytes(model, fmt):
+    # Contents of a model file with the base64-encoded serialized model
+    if fmt == 'arrays':
+        return base64.b64encode(model.to_bytes())
+    return base64.b64encode(pickle.dumps(model))
+
+
+###
+### Command line
+###
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compress a Random Forest model file by selecting '
+                                                 'a subset of its trees on holdout rows.')
+    parser.add_argument('model', help='model file, as installed for the scoring scripts')
+    parser.add_argument('holdout', help='CSV file with the predictor and label columns of holdout rows')
+    parser.add_argument('output', help='file for the compressed model')
+    parser.add_argument('--max-auc-drop', type=float, default=0.002,
+                        help='largest allowed AUC drop on the validation rows (default: 0.002)')
+    parser.add_argument('--max-kb', type=float, default=None,
+                        help='budget for the size of the model file in KB')
+    parser.add_argument('--max-us-per-row', type=float, default=None,
+                        help='budget for the scoring time per row in microseconds')
+    parser.add_argument('--max-log-loss-rise', type=float, default=0.01,
+                        help='largest allowed log loss rise on the validation rows (default: 0.01)')
+    parser.add_argument('--min-trees', type=int, default=10,
+                        help='smallest number of trees to keep (default: 10)')
+    parser.add_argument('--label', default='cc_acct_ind',
+                        help='label column of the holdout rows (default: cc_acct_ind)')
+    parser.add_argument('--validation-fraction', type=float, default=0.25,
+                        help='fraction of the holdout rows that chooses the number of trees '
+                             'rather than ordering the trees (default: 0.25)')
+    parser.add_argument('--test-fraction', type=float, default=0.25,
+                        help='fraction of the holdout rows that only measures the metrics of the '
+                             'models before and after the compression (default: 0.25)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed of the split of the holdout rows')
+    args = parser.parse_args(argv)
+    if not (args.validation_fraction > 0.0 and args.test_fraction > 0.0 and
+            args.validation_fraction + args.test_fraction < 1.0):
+        parser.error('--validation-fraction and --test-fraction must be positive, '
+                     'with a sum below 1')
+    if args.min_trees < 1:
+        parser.error('--min-trees must be at least 1')
+
+    modelBytes = read_model_file(args.model)
+    fmt = 'arrays' if is_array_forest(modelBytes) else 'pickle'
+    model = loads_model(modelBytes)
+    forest = model if isinstance(model, ArrayForest) else ArrayForest.from_sklearn(model)
+
+    holdout = pd.read_csv(args.holdout)
+    columns = (list(forest.feature_names_in_) if hasattr(forest, 'feature_names_in_')
+               else PREDICTOR_COLUMNS)
+    X = holdout[columns]
+    y = holdout[args.label].values
+    u = np.random.RandomState(args.seed).rand(len(X))
+    isTest = u < args.test_fraction
+    isValidation = ~isTest & (u < args.test_fraction + args.validation_fraction)
+    isSelection = ~isTest & ~isValidation
+    for name, rows in (('validation', isValidation), ('test', isTest)):
+        if roc_auc(y[rows], np.zeros(int(rows.sum()))) is None:
+            raise SystemExit('The %s rows must hold both classes to compute the AUC' % name)
+
+    # Order the trees on the selection rows, and check the AUC and the log loss
+    # of every prefix of the order on the validation rows.
+    proba, depths = tree_outputs(forest, X)
+    order = greedy_tree_order(proba[isSelection], y[isSelection])
+    aucs, logLosses = prefix_metrics(proba[isValidation], y[isValidation], order)
+    reference = classification_metrics(y[isValidation], proba[isValidation].mean(axis=1))
+    referenceAuc = reference['auc']
+    allowed = ((np.arange(1, len(order) + 1) >= min(args.min_trees, len(order))) &
+               (logLosses <= reference['log_loss'] + args.max_log_loss_rise))
+
+    # Estimate the file size and the scoring time of every prefix: the file
+    # grows by the bytes of the nodes of every tree, and the scoring time by
+    # the splits that the rows pass in every tree, plus one step per tree for
+    # adding up the leaf probabilities.
+    size = len(model_file_bytes(model, fmt))
+    secondsPerRow = per_row_seconds(forest, X)
+    ends = np.append(forest.roots[1:], len(forest.feature)).astype(np.int64)
+    nodes = (ends - forest.roots)[order]
+    work = (depths.mean(axis=0) + 1.0)[order]
+    fits = None
+    if args.max_kb is not None or args.max_us_per_row is not None:
+        fits = np.ones(len(order), dtype=bool)
+        if args.max_kb is not None:
+            fits &= size * np.cumsum(nodes) / nodes.sum() <= args.max_kb * 1000.0
+        if args.max_us_per_row is not None:
+            fits &= secondsPerRow * 1e6 * np.cumsum(work) / work.sum() <= args.max_us_per_row
+    nKeep = choose_prefix(aucs, referenceAuc, args.max_auc_drop, fits, allowed)
+    if nKeep is None:
+        if fits is not None and (fits & allowed).any():
+            bestAuc = aucs[fits & allowed].max()
+            raise SystemExit('No selection of trees within the budget has an AUC drop of at most '
+                             '%g; the best one within the budget drops the AUC by %.4f'
+                             % (args.max_auc_drop, referenceAuc - bestAuc))
+        if fits is not None and fits.any():
+            raise SystemExit('No selection of trees within the budget keeps at least %d trees and '
+                             'a log loss rise of at most %g'
+                             % (args.min_trees, args.max_log_loss_rise))
+        raise SystemExit('No selection of trees meets the budget')
+
+    # Keep the selected trees in their original order
+    keep = np.sort(order[:nKeep])
+    compressed = select_trees(model, keep)
+    compressedForest = select_trees(forest, keep)
+    compressedBytes = model_file_bytes(compressed, fmt)
+    with open(args.output, 'wb') as fOut:   # Use "wb" to write in binary format
+        fOut.write(compressedBytes)
+
+    print('Compressed %s into %s on %d selection and %d validation rows; metrics on %d test rows'
+          % (args.model, args.output, int(isSelection.sum()), int(isValidation.sum()),
+             int(isTest.sum())))
+    print('               trees      nodes   file [KB]   time [us/row]      AUC   accuracy   log loss')
+    XTest = X[isTest]
+    for label, m, nBytes in (('original', forest, size),
+                             ('compressed', compressedForest, len(compressedBytes))):
+        metrics = classification_metrics(y[isTest], positive_proba(m, XTest))
+        print('  %-10s %8d %10d %11.1f %15.2f %8.4f %10.4f %10.4f'
+              % (label, m.n_estimators, len(m.feature), nBytes / 1000.0,
+                 per_row_seconds(m, X) * 1e6, metrics['auc'], metrics['accuracy'],
+                 metrics['log_loss']))
+
+
+if __name__ == '__main__':
+    main()
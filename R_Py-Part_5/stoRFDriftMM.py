@@ -0,0 +1,154 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFDriftMM.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# This TechBytes demo utilizes a use case to predict the propensity of a
+# financial services customer base to open a credit card account.
+#
+# The present file is the Python drift scoring script to be used with the
+# SCRIPT table operator, as described in the following use case 2 of the
+# present demo Part 5:
+#
+# 2) Fitting and scoring multiple models
+#
+#    We utilize the statecode variable as a partition to built a Random
+#    Forest model for every state. When the training data are refreshed,
+#    the models of the state codes whose data have not changed much need
+#    not be refitted.
+#    With the option "--sketch", the fitting script "stoRFFitMM.py" stores a
+#    compact summary sketch of the predictor columns of every state code next
+#    to its model. The present script runs with a PARTITION BY statecode in
+#    the query, and compares the new training data of every state code with
+#    the sketch of its model in a single pass over the data. It outputs a
+#    drift score for every state code, and whether its model needs to be
+#    refitted. The fitting query then refits only these models.
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+################################################################################
+
+import sys
+import argparse
+import itertools
+from stoRFIO import TableDecoder, ResultWriter, MULTIMODEL_SCHEMA
+from stoRFFit import DriftAccumulator, DEFAULT_DRIFT_THRESHOLD
+
+###
+### Script arguments
+###
+
+# A model is refitted when the drift score of its state code, the largest
+# population stability index (PSI) of any predictor column, exceeds 0.1 or the
+# value of the option "--threshold <T>" in the SCRIPT_COMMAND clause of the
+# SCRIPT query. The script reads its input in batches of 10000 rows, or of
+# the size given by the option "--batch-size <N>", so that its memory use does
+# not grow with the number of rows.
+parser = argparse.ArgumentParser(description='Score the drift of the MultiModelTrain_Py state codes.')
+parser.add_argument('--threshold', type=float, default=DEFAULT_DRIFT_THRESHOLD,
+                    help='drift score above which the model of a state code is refitted')
+parser.add_argument('--batch-size', type=int, default=10000,
+                    help='number of input rows to read at a time')
+args = parser.parse_args()
+
+###
+### Set up input decoder according to input schema
+###
+
+# Know your data: You must know in advance the number and data types of the
+# incoming columns from the database!
+# The input schema of the MultiModelTrain_Py table is declared in the helper
+# module stoRFIO.py. In addition, the input here carries the sketch column,
+# which the decoder reads past. The sketch column is NULL in the data rows.
+# One more row of the partition carries the sketch of the model of the state
+# code there, with NULL data columns. Every batch is compared with the sketch
+# once the sketch row has arrived; only the batches that arrive ahead of it
+# are kept in memory until then.
+delimiter = '\t'
+sep = delimiter.encode('utf-8')
+decoder = TableDecoder(MULTIMODEL_SCHEMA + [('sketch', 'skip')], delimiter)
+predictor_columns = ["tot_income", "tot_age", "tot_cust_years", "tot_children",
+                     "female_ind", "single_ind", "married_ind", "separated_ind",
+                     "ck_acct_ind", "sv_acct_ind", "ck_avg_bal", "sv_avg_bal",
+                     "ck_avg_tran_amt", "sv_avg_tran_amt", "q1_trans_cnt",
+                     "q2_trans_cnt", "q3_trans_cnt", "q4_trans_cnt"]
+
+###
+### Compare the input data with the sketch, one batch at a time
+###
+
+stateCode = None
+accumulator = None
+nRows = 0
+pending = []
+stream = sys.stdin.buffer
+while True:
+    lines = list(itertools.islice(stream, args.batch_size))
+    if not lines:
+        break
+    if stateCode is None:
+        stateCode = lines[0].split(sep)[9].decode('utf-8').strip()
+
+    dataLines = []
+    for line in lines:
+        body = line.rstrip(b'\r\n')
+        sketch = body[body.rfind(sep) + len(sep):].strip()
+        if not sketch:
+            dataLines.append(line)
+        elif accumulator is None:
+            accumulator = DriftAccumulator(sketch.decode('utf-8'))
+    del lines
+
+    if dataLines:
+        X = decoder.decode(dataLines)[predictor_columns]
+        nRows += len(X)
+        pending.append(X)
+        del dataLines
+    if accumulator is not None:
+        for X in pending:
+            accumulator.update(X)
+        pending = []
+
+###
+### If no data received, gracefully exit rather than producing an error later.
+###
+
+if stateCode is None:
+    sys.exit()
+
+###
+### Send the state code and its drift score as output from the present AMP.
+###
+
+# A state code without a sketch, as when it has no model yet, is refitted, and
+# a state code without new data rows is not. The drift score of the former is
+# NULL, as is the column with the largest drift score.
+if accumulator is None or nRows == 0:
+    drift, column = '', ''
+    refit = int(nRows > 0)
+else:
+    drift, column = accumulator.drift()
+    refit = int(drift > args.threshold)
+
+# Export results to Advanced SQL Engine through standard output in expected
+# format: the state code, the number of new data rows, the drift score, the
+# predictor column with the largest drift, and 1 if the model is to be refitted
+# or 0 otherwise.
+writer = ResultWriter(sys.stdout, delimiter)
+writer.write([stateCode], [nRows], [drift], [column], [refit])
+writer.flush()
@@ -0,0 +1,385 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFFit.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# The present file is a helper module with the model fitting routines of the
+# fitting scripts of the present demo Part 5.
+#
+# The SCRIPT Table Operator runs one instance of a fitting script on every AMP,
+# and all AMPs of a node share the CPU cores of the node. A fitting script can
+# build the trees of its forest with several workers, but should not use more
+# cores than its share of the node; otherwise, the concurrent AMP processes
+# oversubscribe the node, and all of them slow down. The module computes this
+# per-AMP CPU budget, and fits forests with a pool of worker threads or worker
+# processes within the budget.
+#
+# A state code partition that holds much more data than the others keeps its
+# AMP busy long after the others have finished. Such a partition can be split
+# into hash sub-partitions, each of them fitting a sub-forest with its share
+# of the trees on a different AMP. The module joins these sub-forests into one
+# forest per state code.
+#
+# To refit only the models whose training data have changed, the module keeps
+# compact summary sketches of the predictor columns of a partition: the count,
+# mean and standard deviation of every column, its decile edges, and the
+# fraction of rows between the edges. A later pass over new data counts the
+# new rows between the same edges, and scores the drift of every column by
+# the population stability index (PSI) of the two distributions.
+#
+# For the model selection, the module scores the held-out rows of a
+# cross-validation fold: the area under the ROC curve (AUC), the accuracy, and
+# the log loss of the predicted probabilities of the positive class.
+#
+# A fitting script can also fit several candidate forests from a grid of
+# parameter values on the partition that it has read once, and keep the
+# candidate with the best out-of-bag (OOB) AUC. The candidates that differ only
+# in their number of trees share their trees: the forest of the smallest
+# number of trees is fitted first, and then grown by the missing trees.
+#
+# The module is used in the Vantage Advanced SQL Engine by the fitting scripts,
+# and must be installed together with them.
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+#  v.1.3     2026-10-18     Sub-forests of sub-partitions, and joining of forests
+#  v.1.4     2026-10-18     Selection of trees of a forest (select_trees)
+#  v.1.5     2026-10-18     Summary sketches of the training data, and drift scores
+#  v.1.6     2026-10-18     Classification metrics of held-out rows
+#  v.1.7     2026-10-18     Selection of forest parameters from a grid by OOB AUC
+################################################################################
+
+import os
+import copy
+import json
+import itertools
+import numpy as np
+from stoRFForest import ArrayForest
+
+# Worker pools for the tree building: threads share the memory of the script
+# process, and build trees concurrently because scikit-learn releases the
+# Python global interpreter lock while it grows a tree. Processes copy the
+# training data into every worker, but are not affected by the lock at all.
+BACKENDS = {'threads': 'threading', 'processes': 'loky'}
+
+
+def available_cores():
+    """Number of CPU cores that the present process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def cpu_budget(amps_per_node=1, cores=None):
+    """Number of cores per AMP, when amps_per_node AMPs share the cores of the
+    node evenly. The budget is at least 1."""
+    if cores is None:
+        cores = available_cores()
+    return max(1, cores // max(1, amps_per_node))
+
+
+def worker_count(n_jobs, amps_per_node=1, cores=None):
+    """Number of fitting workers for a request of n_jobs workers.
+
+    A request of 0 workers takes the whole per-AMP CPU budget, and any other
+    request is capped by the budget.
+    """
+    budget = cpu_budget(amps_per_node, cores)
+    if n_jobs <= 0:
+        return budget
+    return min(n_jobs, budget)
+
+
+def fit_forest(classifier, X, y, n_jobs=1, backend='threads'):
+    """Fit a scikit-learn forest with n_jobs workers of the given backend.
+
+    The trees of a forest are grown from random seeds that are drawn before
+    the work is split across the workers, so the fitted trees are the same for
+    any number of workers and either backend. The n_jobs setting of the
+    classifier is restored after the fit, so that the fitted model does not
+    bring its fitting workers along to the scoring scripts.
+    """
+    if backend not in BACKENDS:
+        raise ValueError('Unknown fitting backend %r; use one of %s'
+                         % (backend, ', '.join(sorted(BACKENDS))))
+    if n_jobs <= 1:
+        return classifier.fit(X, y)
+
+    from joblib import parallel_backend
+
+    savedJobs = classifier.n_jobs
+    classifier.set_params(n_jobs=n_jobs)
+    try:
+        with parallel_backend(BACKENDS[backend], n_jobs=n_jobs):
+            classifier.fit(X, y)
+    finally:
+        classifier.set_params(n_jobs=savedJobs)
+    return classifier
+
+
+def sub_forest_trees(n_estimators, subpart_id, n_subparts):
+    """Number of trees of the sub-forest of sub-partition subpart_id, out of
+    n_subparts, when the sub-forests share n_estimators trees as evenly as
+    possible."""
+    share, extra = divmod(n_estimators, n_subparts)
+    return share + (1 if subpart_id < extra else 0)
+
+
+def merge_forests(models):
+    """Join the trees of several fitted forests into one forest.
+
+    The models are either all scikit-learn RandomForestClassifier objects or
+    all array-based forests of stoRFForest.py, with the same features and
+    classes. The joined forest averages the class probabilities of all their
+    trees; the forest of each sub-partition thus counts by its number of trees.
+    """
+    if all(isinstance(model, ArrayForest) for model in models):
+        return ArrayForest.concatenate(models)
+    if any(isinstance(model, ArrayForest) for model in models):
+        raise ValueError('Forests in the pickle and the array-based format cannot be joined')
+    first = models[0]
+    for model in models[1:]:
+        if model.n_features_in_ != first.n_features_in_:
+            raise ValueError('Forests with different features cannot be joined')
+        if not np.array_equal(model.classes_, first.classes_):
+            raise ValueError('Forests with different classes cannot be joined: %s and %s'
+                             % (first.classes_.tolist(), model.classes_.tolist()))
+    merged = copy.copy(first)
+    merged.estimators_ = [est for model in models for est in model.estimators_]
+    merged.n_estimators = len(merged.estimators_)
+    return merged
+
+
+def select_trees(model, trees):
+    """A forest of the trees of model with the given indices, in the order
+    given. The model is a scikit-learn RandomForestClassifier or an array-based
+    forest of stoRFForest.py."""
+    if isinstance(model, ArrayForest):
+        return model.select_trees(trees)
+    selected = copy.copy(model)
+    selected.estimators_ = [model.estimators_[t] for t in trees]
+    selected.n_estimators = len(selected.estimators_)
+    return selected
+
+
+###
+### Summary sketches and drift
+###
+
+# Number of bins between the quantile edges of a sketch column
+SKETCH_BINS = 10
+# Common rule of thumb: a PSI below 0.1 means no significant change, and a PSI
+# above 0.25 means a major change of a distribution.
+DEFAULT_DRIFT_THRESHOLD = 0.1
+# Smallest bin fraction in the PSI, so that empty bins do not make it infinite
+_PSI_FLOOR = 1e-4
+
+
+def _bin_counts(values, edges):
+    # Rows in the bins (-inf, e0], (e0, e1], ..., (ek, inf); NaNs are not counted
+    values = values[~np.isnan(values)]
+    return np.bincount(np.searchsorted(edges, values, side='left'),
+                       minlength=len(edges) + 1)
+
+
+def feature_sketch(X, bins=SKETCH_BINS):
+    """Summary sketch of the columns of the DataFrame X, as a JSON text."""
+    columns = {}
+    for name in X.columns:
+        values = np.asarray(X[name], dtype=np.float64)
+        present = values[~np.isnan(values)]
+        if present.size:
+            edges = np.unique(np.quantile(present, np.linspace(0.0, 1.0, bins + 1)[1:-1]))
+        else:
+            edges = np.empty(0)
+        counts = _bin_counts(values, edges)
+        columns[name] = {'mean': float(present.mean()) if present.size else None,
+                         'std': float(present.std()) if present.size else None,
+                         'edges': edges.tolist(),
+                         'fractions': (counts / max(1, counts.sum())).tolist()}
+    return json.dumps({'count': int(len(X)), 'columns': columns},
+                      sort_keys=True, separators=(',', ':'))
+
+
+def psi(expected, actual):
+    """Population stability index of the bin fractions actual against the
+    reference bin fractions expected."""
+    expected = np.maximum(np.asarray(expected, dtype=np.float64), _PSI_FLOOR)
+    actual = np.maximum(np.asarray(actual, dtype=np.float64), _PSI_FLOOR)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+class DriftAccumulator(object):
+    """Drift of new data against a reference sketch, in a single pass.
+
+    The new data are passed in batches to update(); only the bin counts of
+    every column are kept. drift() returns the largest PSI of any column, and
+    the column that it belongs to.
+    """
+
+    def __init__(self, reference):
+        if not isinstance(reference, dict):
+            reference = json.loads(reference)
+        self.reference = reference['columns']
+        self.count = 0
+        self.counts = dict((name, np.zeros(len(col['edges']) + 1, dtype=np.int64))
+                           for name, col in self.reference.items())
+
+    def update(self, X):
+        self.count += len(X)
+        for name, col in self.reference.items():
+            values = np.asarray(X[name], dtype=np.float64)
+            self.counts[name] += _bin_counts(values, np.asarray(col['edges']))
+
+    def scores(self):
+        """PSI of every column."""
+        return dict((name, psi(col['fractions'],
+                               self.counts[name] / max(1, self.counts[name].sum())))
+                    for name, col in self.reference.items())
+
+    def drift(self):
+        scores = self.scores()
+        column = max(sorted(scores), key=scores.get)
+        return scores[column], column
+
+
+###
+### Classification metrics
+###
+
+# Smallest probability in the log loss, so that a wrong prediction with
+# probability 0 does not make it infinite
+_LOG_LOSS_EPS = 1e-15
+
+
+def positive_proba(model, X, positive=1):
+    """Predicted probability of the positive class for the rows of X. A model
+    that has not seen the positive class in its training data predicts 0."""
+    classes = list(model.classes_)
+    if positive not in classes:
+        return np.zeros(len(X))
+    return model.predict_proba(X)[:, classes.index(positive)]
+
+
+def roc_auc(y, score, positive=1):
+    """Area under the ROC curve of the scores for the labels y, or None when
+    y holds only one class. Tied scores count half."""
+    y = np.asarray(y)
+    score = np.asarray(score, dtype=np.float64)
+    isPositive = y == positive
+    nPos = int(isPositive.sum())
+    nNeg = len(y) - nPos
+    if nPos == 0 or nNeg == 0:
+        return None
+    # Mann-Whitney statistic with the mean rank of every group of tied scores
+    _, inverse, counts = np.unique(score, return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2.0)[inverse]
+    return float((ranks[isPositive].sum() - nPos * (nPos + 1) / 2.0) / (nPos * nNeg))
+
+
+def classification_metrics(y, score, positive=1, threshold=0.5):
+    """AUC, accuracy and log loss of the predicted probabilities score of the
+    positive class for the labels y, as a dict."""
+    y = np.asarray(y)
+    score = np.asarray(score, dtype=np.float64)
+    isPositive = y == positive
+    p = np.clip(score, _LOG_LOSS_EPS, 1 - _LOG_LOSS_EPS)
+    return {'auc': roc_auc(y, score, positive),
+            'accuracy': float(np.mean((score > threshold) == isPositive)) if len(y) else None,
+            'log_loss': float(-np.mean(np.where(isPositive, np.log(p), np.log(1 - p))))
+                        if len(y) else None}
+
+
+###
+### Parameter grids
+###
+
+# Forest parameters that a grid may set, all with integer values
+GRID_PARAMETERS = ('n_estimators', 'max_features', 'min_samples_leaf', 'max_depth')
+
+
+def parse_grid(specs):
+    """Parameter grid of the specifications "name=v1,v2,...", as a dict of
+    the value lists of the parameters."""
+    grid = {}
+    for spec in specs:
+        name, sep, values = spec.partition('=')
+        name = name.strip()
+        if not sep or name not in GRID_PARAMETERS:
+            raise ValueError('Invalid grid specification %r; use name=v1,v2,... with a name of %s'
+                             % (spec, ', '.join(GRID_PARAMETERS)))
+        try:
+            grid[name] = [int(value) for value in values.split(',') if value.strip()]
+        except ValueError:
+            raise ValueError('Invalid grid values in %r; the values must be integers' % spec)
+        if not grid[name]:
+            raise ValueError('No grid values in %r' % spec)
+    return grid
+
+
+def oob_auc(classifier, y, positive=1):
+    """AUC of the out-of-bag probabilities of a forest fitted with
+    oob_score=True. Rows that are in the bootstrap samples of all trees have
+    no out-of-bag probability, and are left out."""
+    classes = list(classifier.classes_)
+    if positive not in classes:
+        return None
+    score = classifier.oob_decision_function_[:, classes.index(positive)]
+    seen = ~np.isnan(score)
+    return roc_auc(np.asarray(y)[seen], score[seen], positive)
+
+
+def fit_grid(classifier, X, y, grid, n_jobs=1, backend='threads'):
+    """Fit the candidates of a parameter grid, and return the candidate with
+    the best OOB AUC, along with the list of the parameters and the OOB AUC of
+    all candidates.
+
+    The candidates are the scikit-learn forest classifier with every
+    combination of the parameter values of the grid. Each candidate is fitted
+    on the same X and y with n_jobs workers of the given backend, as by
+    fit_forest(). Of candidates with the same OOB AUC, the one fitted first is
+    kept. The kept candidate does not carry its OOB probabilities along.
+    """
+    from sklearn.base import clone
+
+    names = sorted(name for name in grid if name != 'n_estimators')
+    treeCounts = sorted(set(grid.get('n_estimators', [classifier.n_estimators])))
+    results = []
+    best = None
+    bestResult = None
+    for values in itertools.product(*[grid[name] for name in names]):
+        params = dict(zip(names, values))
+        candidate = clone(classifier).set_params(oob_score=True, warm_start=True, **params)
+        for nTrees in treeCounts:
+            candidate.set_params(n_estimators=nTrees)
+            candidate = fit_forest(candidate, X, y, n_jobs, backend)
+            result = dict(params, n_estimators=nTrees, oob_auc=oob_auc(candidate, y))
+            results.append(result)
+            if best is None or (result['oob_auc'] is not None and
+                                (bestResult['oob_auc'] is None or
+                                 result['oob_auc'] > bestResult['oob_auc'])):
+                # The warm start grows the same list of trees further
+                best = copy.copy(candidate)
+                best.estimators_ = list(candidate.estimators_)
+                bestResult = result
+    best.set_params(oob_score=False, warm_start=False)
+    for name in ('oob_score_', 'oob_decision_function_'):
+        if hasattr(best, name):
+            delattr(best, name)
+    return best, bestResult, results
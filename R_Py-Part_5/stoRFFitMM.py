@@ -47,88 +47,177 @@
 # File Changelog
 #  v.1.0     2019-10-29     First release
 #  v.1.1     2020-04-02     Added change log; no code changes in present file
+#  v.1.2     2026-10-18     Bulk decoding of FLOAT columns with stoRFIO.py
+#  v.1.3     2026-10-18     Typed input decoding with the stoRFIO.py schema decoder
+#  v.1.4     2026-10-18     Optional array-based model format (--model-format)
+#  v.1.5     2026-10-18     Compressed models in chunks of rows (--compression, --chunk-size)
+#  v.1.6     2026-10-18     Parallel tree building within a per-AMP CPU budget (--n-jobs)
+#  v.1.7     2026-10-18     Sub-forests of hash sub-partitions of a state code (--sub-forests)
+#  v.1.8     2026-10-18     Incremental refit of existing models (--add-trees, --keep-trees)
+#  v.1.9     2026-10-18     Summary sketches of the training data (--sketch)
+#  v.1.10    2026-10-18     Selection of the model parameters from a grid (--grid)
+#  v.1.11    2026-10-18     Binned model fitting with stoRFBins.py (--binned, --max-bins)
 ################################################################################
 
 import sys
-import numpy as np
-import pandas as pd
+import zlib
+import json
+import argparse
 from sklearn.ensemble import RandomForestClassifier
 import pickle
-import base64
+from stoRFIO import TableDecoder, ResultWriter, MULTIMODEL_SCHEMA
+from stoRFForest import ArrayForest, export_forest, loads_model
+from stoRFModel import encode_transport, split_model_rows, COMPRESSIONS, DEFAULT_CHUNK_SIZE
+from stoRFFit import fit_forest, worker_count, sub_forest_trees, merge_forests, select_trees
+from stoRFFit import feature_sketch, parse_grid, fit_grid, BACKENDS
+from stoRFBins import HistogramForestClassifier, MAX_BINS
 
 ###
-### Read input
-###
-
-delimiter = '\t'
-inputData = []
-
-for line in sys.stdin.read().splitlines():
-    line = line.split(delimiter)
-    inputData.append(line)
-
-###
-### If no data received, gracefully exit rather than producing an error later.
+### Script arguments
 ###
 
-if not inputData:
-    sys.exit()
+# By default, the fitted models are pickled. The option "--model-format arrays"
+# in the SCRIPT_COMMAND clause of the SCRIPT query stores them in the compact
+# array-based format of the helper module stoRFForest.py instead. These models
+# are smaller, load faster, and are scored by "stoRFScoreMM.py" without
+# scikit-learn.
+# The serialized model is compressed with zlib, or with the compression given
+# by the option "--compression <none|zlib|lzma>"; lzma produces smaller models,
+# but takes longer. The compressed model is sent in one or more output rows
+# with text chunks of at most 1000000 characters each, or of the size given by
+# the option "--chunk-size <N>".
+# The trees of a forest are built one at a time, unless the option
+# "--n-jobs <N>" asks for N workers. All AMPs of a node share its CPU cores, so
+# the number of workers is capped by the share of the cores of every AMP; the
+# option "--amps-per-node <M>" specifies the number of AMPs on a node for this
+# purpose. With "--n-jobs 0", the script uses the whole share. The workers are
+# threads, or processes with the option "--backend processes". The fitted
+# models are identical for any number of workers.
+# With the option "--sub-forests", the input rows carry two more columns: the
+# number of the hash sub-partition of the state code that the row belongs to,
+# and the number of sub-partitions of the state code. The script then fits a
+# sub-forest with the share of the trees of its sub-partition, and outputs it
+# with the sub-partition number. The "stoRFMerge.py" script joins the
+# sub-forests of every state code into one forest.
+# With the option "--add-trees <N>", the script refreshes the existing model of
+# its state code rather than fitting a new one. The input then carries the
+# existing model in model rows next to the rows of recent training data, as
+# the scoring query in Part (B) of the SQL file does. The script fits N new
+# trees on the recent rows and adds them to the existing model. With the
+# option "--keep-trees <M>", the oldest trees are dropped so that the model
+# keeps at most M trees. The new trees are fitted with the random seed given
+# by the option "--seed <S>", or else with a seed that is computed from the
+# recent rows. The refreshed model keeps the format of the existing model. A
+# state code with model rows only keeps its model unchanged, and a state code
+# without model rows gets a new model.
+# With the option "--sketch", the script also outputs a compact summary sketch
+# of the predictor columns of its training data in one more column of the first
+# model row. The "stoRFDriftMM.py" script compares new training data against
+# these sketches, to refit only the models whose training data have drifted.
+# With one or more options "--grid <name>=<v1>,<v2>,...", the script fits a
+# candidate model for every combination of the given values of the parameters
+# n_estimators, max_features, min_samples_leaf and max_depth, such as with
+# "--grid max_features=3,5,7 --grid min_samples_leaf=1,5". The partition is
+# read only once for all candidates. The script keeps the candidate with the
+# best out-of-bag (OOB) AUC, and outputs its parameters and OOB AUC in one
+# more column of the first model row, after the sketch column if any.
+# With the option "--binned", the script quantizes every predictor column of
+# its partition into at most 256 bins, or into the number of bins given by the
+# option "--max-bins <B>", and grows the trees on the bin codes with the
+# histogram split finding of stoRFBins.py: the candidate splits of a node are
+# found from the class counts of the bins rather than by sorting the values.
+# This is faster for large partitions, at a small loss of accuracy. The binned
+# models are always stored in the array-based format, where the splits are on
+# the bin edges of the raw values, and are scored like any other model.
+parser = argparse.ArgumentParser(description='Fit a model for every state code in MultiModelTrain_Py.')
+parser.add_argument('--model-format', choices=['pickle', 'arrays'], default='pickle',
+                    help='serialization format of the fitted models')
+parser.add_argument('--compression', choices=COMPRESSIONS, default='zlib',
+                    help='compression of the serialized models')
+parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                    help='maximum number of characters of a model chunk in an output row')
+parser.add_argument('--n-jobs', type=int, default=1,
+                    help='number of tree building workers; 0 uses the whole per-AMP CPU budget')
+parser.add_argument('--amps-per-node', type=int, default=1,
+                    help='number of AMPs that share the CPU cores of a node')
+parser.add_argument('--backend', choices=sorted(BACKENDS), default='threads',
+                    help='worker pool for the tree building')
+parser.add_argument('--sub-forests', action='store_true',
+                    help='fit the sub-forest of a hash sub-partition of a state code')
+parser.add_argument('--add-trees', type=int, default=0,
+                    help='refresh the existing model of a state code with N new trees')
+parser.add_argument('--keep-trees', type=int, default=None,
+                    help='with --add-trees, drop the oldest trees beyond M trees')
+parser.add_argument('--seed', type=int, default=None,
+                    help='with --add-trees, random seed of the new trees')
+parser.add_argument('--sketch', action='store_true',
+                    help='output a summary sketch of the training data with the model')
+parser.add_argument('--grid', action='append', default=[], metavar='NAME=V1,V2,...',
+                    help='fit a candidate model for each value of a parameter, and keep the best')
+parser.add_argument('--binned', action='store_true',
+                    help='fit the trees on the bin codes of the predictor columns')
+parser.add_argument('--max-bins', type=int, default=MAX_BINS,
+                    help='with --binned, maximum number of bins of a column')
+args = parser.parse_args()
+if args.sub_forests and args.add_trees > 0:
+    parser.error('--sub-forests and --add-trees cannot be combined')
+if not 2 <= args.max_bins <= MAX_BINS:
+    parser.error('--max-bins must be between 2 and %d' % MAX_BINS)
+if args.grid and (args.sub_forests or args.add_trees > 0):
+    parser.error('--grid cannot be combined with --sub-forests or --add-trees')
+try:
+    grid = parse_grid(args.grid)
+except ValueError as e:
+    parser.error(str(e))
 
 ###
-### Set up input DataFrame according to input schema
+### Read input
 ###
 
 # Know your data: You must know in advance the number and data types of the
 # incoming columns from the database!
-# For numeric columns, the database sends in floats in scientific format with a
-# blank space when the exponential is positive; e.g., 1.0 is sent as 1.000E 000.
-# The following input data read deals with any such blank spaces in numbers.
+# The input schema of the MultiModelTrain_Py table is declared in the helper
+# module stoRFIO.py. The decoder turns the input rows into a DataFrame with
+# typed columns. For numeric columns, the database sends in floats in
+# scientific format with a blank space when the exponential is positive; e.g.,
+# 1.0 is sent as 1.000E 000. The decoder deals with any such blank spaces.
 
-columns = ['cust_id', 'tot_income', 'tot_age', 'tot_cust_years', 'tot_children',
-           'female_ind', 'single_ind', 'married_ind', 'separated_ind',
-           'statecode', 'ck_acct_ind', 'sv_acct_ind', 'cc_acct_ind',
-           'ck_avg_bal', 'sv_avg_bal', 'cc_avg_bal', 'ck_avg_tran_amt',
-           'sv_avg_tran_amt', 'cc_avg_tran_amt', 'q1_trans_cnt',
-           'q2_trans_cnt', 'q3_trans_cnt', 'q4_trans_cnt', 'SAMPLE_ID']
-
-df = pd.DataFrame(inputData, columns=columns)
-del inputData
-
-df['cust_id'] = pd.to_numeric(df['cust_id'])
-
-df['tot_income'] = df['tot_income'].apply(lambda x: "".join(x.split()))
-df['tot_income'] = pd.to_numeric(df['tot_income'])
-
-df['tot_age'] = pd.to_numeric(df['tot_age'])
-df['tot_cust_years'] = pd.to_numeric(df['tot_cust_years'])
-df['tot_children'] = pd.to_numeric(df['tot_children'])
-df['female_ind'] = pd.to_numeric(df['female_ind'])
-df['single_ind'] = pd.to_numeric(df['single_ind'])
-df['married_ind'] = pd.to_numeric(df['married_ind'])
-df['separated_ind'] = pd.to_numeric(df['separated_ind'])
-df['statecode'] = df['statecode'].apply(lambda x: x.replace('"', ''))
-df['ck_acct_ind'] = pd.to_numeric(df['ck_acct_ind'])
-df['sv_acct_ind'] = pd.to_numeric(df['sv_acct_ind'])
-df['cc_acct_ind'] = pd.to_numeric(df['cc_acct_ind'])
+delimiter = '\t'
+schema = MULTIMODEL_SCHEMA
+if args.sub_forests:
+    schema = schema + [('subpart_id', 'int32'), ('n_subparts', 'int32')]
+oldModel = None
+if args.add_trees > 0:
+    # The input carries the nRow and rf_model columns with the chunks of the
+    # existing model, which the decoder reads past. Isolate the model chunks,
+    # and decode the data rows without them.
+    decoder = TableDecoder(schema + [('nRow', 'skip'), ('rf_model', 'skip')], delimiter)
+    inputLines = sys.stdin.buffer.readlines()
+    if not inputLines:
+        sys.exit()
+    stateCode = inputLines[0].split(delimiter.encode('utf-8'))[9].decode('utf-8').strip()
+    oldModelSer, dataLines = split_model_rows(inputLines, delimiter, required=False)
+    del inputLines
+    if oldModelSer is not None:
+        oldModel = loads_model(oldModelSer)
+        del oldModelSer
+    refreshSeed = args.seed
+    if refreshSeed is None:
+        refreshSeed = zlib.crc32(b''.join(dataLines)) & 0x7fffffff
+    df = decoder.decode(dataLines) if dataLines else None
+    del dataLines
+else:
+    decoder = TableDecoder(schema, delimiter)
+    df = decoder.read(sys.stdin)
 
-df['ck_avg_bal'] = df['ck_avg_bal'].apply(lambda x: "".join(x.split()))
-df['ck_avg_bal'] = pd.to_numeric(df['ck_avg_bal'])
-df['sv_avg_bal'] = df['sv_avg_bal'].apply(lambda x: "".join(x.split()))
-df['sv_avg_bal'] = pd.to_numeric(df['sv_avg_bal'])
-df['cc_avg_bal'] = df['cc_avg_bal'].apply(lambda x: "".join(x.split()))
-df['cc_avg_bal'] = pd.to_numeric(df['cc_avg_bal'])
-df['ck_avg_tran_amt'] = df['ck_avg_tran_amt'].apply(lambda x: "".join(x.split()))
-df['ck_avg_tran_amt'] = pd.to_numeric(df['ck_avg_tran_amt'])
-df['sv_avg_tran_amt'] = df['sv_avg_tran_amt'].apply(lambda x: "".join(x.split()))
-df['sv_avg_tran_amt'] = pd.to_numeric(df['sv_avg_tran_amt'])
-df['cc_avg_tran_amt'] = df['cc_avg_tran_amt'].apply(lambda x: "".join(x.split()))
-df['cc_avg_tran_amt'] = pd.to_numeric(df['cc_avg_tran_amt'])
+###
+### If no data received, gracefully exit rather than producing an error later.
+###
 
-df['q1_trans_cnt'] = pd.to_numeric(df['q1_trans_cnt'])
-df['q2_trans_cnt'] = pd.to_numeric(df['q2_trans_cnt'])
-df['q3_trans_cnt'] = pd.to_numeric(df['q3_trans_cnt'])
-df['q4_trans_cnt'] = pd.to_numeric(df['q4_trans_cnt'])
-df['SAMPLE_ID'] = pd.to_numeric(df['SAMPLE_ID'])
+if df is None and oldModel is None:
+    sys.exit()
+if args.add_trees == 0:
+    stateCode = df.iloc[0,9]
 
 ###
 ### Perform classification model fitting
@@ -141,18 +230,81 @@ predictor_columns = ["tot_income", "tot_age", "tot_cust_years", "tot_children",
                      "q2_trans_cnt", "q3_trans_cnt", "q4_trans_cnt"]
 # For the classifier, specify the equivalent parameter values used in the R example:
 # ntree: n_estimators=500, mtry: max_features=5, nodesize: min_samples_leaf=1 (default; skipped)
-classifier = RandomForestClassifier(n_estimators=500, max_features=5, random_state=0)
-X = df[predictor_columns]
-y = df["cc_acct_ind"]
-classifier = classifier.fit(X, y)
+# The sub-forest of a sub-partition gets its share of the 500 trees, and a
+# different random seed for every sub-partition. A state code with a single
+# sub-partition gets the same forest as without sub-partitions.
+# When an existing model is refreshed, only the new trees are fitted. With a
+# parameter grid, the grid values replace these parameter values.
+nTrees = 500
+seed = 0
+if args.sub_forests:
+    subpartId = int(df['subpart_id'].iloc[0])
+    nTrees = sub_forest_trees(nTrees, subpartId, int(df['n_subparts'].iloc[0]))
+    seed = subpartId
+elif oldModel is not None:
+    nTrees = args.add_trees
+    seed = refreshSeed
+if df is not None:
+    if args.binned:
+        classifier = HistogramForestClassifier(n_estimators=nTrees, max_features=5,
+                                               max_bins=args.max_bins, random_state=seed)
+    else:
+        classifier = RandomForestClassifier(n_estimators=nTrees, max_features=5, random_state=seed)
+    X = df[predictor_columns]
+    y = df["cc_acct_ind"]
+    nJobs = worker_count(args.n_jobs, args.amps_per_node)
+    if grid:
+        classifier, bestParams, _ = fit_grid(classifier, X, y, grid, nJobs, args.backend)
+    else:
+        classifier = fit_forest(classifier, X, y, nJobs, args.backend)
+    if args.binned:
+        classifier = classifier.to_array_forest()
+    if args.sketch:
+        sketch = feature_sketch(X)
+
+# Add the new trees after the trees of the existing model, and drop the oldest
+# trees from the front of the joined forest.
+if oldModel is not None:
+    if df is None:
+        classifier = oldModel
+    else:
+        if isinstance(oldModel, ArrayForest) and not isinstance(classifier, ArrayForest):
+            classifier = ArrayForest.from_sklearn(classifier)
+        elif isinstance(classifier, ArrayForest) and not isinstance(oldModel, ArrayForest):
+            oldModel = ArrayForest.from_sklearn(oldModel)
+        classifier = merge_forests([oldModel, classifier])
+    nTotal = classifier.n_estimators
+    if args.keep_trees is not None and nTotal > args.keep_trees:
+        classifier = select_trees(classifier, range(nTotal - args.keep_trees, nTotal))
 
 # Serialize the model for export
-modelSer = pickle.dumps(classifier)
-modelSerB64 = base64.b64encode(modelSer)
+if isinstance(classifier, ArrayForest):
+    modelSer = classifier.to_bytes()
+elif args.model_format == 'arrays':
+    modelSer = export_forest(classifier)
+else:
+    modelSer = pickle.dumps(classifier)
+modelChunks = encode_transport(modelSer, args.compression, args.chunk_size)
 
 ###
 ### Send the state code and fitted model as output from the present AMP.
 ###
 
-# Export results to NewSQL Engine through standard output in expected format.
-print(df.iloc[0,9], delimiter, modelSerB64)
+# Export results to NewSQL Engine through standard output in expected format:
+# one row per model chunk with the state code, the chunk number 1, 2, ..., and
+# the chunk text. The rows of a sub-forest carry the sub-partition number after
+# the state code. With the option "--sketch", every row has one more column,
+# which holds the sketch in the first row and is blank in the others. With the
+# option "--grid", the parameters of the model follow in the same way.
+nChunks = len(modelChunks)
+writer = ResultWriter(sys.stdout, delimiter)
+keyColumns = [[stateCode] * nChunks]
+if args.sub_forests:
+    keyColumns.append([subpartId] * nChunks)
+modelColumns = keyColumns + [list(range(1, nChunks + 1)), modelChunks]
+if args.sketch:
+    modelColumns.append([sketch if df is not None else ''] + [''] * (nChunks - 1))
+if grid:
+    modelColumns.append([json.dumps(bestParams, sort_keys=True)] + [''] * (nChunks - 1))
+writer.write(*modelColumns)
+writer.flush()
@@ -0,0 +1,723 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFForest.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# The present file is a helper module with a compact, array-based format for
+# the Random Forest models of the present demo Part 5, and a predictor for
+# models in this format that only needs NumPy.
+#
+# A fitted scikit-learn RandomForestClassifier is flattened into contiguous
+# arrays with the split feature, split threshold, child nodes and class
+# probabilities of every tree node. The arrays are stored after a small
+# versioned header, so that a model can be loaded without unpickling hundreds
+# of tree objects, and without importing scikit-learn. The predictor returns
+# the same probabilities as the predict_proba() method of the original model.
+#
+# The module offers a second predictor in the style of the QuickScorer
+# algorithm, which replaces the traversal of the trees by comparisons against
+# sorted threshold lists and bitwise ANDs of leaf bit vectors. The bit vector
+# of a tree takes one 64-bit word for every 64 of its leaves.
+#
+# The module is used on the client to export models, and in the Vantage
+# Advanced SQL Engine by the scoring scripts. In the latter case, it must be
+# installed together with the scripts.
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+#  v.1.3     2026-10-18     Concatenation of forests (ArrayForest.concatenate)
+#  v.1.4     2026-10-18     Selection of trees of a forest (ArrayForest.select_trees)
+#  v.1.5     2026-10-18     Early-exit prediction (ArrayForest.predict_proba_early_exit)
+#  v.1.6     2026-10-18     QuickScorer-style predictor for forests of small trees
+#  v.1.7     2026-10-18     Feature manifest of a model (feature_manifest)
+#  v.1.8     2026-10-18     Deterministic early-exit bound by default
+################################################################################
+
+import json
+import pickle
+import struct
+import numpy as np
+
+# File layout: the magic bytes, the format version as unsigned short, and the
+# size of the JSON header as unsigned int, followed by the JSON header itself.
+# Every array follows at an offset that is a multiple of _ALIGN bytes. The JSON
+# header records the data type, shape and offset of every array.
+FOREST_MAGIC = b'TDRF'
+FOREST_VERSION = 1
+_PREFIX = struct.Struct('<4sHI')
+_ALIGN = 64
+
+# Maximum number of (row, tree) pairs that the predictor traverses at a time
+_CHUNK_PAIRS = 1 << 20
+
+# Early-exit prediction: the default number of trees evaluated per block, the
+# bounds by which a row exits, and the number of standard errors of the
+# statistical bound
+EARLY_EXIT_BLOCK = 50
+EARLY_EXIT_BOUNDS = ('deterministic', 'statistical')
+EARLY_EXIT_Z = 3.0
+_EARLY_EXIT_MARGIN = 1e-9
+
+# QuickScorer-style predictor: the largest number of leaves of a tree, the
+# largest size of its tables, and the numbers of unsigned 64-bit words of leaf
+# bit vectors and of rows that it handles at a time
+QUICKSCORER_MAX_LEAVES = 2048
+QUICKSCORER_MAX_BYTES = 128 * 1000 * 1000
+_QUICKSCORER_WORDS = 32
+_QUICKSCORER_ROWS = 1024
+_ALL_LEAVES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+# Scoring engines of the scoring scripts: the predictor of the loaded model,
+# or the QuickScorer-style predictor
+ENGINES = ('default', 'quickscorer')
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _starts(sizes):
+    # Start offsets of consecutive segments of the given sizes
+    starts = np.zeros(len(sizes), dtype=np.int64)
+    np.cumsum(sizes[:-1], out=starts[1:])
+    return starts
+
+
+def is_array_forest(data):
+    """True if the bytes-like data hold a model in the array-based format."""
+    return bytes(data[:len(FOREST_MAGIC)]) == FOREST_MAGIC
+
+
+class ArrayForest(object):
+    """Random Forest classifier in the compact array-based format.
+
+    All trees are concatenated in flat node arrays. Node indices are global
+    across trees, and the root of every tree is listed in roots. For every
+    node, feature is the split feature or -1 for a leaf, children holds the
+    left and right child, and value holds the predicted class probabilities.
+    The children of a leaf point back to the leaf itself. Next to the split
+    thresholds, threshold32 holds the largest float32 values that do not
+    exceed them; for single precision feature values x, the test
+    x <= threshold is the same as x <= threshold32.
+    """
+
+    _ARRAYS = ('roots', 'feature', 'threshold', 'threshold32', 'children',
+               'missing_left', 'value')
+
+    def __init__(self, header, arrays):
+        self.header = header
+        for name in self._ARRAYS:
+            setattr(self, name, arrays[name])
+        self.classes_ = np.array(header['classes'], dtype=header['classes_dtype'])
+        self.n_classes_ = len(self.classes_)
+        self.n_features_in_ = header['n_features']
+        self.n_estimators = len(self.roots)
+        self.max_depth = header['max_depth']
+        if header.get('feature_names') is not None:
+            self.feature_names_in_ = np.array(header['feature_names'], dtype=object)
+
+    ###
+    ### Conversion from scikit-learn and serialization
+    ###
+
+    @classmethod
+    def from_sklearn(cls, classifier):
+        """Flatten a fitted scikit-learn RandomForestClassifier."""
+        if getattr(classifier, 'n_outputs_', 1) != 1:
+            raise ValueError('Only single-output forests can be exported')
+        trees = [est.tree_ for est in classifier.estimators_]
+        sizes = np.array([tree.node_count for tree in trees], dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        nNodes = int(sizes.sum())
+        nClasses = len(classifier.classes_)
+
+        featureType = np.int16 if classifier.n_features_in_ < 2 ** 15 else np.int32
+        feature = np.empty(nNodes, dtype=featureType)
+        threshold = np.empty(nNodes, dtype=np.float64)
+        children = np.empty((nNodes, 2), dtype=np.int32)
+        missingLeft = np.zeros(nNodes, dtype=np.uint8)
+        value = np.empty((nNodes, nClasses), dtype=np.float64)
+
+        for tree, start, size in zip(trees, starts, sizes):
+            span = slice(start, start + size)
+            split = tree.children_left >= 0
+            nodes = np.arange(start, start + size)
+            feature[span] = np.where(split, tree.feature, -1)
+            threshold[span] = np.where(split, tree.threshold, 0.0)
+            children[span, 0] = np.where(split, tree.children_left + start, nodes)
+            children[span, 1] = np.where(split, tree.children_right + start, nodes)
+            if hasattr(tree, 'missing_go_to_left'):
+                missingLeft[span] = tree.missing_go_to_left
+            nodeValue = tree.value[:, 0, :nClasses]
+            # Older scikit-learn versions store class counts in the nodes, and
+            # normalize them at prediction time; newer versions store the class
+            # fractions. Do the same normalization as the former here.
+            if nodeValue[0].sum() > 1.0 + 1e-9:
+                normalizer = nodeValue.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                nodeValue = nodeValue / normalizer
+            value[span] = nodeValue
+
+        threshold32 = threshold.astype(np.float32)
+        roundedUp = threshold32.astype(np.float64) > threshold
+        threshold32[roundedUp] = np.nextafter(threshold32[roundedUp], np.float32(-np.inf))
+
+        names = getattr(classifier, 'feature_names_in_', None)
+        header = {'n_features': int(classifier.n_features_in_),
+                  'feature_names': None if names is None else [str(n) for n in names],
+                  'classes': classifier.classes_.tolist(),
+                  'classes_dtype': classifier.classes_.dtype.str,
+                  'max_depth': int(max(tree.max_depth for tree in trees)),
+                  'n_nodes': nNodes}
+        arrays = {'roots': starts.astype(np.int32), 'feature': feature,
+                  'threshold': threshold, 'threshold32': threshold32,
+                  'children': children, 'missing_left': missingLeft, 'value': value}
+        return cls(header, arrays)
+
+    def to_bytes(self):
+        """Serialize the model in the versioned binary format."""
+        header = dict(self.header)
+        layout = {}
+        offset = 0
+        for name in self._ARRAYS:
+            arr = getattr(self, name)
+            layout[name] = {'dtype': arr.dtype.str, 'shape': list(arr.shape),
+                            'offset': offset}
+            offset = _aligned(offset + arr.nbytes)
+        header['arrays'] = layout
+        headerBytes = json.dumps(header, sort_keys=True).encode('utf-8')
+        base = _aligned(_PREFIX.size + len(headerBytes))
+
+        out = bytearray(base + offset)
+        out[:_PREFIX.size] = _PREFIX.pack(FOREST_MAGIC, FOREST_VERSION, len(headerBytes))
+        out[_PREFIX.size:_PREFIX.size + len(headerBytes)] = headerBytes
+        for name in self._ARRAYS:
+            arr = np.ascontiguousarray(getattr(self, name))
+            start = base + layout[name]['offset']
+            out[start:start + arr.nbytes] = arr.tobytes()
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Load a model from a bytes-like object (bytes, memoryview, mmap).
+
+        The arrays are read-only views into data, and are not copied.
+        """
+        magic, version, headerSize = _PREFIX.unpack_from(data, 0)
+        if magic != FOREST_MAGIC:
+            raise ValueError('Data do not hold a model in the array-based forest format')
+        if version > FOREST_VERSION:
+            raise ValueError('Array-based forest format version %d is not supported; '
+                             'this module reads up to version %d' % (version, FOREST_VERSION))
+        header = json.loads(bytes(data[_PREFIX.size:_PREFIX.size + headerSize]).decode('utf-8'))
+        base = _aligned(_PREFIX.size + headerSize)
+        arrays = {}
+        for name, spec in header.pop('arrays').items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape']))
+            arrays[name] = np.frombuffer(data, dtype=dtype, count=count,
+                                         offset=base + spec['offset']).reshape(spec['shape'])
+        return cls(header, arrays)
+
+    @classmethod
+    def concatenate(cls, forests):
+        """Join the trees of several forests into one forest.
+
+        The forests must have the same features and classes. The joined forest
+        averages the probabilities of all their trees, in the order given.
+        """
+        first = forests[0]
+        for forest in forests[1:]:
+            if (forest.n_features_in_ != first.n_features_in_ or
+                    forest.header.get('feature_names') != first.header.get('feature_names')):
+                raise ValueError('Forests with different features cannot be joined')
+            if not np.array_equal(forest.classes_, first.classes_):
+                raise ValueError('Forests with different classes cannot be joined: %s and %s'
+                                 % (first.classes_.tolist(), forest.classes_.tolist()))
+        sizes = [len(forest.feature) for forest in forests]
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        arrays = {}
+        for name in cls._ARRAYS:
+            parts = [getattr(forest, name) for forest in forests]
+            if name in ('roots', 'children'):
+                # Node indices are global across the trees of a forest
+                parts = [part + np.int32(start) for part, start in zip(parts, starts)]
+            arrays[name] = np.concatenate(parts)
+        header = dict(first.header)
+        header['max_depth'] = max(forest.max_depth for forest in forests)
+        header['n_nodes'] = int(sum(sizes))
+        return cls(header, arrays)
+
+    def select_trees(self, trees):
+        """A forest of the trees with the given indices, in the order given."""
+        trees = np.asarray(trees, dtype=np.int64)
+        if trees.size == 0:
+            raise ValueError('A forest needs at least one tree')
+        ends = np.append(self.roots[1:], len(self.feature)).astype(np.int64)
+        spans = [np.arange(self.roots[t], ends[t]) for t in trees]
+        nodes = np.concatenate(spans)
+        sizes = np.array([len(span) for span in spans], dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        # Shift the node indices of every tree from its old to its new start
+        shift = np.repeat(starts - self.roots[trees], sizes).astype(np.int32)
+        arrays = {name: getattr(self, name)[nodes] for name in self._ARRAYS
+                  if name != 'roots'}
+        arrays['children'] = arrays['children'] + shift[:, np.newaxis]
+        arrays['roots'] = starts.astype(np.int32)
+        header = dict(self.header)
+        header['n_nodes'] = int(sizes.sum())
+        return type(self)(header, arrays)
+
+    ###
+    ### Prediction
+    ###
+
+    def _as_matrix(self, X):
+        # Reorder DataFrame columns by the feature names of the model. Like
+        # scikit-learn, compare the feature values in single precision.
+        if hasattr(X, 'columns') and hasattr(self, 'feature_names_in_'):
+            X = X[list(self.feature_names_in_)]
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError('X has %s features, but the model expects %d features'
+                             % (X.shape[1:] or 'no', self.n_features_in_))
+        return X
+
+    def apply(self, X, trees=None):
+        """Leaf node index of every row in every tree; shape (n_rows, n_trees).
+
+        X must be a float32 matrix as returned by _as_matrix(). With trees, a
+        slice or array of tree indices, only these trees are traversed.
+        """
+        roots = self.roots if trees is None else self.roots[trees]
+        nRows, nFeatures = X.shape
+        nTrees = len(roots)
+        nodes = np.tile(roots, nRows)
+        flatX = X.ravel()
+        flatChildren = self.children.ravel()
+        hasNan = bool(np.isnan(flatX).any())
+
+        # Move the (row, tree) pairs that have not reached a leaf yet one
+        # level down at a time, and drop the ones that reach a leaf.
+        active = np.flatnonzero(self.feature[nodes] >= 0)
+        offsets = active // nTrees * nFeatures
+        while active.size:
+            current = nodes[active]
+            x = flatX[offsets + self.feature[current]]
+            goRight = x > self.threshold32[current]
+            if hasNan:
+                isNan = np.isnan(x)
+                goRight[isNan] = self.missing_left[current[isNan]] == 0
+            nxt = flatChildren[2 * current + goRight]
+            nodes[active] = nxt
+            keep = self.feature[nxt] >= 0
+            active = active[keep]
+            offsets = offsets[keep]
+        return nodes.reshape(nRows, nTrees)
+
+    def predict_proba(self, X):
+        """Class probabilities of the rows of X; shape (n_rows, n_classes)."""
+        X = self._as_matrix(X)
+        proba = np.zeros((X.shape[0], self.n_classes_), dtype=np.float64)
+        step = max(1, _CHUNK_PAIRS // max(1, self.n_estimators))
+        for start in range(0, X.shape[0], step):
+            leaves = self.apply(X[start:start + step])
+            out = proba[start:start + step]
+            # Add up the tree probabilities in the order of the trees, as
+            # scikit-learn does, so that the results are identical.
+            for t in range(self.n_estimators):
+                out += self.value[leaves[:, t]]
+        proba /= self.n_estimators
+        return proba
+
+    def predict_proba_early_exit(self, X, tolerance=0.01, threshold=None,
+                                 block_size=EARLY_EXIT_BLOCK, bound='deterministic',
+                                 z=EARLY_EXIT_Z):
+        """Class probabilities of the rows of X with early exit, and the number
+        of trees evaluated for every row.
+
+        The trees are evaluated in blocks of block_size trees, and the rows
+        that exit get the mean probabilities of the trees evaluated so far;
+        the other rows get the same probabilities as from predict_proba().
+
+        With the deterministic bound, the exits rest on the probabilities of
+        a tree being between 0 and 1: after k of the N trees, with the sum S
+        of the probabilities of a class so far, the probability of the class
+        of the whole forest is between S / N and (S + N - k) / N. Without a
+        threshold, every row exits after the first k trees for which
+        (N - k) / N is at most tolerance, and its probabilities are then
+        within tolerance of the ones of the whole forest. With a threshold, a
+        row of a two-class forest exits after a block when the interval of
+        the second class does not contain the threshold, so that its class at
+        the threshold is the one of the whole forest.
+
+        With the statistical bound, the trees evaluated so far for a row are
+        rather taken as a random sample of the trees of the forest, and the
+        mean of their probabilities as an estimate of the probabilities of the
+        whole forest. A row exits when z standard errors of this estimate,
+        with the finite population correction, are at most tolerance for every
+        class, or, with a threshold, when the estimated probability of the
+        second class is more than z standard errors away from the threshold.
+        This exits much earlier, but guarantees nothing for a single row. The
+        trees of a Random Forest are fitted on independent bootstrap samples,
+        in no particular order; the forests joined from forests that were
+        fitted on different data, such as by incremental refreshes, hold
+        different trees in the beginning and in the end, which biases the
+        estimate of the early blocks.
+        """
+        if bound not in EARLY_EXIT_BOUNDS:
+            raise ValueError('Unknown early-exit bound %r; use one of %s'
+                             % (bound, ', '.join(EARLY_EXIT_BOUNDS)))
+        if threshold is not None and self.n_classes_ != 2:
+            raise ValueError('A threshold needs a forest with two classes, not %d'
+                             % self.n_classes_)
+        X = self._as_matrix(X)
+        nTrees = self.n_estimators
+        # Number of trees after which every row exits
+        nLast = nTrees
+        if bound == 'deterministic' and threshold is None:
+            nLast = nTrees - min(int(tolerance * nTrees), nTrees - 1)
+        proba = np.zeros((X.shape[0], self.n_classes_), dtype=np.float64)
+        used = np.full(X.shape[0], nLast, dtype=np.int64)
+        step = max(1, _CHUNK_PAIRS // max(1, min(block_size, nTrees)))
+        for start in range(0, X.shape[0], step):
+            chunk = X[start:start + step]
+            total = np.zeros((len(chunk), self.n_classes_))
+            squares = np.zeros((len(chunk), self.n_classes_))
+            active = np.arange(len(chunk))
+            for first in range(0, nLast, block_size):
+                last = min(first + block_size, nLast)
+                leaves = self.apply(chunk[active], slice(first, last))
+                blockTotal = total[active]
+                blockSquares = squares[active]
+                for t in range(last - first):
+                    value = self.value[leaves[:, t]]
+                    blockTotal += value
+                    blockSquares += value * value
+                total[active] = blockTotal
+                squares[active] = blockSquares
+                if last == nLast:
+                    break
+                if bound == 'deterministic' and threshold is None:
+                    continue
+                mean = blockTotal / last
+                if bound == 'deterministic':
+                    # The probabilities of the second class of the whole forest
+                    # are between the sums so far and the sums with all the
+                    # remaining trees at 1. The trees are added up in the order
+                    # of predict_proba(), so that its sums are at least the sums
+                    # so far; at the upper end, a margin covers the rounding.
+                    done = ((blockTotal[:, 1] / nTrees > threshold) |
+                            ((blockTotal[:, 1] + (nTrees - last)) / nTrees <
+                             threshold - _EARLY_EXIT_MARGIN))
+                else:
+                    # z standard errors of the mean of the trees evaluated so far.
+                    # The variance counts two more trees with the probabilities 0
+                    # and 1, so that rows where all trees agree so far do not exit
+                    # at once.
+                    smoothed = (blockTotal + 1.0) / (last + 2.0)
+                    variance = np.maximum((blockSquares + 1.0 -
+                                           (last + 2.0) * smoothed * smoothed)
+                                          / (last + 1.0), 0.0)
+                    error = z * np.sqrt(variance * (1.0 - last / float(nTrees)) / last)
+                    if threshold is None:
+                        done = np.all(error <= tolerance, axis=1)
+                    else:
+                        done = np.abs(mean[:, 1] - threshold) > error[:, 1]
+                rows = active[done]
+                proba[start + rows] = mean[done]
+                used[start + rows] = last
+                active = active[~done]
+                if not active.size:
+                    break
+            proba[start + active] = total[active] / nLast
+        return proba, used
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+class EarlyExitStats(object):
+    """Rows scored with early exit, the trees evaluated for them out of the
+    trees of their forests, and the wall-clock seconds of their scoring."""
+
+    def __init__(self):
+        self.rows = 0
+        self.evaluated = 0
+        self.trees = 0
+        self.seconds = 0.0
+
+    def update(self, used, n_trees, seconds=0.0):
+        self.rows += len(used)
+        self.evaluated += int(np.sum(used))
+        self.trees += len(used) * n_trees
+        self.seconds += seconds
+
+    def report(self, stream):
+        if not self.rows:
+            return
+        stream.write('Early exit: %d rows, %.1f of %.1f trees evaluated per row on average '
+                     '(%.2fx fewer tree evaluations), %.3f s scoring\n'
+                     % (self.rows, self.evaluated / float(self.rows), self.trees / float(self.rows),
+                        self.trees / float(max(1, self.evaluated)), self.seconds))
+        stream.flush()
+
+
+class QuickScorerForest(object):
+    """Predictor for an ArrayForest in the style of the QuickScorer algorithm.
+
+    The leaves of every tree are numbered from left to right, and a row starts
+    with a bit vector with the bits of all leaves set, in as many unsigned
+    64-bit words as the leaves of the tree need. Every split node whose test
+    sends the row to the right rules out the leaves of its left subtree, and
+    clears their bits; the leftmost leaf whose bit is left is the leaf of the
+    row. The nodes that send a row with the value x of a feature to the right
+    are the nodes with a threshold below x, so that, with the thresholds of a
+    feature sorted, they are given by the rank of x among them. The trees are
+    split into groups with up to _QUICKSCORER_WORDS words of bit vectors. For
+    every feature and group, a table holds the words of the group after all
+    split nodes up to every rank have cleared their bits, and a row is scored
+    by a lookup of the rank of each of its values, and a bitwise AND of the
+    looked-up table rows. Missing values have a table row of their own. The
+    predictor returns the same probabilities as the ArrayForest.
+
+    The tables take about 8 * _QUICKSCORER_WORDS bytes per leaf; a forest
+    with trees of more than QUICKSCORER_MAX_LEAVES leaves, or with tables of
+    more than QUICKSCORER_MAX_BYTES bytes, raises a ValueError.
+    """
+
+    def __init__(self, forest):
+        roots = forest.roots.astype(np.int64)
+        feature = forest.feature
+        children = forest.children
+        isLeaf = feature < 0
+
+        # Number the leaves of every tree from left to right: the leaves below
+        # a node are the range first to first + nLeaves, found level by level.
+        levels = []
+        frontier = roots
+        while frontier.size:
+            levels.append(frontier)
+            frontier = children[frontier[feature[frontier] >= 0]].ravel()
+        nLeaves = isLeaf.astype(np.int64)
+        for nodes in reversed(levels):
+            split = nodes[feature[nodes] >= 0]
+            nLeaves[split] = nLeaves[children[split, 0]] + nLeaves[children[split, 1]]
+        first = np.zeros(len(feature), dtype=np.int64)
+        for nodes in levels:
+            split = nodes[feature[nodes] >= 0]
+            first[children[split, 0]] = first[split]
+            first[children[split, 1]] = first[split] + nLeaves[children[split, 0]]
+        leaves = nLeaves[roots]
+        if leaves.max() > QUICKSCORER_MAX_LEAVES:
+            raise ValueError('Trees with up to %d leaves are supported, but the forest has a tree '
+                             'with %d leaves' % (QUICKSCORER_MAX_LEAVES, leaves.max()))
+
+        # Group the trees so that the words of the bit vectors of a group add
+        # up to at most _QUICKSCORER_WORDS, and give every tree its columns of
+        # words within its group
+        words = (leaves + 63) // 64
+        self.groups = []
+        column = np.zeros(len(roots), dtype=np.int64)
+        start = 0
+        nWords = 0
+        for t, w in enumerate(words):
+            if nWords + w > _QUICKSCORER_WORDS and t > start:
+                self.groups.append((start, t, nWords))
+                start, nWords = t, 0
+            column[t] = nWords
+            nWords += w
+        self.groups.append((start, len(roots), nWords))
+        tableBytes = 8 * sum((np.sum(leaves[start:stop]) + 2 * forest.n_features_in_) * width
+                             for start, stop, width in self.groups)
+        if tableBytes > QUICKSCORER_MAX_BYTES:
+            raise ValueError('The tables of the forest would take %.0f MB, more than the %.0f MB '
+                             'supported' % (tableBytes / 1e6, QUICKSCORER_MAX_BYTES / 1e6))
+
+        self.forest = forest
+        self.classes_ = forest.classes_
+        self.n_classes_ = forest.n_classes_
+        self.n_features_in_ = forest.n_features_in_
+        self.n_estimators = forest.n_estimators
+        if hasattr(forest, 'feature_names_in_'):
+            self.feature_names_in_ = forest.feature_names_in_
+
+        # Leaf probabilities of every tree in the order of the leaf numbers,
+        # after the leaves of the trees before it
+        self.leaf_offset = _starts(leaves)
+        leafNodes = np.flatnonzero(isLeaf)
+        leafTree = np.searchsorted(roots, leafNodes, side='right') - 1
+        self.leaf_value = np.empty((int(leaves.sum()), forest.n_classes_))
+        self.leaf_value[self.leaf_offset[leafTree] + first[leafNodes]] = forest.value[leafNodes]
+        self.columns = column
+
+        # Words of every split node with the bits of its left subtree cleared:
+        # one entry for every word that holds bits of the left subtree
+        split = np.flatnonzero(~isLeaf)
+        tree = np.searchsorted(roots, split, side='right') - 1
+        left = children[split, 0]
+        lo, hi = first[left], first[left] + nLeaves[left]
+        span = (hi - 1) // 64 - lo // 64 + 1
+        entry = np.repeat(np.arange(len(split)), span)
+        word = np.repeat(lo // 64, span) + np.arange(len(entry)) - np.repeat(_starts(span), span)
+        bitLo = np.maximum(lo[entry], 64 * word) - 64 * word
+        bitHi = np.minimum(hi[entry], 64 * word + 64) - 64 * word
+        width = (bitHi - bitLo).astype(np.uint64)
+        leftBits = np.where(width >= 64, _ALL_LEAVES,
+                            ((np.uint64(1) << width) - np.uint64(1)) << bitLo.astype(np.uint64))
+        entryMask = ~leftBits
+        entryColumn = column[tree[entry]] + word
+
+        # For every feature, the sorted distinct thresholds of all trees, and
+        # for every group of trees, the rank of these thresholds among the
+        # thresholds of the group, and the table of words of the group
+        group = np.zeros(len(roots), dtype=np.int64)
+        for g, (start, stop, width) in enumerate(self.groups):
+            group[start:stop] = g
+        nodeGroup = group[tree]
+        threshold = forest.threshold32[split]
+        entryStart = _starts(span)
+        self.features = []
+        for f in range(forest.n_features_in_):
+            atF = np.flatnonzero(feature[split] == f)
+            if not atF.size:
+                continue
+            thresholds = np.unique(threshold[atF])
+            nRanks = len(thresholds)
+            # Ranks 0 to nRanks count the thresholds below a value; the last
+            # rank stands for a missing value.
+            ranks = np.zeros((nRanks + 2, len(self.groups)), dtype=np.int32)
+            tables = []
+            for g, (start, stop, width) in enumerate(self.groups):
+                nodes = atF[nodeGroup[atF] == g]
+                nodes = nodes[np.argsort(threshold[nodes], kind='stable')]
+                nNodes = len(nodes)
+                entries = (np.repeat(entryStart[nodes] - _starts(span[nodes]), span[nodes]) +
+                           np.arange(int(span[nodes].sum())))
+                table = np.full((nNodes + 2, width), _ALL_LEAVES, dtype=np.uint64)
+                table[np.repeat(np.arange(1, nNodes + 1), span[nodes]),
+                      entryColumn[entries]] = entryMask[entries]
+                table[:nNodes + 1] = np.bitwise_and.accumulate(table[:nNodes + 1], axis=0)
+                goRight = np.repeat(forest.missing_left[split[nodes]] == 0, span[nodes])
+                np.bitwise_and.at(table[nNodes + 1], entryColumn[entries[goRight]],
+                                  entryMask[entries[goRight]])
+                ranks[:nRanks, g] = np.searchsorted(threshold[nodes], thresholds, side='left')
+                ranks[nRanks, g] = nNodes
+                ranks[nRanks + 1, g] = nNodes + 1
+                tables.append(table)
+            self.features.append((f, thresholds, ranks, tables))
+
+    def _predict_rows(self, X, proba):
+        # Add up the leaf probabilities of the rows of X in proba
+        isNan = np.isnan(X)
+        ranks = []
+        for f, thresholds, featureRanks, tables in self.features:
+            rank = np.searchsorted(thresholds, X[:, f], side='left')
+            rank[isNan[:, f]] = len(thresholds) + 1
+            ranks.append(featureRanks[rank])
+        for g, (start, stop, width) in enumerate(self.groups):
+            bits = np.full((len(X), width), _ALL_LEAVES, dtype=np.uint64)
+            looked = np.empty_like(bits)
+            for (f, thresholds, featureRanks, tables), rank in zip(self.features, ranks):
+                np.take(tables[g], rank[:, g], axis=0, out=looked)
+                bits &= looked
+            # The leftmost leaf left is the lowest bit that is set in the first
+            # word of the tree that is not zero
+            columns = self.columns[start:stop]
+            if width == stop - start:
+                word = bits
+                column = columns
+            else:
+                nonzero = np.where(bits != 0, np.arange(width), width)
+                column = np.minimum.reduceat(nonzero, columns, axis=1)
+                word = np.take_along_axis(bits, column, axis=1)
+            signed = word.view(np.int64)
+            lowest = (signed & -signed).view(np.uint64)
+            leaf = (64 * (column - columns) + np.log2(lowest.astype(np.float64)).astype(np.intp) +
+                    self.leaf_offset[start:stop])
+            for t in range(stop - start):
+                proba += self.leaf_value[leaf[:, t]]
+
+    def predict_proba(self, X):
+        """Class probabilities of the rows of X; shape (n_rows, n_classes)."""
+        X = self.forest._as_matrix(X)
+        proba = np.zeros((X.shape[0], self.n_classes_), dtype=np.float64)
+        for start in range(0, X.shape[0], _QUICKSCORER_ROWS):
+            self._predict_rows(X[start:start + _QUICKSCORER_ROWS],
+                               proba[start:start + _QUICKSCORER_ROWS])
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def scoring_engine(model, engine='default', log=None):
+    """Predictor of model for the given scoring engine of ENGINES.
+
+    The default engine is the predictor of the model itself. The quickscorer
+    engine is the QuickScorerForest of the model; a forest with larger trees
+    keeps the array-based predictor, with a note to the stream log.
+    """
+    if engine == 'default':
+        return model
+    if engine != 'quickscorer':
+        raise ValueError('Unknown scoring engine %r; use one of %s' % (engine, ENGINES))
+    forest = model if isinstance(model, ArrayForest) else ArrayForest.from_sklearn(model)
+    try:
+        return QuickScorerForest(forest)
+    except ValueError as exc:
+        if log is not None:
+            log.write('The quickscorer engine falls back to the array-based predictor: %s\n' % exc)
+        return forest
+
+
+def feature_manifest(model, feature_names=None):
+    """Names of the features that the splits of model test, in the order of
+    the model features.
+
+    The probabilities of the model do not depend on the values of the other
+    features, so that the model can be scored on input rows without them.
+    model is an ArrayForest, a QuickScorerForest or a RandomForestClassifier.
+    The feature names are the ones of the model, or feature_names for a model
+    fitted without them.
+    """
+    names = getattr(model, 'feature_names_in_', feature_names)
+    if names is None:
+        raise ValueError('The model has no feature names, and none are given')
+    if isinstance(model, QuickScorerForest):
+        model = model.forest
+    if isinstance(model, ArrayForest):
+        used = model.feature[model.feature >= 0]
+    else:
+        used = np.concatenate([est.tree_.feature[est.tree_.children_left >= 0]
+                               for est in model.estimators_])
+    return [str(names[i]) for i in np.unique(used)]
+
+
+def export_forest(classifier):
+    """Serialize a fitted RandomForestClassifier in the array-based format."""
+    return ArrayForest.from_sklearn(classifier).to_bytes()
+
+
+def loads_model(data):
+    """Load a model from its serialized bytes in either the array-based format
+    or the pickle format. Pickled models need scikit-learn to be installed."""
+    if is_array_forest(data):
+        return ArrayForest.from_bytes(data)
+    return pickle.loads(data)
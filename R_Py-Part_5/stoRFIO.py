@@ -0,0 +1,370 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFIO.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# The present file is a helper module with the input and output routines that
+# are shared by the Python scripts "stoRFScore.py", "stoRFFitMM.py" and
+# "stoRFScoreMM.py" of the present demo Part 5. The module must be installed
+# in the target Vantage Advanced SQL Engine together with these scripts, so
+# that they can import it when they run with the SCRIPT Table Operator.
+#
+# The module offers:
+# - Declarative schemas of the SCRIPT input tables, their projections onto
+#   fewer columns, and a decoder class that turns input rows into typed NumPy
+#   columns
+# - A bulk decoder for columns of Teradata FLOAT text
+# - A buffered writer that sends whole arrays of results to the database
+# - A pipeline that overlaps reading, scoring and writing of row batches
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+#  v.1.3     2026-10-18     Input schemas and the TableDecoder class
+#  v.1.4     2026-10-18     Added the ResultWriter class
+#  v.1.5     2026-10-18     ResultWriter takes Python lists as they are
+#  v.1.6     2026-10-18     Pipelined reading, scoring and writing of batches
+#  v.1.7     2026-10-18     Projected input schemas (project_schema)
+#  v.1.8     2026-10-18     decode_td_float: NumPy bulk conversion; None as NaN
+################################################################################
+
+import io
+import sys
+import time
+import queue
+import itertools
+import threading
+import numpy as np
+import pandas as pd
+
+
+###
+### Input schemas
+###
+
+# Know your data: The SCRIPT input columns and their data types must be known
+# in advance. A schema lists the (name, dtype) pairs of the input columns in
+# the order that the database sends them. The dtype is one of 'int8', 'int16',
+# 'int32', 'int64', 'float64', 'category', or 'skip' for a column that is read
+# past and not decoded.
+
+# Analytic data set ADS_Py, as used in use case 1 with "stoRFScore.py"
+ADS_PY_SCHEMA = [('cust_id', 'int32'), ('tot_income', 'float64'),
+                 ('tot_age', 'int16'), ('tot_cust_years', 'int16'),
+                 ('tot_children', 'int16'), ('female_ind', 'int8'),
+                 ('single_ind', 'int8'), ('married_ind', 'int8'),
+                 ('separated_ind', 'int8'), ('ca_resident_ind', 'int8'),
+                 ('ny_resident_ind', 'int8'), ('tx_resident_ind', 'int8'),
+                 ('il_resident_ind', 'int8'), ('az_resident_ind', 'int8'),
+                 ('oh_resident_ind', 'int8'), ('ck_acct_ind', 'int8'),
+                 ('sv_acct_ind', 'int8'), ('cc_acct_ind', 'int8'),
+                 ('ck_avg_bal', 'float64'), ('sv_avg_bal', 'float64'),
+                 ('cc_avg_bal', 'float64'), ('ck_avg_tran_amt', 'float64'),
+                 ('sv_avg_tran_amt', 'float64'), ('cc_avg_tran_amt', 'float64'),
+                 ('q1_trans_cnt', 'int32'), ('q2_trans_cnt', 'int32'),
+                 ('q3_trans_cnt', 'int32'), ('q4_trans_cnt', 'int32')]
+
+# Training and testing tables MultiModelTrain_Py and MultiModelTest_Py, as used
+# in use case 2 with "stoRFFitMM.py" and "stoRFScoreMM.py"
+MULTIMODEL_SCHEMA = [('cust_id', 'int32'), ('tot_income', 'float64'),
+                     ('tot_age', 'int16'), ('tot_cust_years', 'int16'),
+                     ('tot_children', 'int16'), ('female_ind', 'int8'),
+                     ('single_ind', 'int8'), ('married_ind', 'int8'),
+                     ('separated_ind', 'int8'), ('statecode', 'category'),
+                     ('ck_acct_ind', 'int8'), ('sv_acct_ind', 'int8'),
+                     ('cc_acct_ind', 'int8'), ('ck_avg_bal', 'float64'),
+                     ('sv_avg_bal', 'float64'), ('cc_avg_bal', 'float64'),
+                     ('ck_avg_tran_amt', 'float64'), ('sv_avg_tran_amt', 'float64'),
+                     ('cc_avg_tran_amt', 'float64'), ('q1_trans_cnt', 'int32'),
+                     ('q2_trans_cnt', 'int32'), ('q3_trans_cnt', 'int32'),
+                     ('q4_trans_cnt', 'int32'), ('SAMPLE_ID', 'int8')]
+
+_DTYPES = {'int8': np.int8, 'int16': np.int16, 'int32': np.int32,
+           'int64': np.int64, 'float64': np.float64, 'category': 'category'}
+
+# Narrowest SQL data types that hold the values of the schema data types; the
+# SCRIPT input query casts the columns to these types.
+SQL_TYPES = {'int8': 'BYTEINT', 'int16': 'SMALLINT', 'int32': 'INTEGER',
+             'int64': 'BIGINT', 'float64': 'FLOAT'}
+
+
+def project_schema(schema, names):
+    """Schema of the columns of schema with the given names, in the order of
+    names. A SCRIPT input query that selects only these columns sends fewer
+    bytes to the script, and the decoder parses fewer columns."""
+    dtypes = dict(schema)
+    unknown = [name for name in names if name not in dtypes]
+    if unknown:
+        raise ValueError('Unknown input columns: %s' % ', '.join(unknown))
+    return [(name, dtypes[name]) for name in names]
+
+
+###
+### Input decoding
+###
+
+class TableDecoder(object):
+    """Decode tab-delimited SCRIPT input rows into typed columns.
+
+    Rows are decoded in bulk by the pandas C parser straight into NumPy
+    columns of the schema data types, without an intermediate DataFrame of
+    Python strings. Before parsing, the blanks that the database places in
+    FLOAT values (e.g., 1.000E 000) are removed from the raw input bytes.
+    Empty values become NaN in float64 columns; they are an error in integer
+    columns.
+    """
+
+    def __init__(self, schema, delimiter='\t'):
+        self.schema = list(schema)
+        for name, dtype in self.schema:
+            if dtype != 'skip' and dtype not in _DTYPES:
+                raise ValueError('Unknown data type %r for input column %r' % (dtype, name))
+        self.delimiter = delimiter
+        self.names = [name for name, dtype in self.schema]
+        self.columns = [name for name, dtype in self.schema if dtype != 'skip']
+        self.dtypes = dict((name, _DTYPES[dtype]) for name, dtype in self.schema
+                           if dtype != 'skip')
+        # Without text columns in the input, every "E " is part of a FLOAT.
+        self._hasText = any(dtype in ('category', 'skip') for name, dtype in self.schema)
+
+    def _strip_float_blanks(self, data):
+        if not self._hasText:
+            return data.replace(b'E ', b'E')
+        for digit in b'0123456789':
+            data = data.replace(bytes((digit, 69, 32)), bytes((digit, 69)))
+        return data
+
+    def decode(self, lines):
+        """Decode a list of input lines (bytes or str) into a DataFrame."""
+        if lines and isinstance(lines[0], str):
+            data = ''.join(lines).encode('utf-8')
+        else:
+            data = b''.join(lines)
+        data = self._strip_float_blanks(data)
+        return pd.read_csv(io.BytesIO(data), sep=self.delimiter, header=None,
+                           names=self.names, usecols=self.columns,
+                           dtype=self.dtypes, keep_default_na=False,
+                           na_values=[''], float_precision='round_trip',
+                           engine='c')
+
+    def read(self, stream, nrows=None):
+        """Read and decode up to nrows lines from stream; all lines if nrows
+        is None. Returns None when the stream has no more lines."""
+        stream = getattr(stream, 'buffer', stream)   # Read bytes from sys.stdin
+        lines = list(itertools.islice(stream, nrows))
+        if not lines:
+            return None
+        return self.decode(lines)
+
+
+def decode_td_float(values):
+    """Decode a column of Teradata FLOAT text into a float64 NumPy array.
+
+    The database sends FLOAT values in scientific format with a blank space
+    in place of a positive exponent sign; e.g., 1.0 is sent as 1.000E 000.
+    Rather than cleaning every value on its own, the column is joined into a
+    single string, stripped of its blanks in one pass, and converted in bulk
+    by NumPy. Empty and missing values (NULLs, as '', None or NaN) become NaN.
+    """
+    if len(values) == 0:
+        return np.empty(0, dtype=np.float64)
+    if hasattr(values, 'tolist'):
+        values = values.tolist()   # Iterating a list is faster than a Series
+    try:
+        text = '\n'.join(values)
+    except TypeError:
+        values = ['' if x is None or x != x else str(x) for x in values]
+        text = '\n'.join(values)
+    items = text.replace(' ', '').split('\n')
+    if '' in items:
+        items = [x if x else 'nan' for x in items]
+    return np.array(items, dtype=np.float64)
+
+
+###
+### Output writing
+###
+
+class ResultWriter(object):
+    """Write columns of results to the database in large buffered blocks.
+
+    Each call of write() takes the output columns as arrays of equal length,
+    formats them in bulk and sends them to the stream with one write per
+    block of rows. The rows are formatted exactly as the scripts have always
+    printed them with print(col1, delimiter, col2, ...): the fields are
+    separated by the delimiter with a blank space on each side, integers are
+    printed as integers, and floats in their shortest repr() form. A column
+    is either an array or a Python list.
+    """
+
+    def __init__(self, stream=None, delimiter='\t', block_rows=65536):
+        if stream is None:
+            stream = sys.stdout
+        self.stream = getattr(stream, 'buffer', stream)   # Write bytes to sys.stdout
+        self.separator = ' ' + delimiter + ' '
+        self.block_rows = block_rows
+
+    def write(self, *columns):
+        nrows = len(columns[0])
+        for start in range(0, nrows, self.block_rows):
+            stop = min(start + self.block_rows, nrows)
+            # tolist() turns the values into Python numbers at C speed, and
+            # str() then formats them as print() does. Python lists, e.g. of
+            # long texts, are taken as they are.
+            fields = [list(map(str, col[start:stop] if isinstance(col, list)
+                               else np.asarray(col[start:stop]).tolist()))
+                      for col in columns]
+            block = '\n'.join(map(self.separator.join, zip(*fields))) + '\n'
+            self.stream.write(block.encode('utf-8'))
+
+    def flush(self):
+        self.stream.flush()
+
+
+###
+### Pipelined execution
+###
+
+# Marks the end of the batches in the pipeline queues
+_END = object()
+
+
+class PipelineStats(object):
+    """Time in seconds that every pipeline stage spends working, waiting for
+    its input (starved), and waiting for room in the queue to the next stage
+    (blocked)."""
+
+    STAGES = ('read', 'process', 'write')
+
+    def __init__(self):
+        self.batches = 0
+        self.busy = dict((stage, 0.0) for stage in self.STAGES)
+        self.starved = dict((stage, 0.0) for stage in self.STAGES)
+        self.blocked = dict((stage, 0.0) for stage in self.STAGES)
+
+    def report(self, stream=None):
+        stream = stream or sys.stderr
+        stream.write('Pipeline of %d batches; time [s] per stage:\n' % self.batches)
+        stream.write('  stage        busy   starved   blocked\n')
+        for stage in self.STAGES:
+            stream.write('  %-7s %9.3f %9.3f %9.3f\n' % (stage, self.busy[stage],
+                                                      self.starved[stage],
+                                                      self.blocked[stage]))
+        stream.flush()
+
+
+def run_pipeline(read, process, write, depth=2, stats=None):
+    """Run read, process and write on a stream of batches as a pipeline.
+
+    read() returns the next batch, or None at the end of the input; a reader
+    thread calls it. process(batch) returns the result of a batch; the
+    calling thread calls it. write(result) outputs a result; a writer thread
+    calls it. The stages are connected by queues of at most depth batches,
+    so that no more than about 2 * depth + 3 batches are in memory at a time.
+    The results are written in the order of the batches. While one stage
+    waits for input or output, or runs code that releases the GIL (NumPy,
+    scikit-learn, I/O), the other stages keep working. An exception in any
+    stage stops the pipeline and is raised again in the calling thread.
+    Returns a PipelineStats object with the time spent in every stage.
+    """
+    stats = stats or PipelineStats()
+    inQueue = queue.Queue(depth)
+    outQueue = queue.Queue(depth)
+    stop = threading.Event()
+    errors = []
+
+    def put(q, item, stage):
+        # Put item on q, unless the pipeline stops meanwhile
+        start = time.perf_counter()
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        stats.blocked[stage] += time.perf_counter() - start
+
+    def get(q, stage):
+        start = time.perf_counter()
+        while True:
+            try:
+                item = q.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if stop.is_set():
+                    item = _END
+                    break
+        stats.starved[stage] += time.perf_counter() - start
+        return item
+
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        stats.busy[stage] += time.perf_counter() - start
+        return result
+
+    def reader():
+        try:
+            while not stop.is_set():
+                batch = timed('read', read)
+                if batch is None:
+                    break
+                put(inQueue, batch, 'read')
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(inQueue, _END, 'read')
+
+    def writer():
+        try:
+            while True:
+                result = get(outQueue, 'write')
+                if result is _END:
+                    break
+                timed('write', write, result)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    threads = [threading.Thread(target=reader, name='pipeline-read'),
+               threading.Thread(target=writer, name='pipeline-write')]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    try:
+        while True:
+            batch = get(inQueue, 'process')
+            if batch is _END:
+                break
+            result = timed('process', process, batch)
+            del batch
+            stats.batches += 1
+            put(outQueue, result, 'process')
+            del result
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        put(outQueue, _END, 'process')
+        threads[1].join()
+    if errors:
+        # The reader may be blocked on its input; being a daemon thread, it
+        # does not keep the process from exiting.
+        raise errors[0]
+    threads[0].join()
+    return stats
@@ -0,0 +1,131 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFMerge.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# This TechBytes demo utilizes a use case to predict the propensity of a
+# financial services customer base to open a credit card account.
+#
+# The present file is the Python model merging script to be used with the
+# SCRIPT table operator, as described in the following use case 2 of the
+# present demo Part 5:
+#
+# 2) Fitting and scoring multiple models
+#
+#    We utilize the statecode variable as a partition to built a Random
+#    Forest model for every state. The partitions of the state codes differ
+#    widely in size; the partition of the "Other" state codes holds most of
+#    the data. To balance the fitting work across the AMPs, the fitting script
+#    "stoRFFitMM.py" can fit the model of a large state code partition as
+#    several sub-forests, one for each hash sub-partition of the state code,
+#    on different AMPs.
+#    The present script runs with a PARTITION BY statecode in the query, and
+#    joins the trees of the sub-forests of every state code into one Random
+#    Forest model. The models are stored in the same format as the models
+#    that "stoRFFitMM.py" fits without sub-partitions, so that the scoring
+#    script "stoRFScoreMM.py" scores them unchanged.
+#
+#    The script also joins the partial forests that the training script
+#    "stoRFTrain.py" fits on the hash slices of the ADS_Py table in use case 1,
+#    when these carry a model name in place of the state code.
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+#  v.1.3     2026-10-18     Joins the partial forests of stoRFTrain.py as well
+################################################################################
+
+import sys
+import argparse
+import pickle
+from stoRFIO import ResultWriter
+from stoRFForest import ArrayForest, loads_model
+from stoRFModel import decode_transport, encode_transport, COMPRESSIONS, DEFAULT_CHUNK_SIZE
+from stoRFFit import merge_forests
+
+###
+### Script arguments
+###
+
+# The joined model is compressed and sent in chunks of rows like the models of
+# "stoRFFitMM.py", and the options "--compression" and "--chunk-size" in the
+# SCRIPT_COMMAND clause of the SCRIPT query work as they do there. The joined
+# model is in the same serialization format as the sub-forests.
+parser = argparse.ArgumentParser(description='Join the sub-forests of every state code into one model.')
+parser.add_argument('--compression', choices=COMPRESSIONS, default='zlib',
+                    help='compression of the serialized models')
+parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                    help='maximum number of characters of a model chunk in an output row')
+args = parser.parse_args()
+
+###
+### Read input
+###
+
+# Know your data: You must know in advance the number and data types of the
+# incoming columns from the database!
+# Every input row carries the state code, the sub-partition number, the chunk
+# number, and a chunk of the transported sub-forest, as stored by
+# "stoRFFitMM.py --sub-forests".
+
+delimiter = '\t'
+inputLines = sys.stdin.buffer.readlines()
+
+###
+### If no data received, gracefully exit rather than producing an error later.
+###
+
+if not inputLines:
+    sys.exit()
+
+subForestChunks = {}
+for line in inputLines:
+    stateCode, subpartId, chunkId, chunk = line.decode('utf-8').rstrip('\r\n').split(delimiter)
+    subForestChunks.setdefault(int(subpartId), []).append((int(chunkId), chunk))
+del inputLines
+stateCode = stateCode.strip()
+
+###
+### Join the sub-forests
+###
+
+# The joined forest averages the class probabilities of the trees of all
+# sub-forests. The sub-forests are joined in the order of their sub-partition
+# numbers, so that the joined model does not depend on the input row order.
+subForests = [loads_model(decode_transport(subForestChunks.pop(subpartId)))
+              for subpartId in sorted(subForestChunks)]
+classifier = merge_forests(subForests)
+del subForests
+
+# Serialize the model for export
+if isinstance(classifier, ArrayForest):
+    modelSer = classifier.to_bytes()
+else:
+    modelSer = pickle.dumps(classifier)
+modelChunks = encode_transport(modelSer, args.compression, args.chunk_size)
+
+###
+### Send the state code and joined model as output from the present AMP.
+###
+
+# Export results to Advanced SQL Engine through standard output in expected
+# format: one row per model chunk with the state code, the chunk number 1, 2,
+# ..., and the chunk text, as "stoRFFitMM.py" does.
+nChunks = len(modelChunks)
+writer = ResultWriter(sys.stdout, delimiter)
+writer.write([stateCode] * nChunks, list(range(1, nChunks + 1)), modelChunks)
+writer.flush()
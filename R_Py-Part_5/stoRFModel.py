@@ -0,0 +1,693 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFModel.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# The present file is a helper module with the model loading routines of the
+# Python scoring scripts of the present demo Part 5. The module must be
+# installed in the target Vantage Advanced SQL Engine together with the
+# scripts.
+#
+# A SCRIPT query starts a new Python process on every AMP, and each of them
+# would otherwise decode the same installed model file from scratch. The
+# ModelCache class keeps decoded models in a node-local cache directory, so
+# that later processes and queries load them in their fast-loading form.
+# Only models in the array-based format are cached, which load without
+# unpickling, and only in a directory that belongs to the user that runs the
+# scripts, so that no other user of the node can plant cache entries.
+#
+# Models in the array-based format are memory-mapped read-only from the cache
+# files rather than read into private memory. The operating system then holds
+# a single copy of every model in its page cache, which all scoring processes
+# on the node share, no matter how many AMPs the node runs.
+#
+# In use case 2, the fitted models travel through a database table from the
+# fitting script to the scoring script. The transport format compresses the
+# models, and splits them into chunks that are stored in separate rows, so
+# that models of any size fit into CLOB columns. Alternatively, the models can
+# be installed as files in the database, one per state code, and looked up by
+# the scoring script in a ModelDirectory.
+#
+# Most input rows of a nightly scoring run are the same as the night before.
+# The ScoreCache class keeps the probabilities of the rows that a model has
+# scored in node-local files, keyed by a hash of the predictor values of the
+# rows, so that the scoring scripts only score the rows that have changed.
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+#  v.1.3     2026-10-18     Memory-mapped models shared by the processes on a node
+#  v.1.4     2026-10-18     Compressed, chunked model transport through tables
+#  v.1.5     2026-10-18     Model directories with one installed model file per key
+#  v.1.6     2026-10-18     Input rows with an optional model (split_model_rows)
+#  v.1.7     2026-10-18     Node-local cache of the scores of unchanged rows (ScoreCache)
+#  v.1.8     2026-10-18     Per-user cache directories; no pickled models in the model cache
+#  v.1.9     2026-10-18     Score cache: checked keys; lookup time and time saved apart
+################################################################################
+
+import base64
+import hashlib
+import lzma
+import mmap
+import os
+import stat
+import tempfile
+import time
+import zlib
+import numpy as np
+
+from stoRFForest import ArrayForest, is_array_forest, loads_model
+
+# Suffix of the default cache directories, which are private to every user
+_USER = '-%d' % os.getuid() if hasattr(os, 'getuid') else ''
+
+# Default location and size bound of the node-local model cache
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'stoRFModelCache' + _USER)
+DEFAULT_CACHE_MB = 256
+
+# Default location and size bound of the node-local score cache
+DEFAULT_SCORE_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'stoRFScoreCache' + _USER)
+DEFAULT_SCORE_CACHE_MB = 1024
+
+# Score cache: the number of segments of a model beyond which a process merges
+# them into one when it saves, the age in hours after which unused segments of
+# other models are dropped, and the number of rows that a process scores to
+# time the model when no scoring time is known
+SCORE_CACHE_MAX_SEGMENTS = 8
+SCORE_CACHE_STALE_HOURS = 12
+SCORE_CACHE_PROBE_ROWS = 256
+
+# Model transport: every transported model is a text of the form
+#   <TRANSPORT_TAG>:<compression>:<model size in bytes>:<base64 of compressed model>
+# that is split into chunks of at most DEFAULT_CHUNK_SIZE characters.
+# Default file name pattern of the models in a model directory; {} stands for
+# the model key, such as the state code.
+DEFAULT_MODEL_PATTERN = 'RFmodel_{}.out'
+
+TRANSPORT_TAG = 'rfmt1'
+DEFAULT_CHUNK_SIZE = 1000000
+_COMPRESSORS = {'none': (lambda data: data, lambda data: data),
+                'zlib': (zlib.compress, zlib.decompress),
+                'lzma': (lzma.compress, lzma.decompress)}
+COMPRESSIONS = sorted(_COMPRESSORS)
+
+
+def read_model_file(path):
+    """Read an installed model file and return the serialized model bytes.
+
+    The file holds the model base64-encoded, either pickled or in the
+    array-based format of stoRFForest.py. A file with the raw bytes of the
+    array-based format is accepted as well.
+    """
+    with open(path, 'rb') as fIn:   # 'rb' for reading binary file
+        data = fIn.read()
+    if is_array_forest(data):
+        return data
+    return base64.b64decode(data)
+
+
+def map_model_file(path):
+    """Memory-map a file with the raw bytes of a model in the array-based
+    format, and load the model from the mapping. The model arrays are views
+    into the read-only mapping, which all processes that map the same file
+    share."""
+    with open(path, 'rb') as fIn:
+        mapping = mmap.mmap(fIn.fileno(), 0, access=mmap.ACCESS_READ)
+    if not is_array_forest(mapping):
+        mapping.close()
+        raise ValueError('File %s does not hold a model in the array-based format' % path)
+    return ArrayForest.from_bytes(mapping)
+
+
+def _fast_form(modelBytes, model):
+    # Serialized bytes of the model in the array-based format, for the cache.
+    # Pickled Random Forests are converted; for other pickled models, which
+    # are not cached, None is returned.
+    if is_array_forest(modelBytes):
+        return modelBytes
+    try:
+        return ArrayForest.from_sklearn(model).to_bytes()
+    except (AttributeError, ValueError):
+        return None
+
+
+def _private_directory(directory, create=False):
+    """Raise an OSError unless directory is a directory of the present user
+    that no other user can write to. With create, a missing directory is
+    created first, accessible by the present user only."""
+    if create:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode):
+        raise OSError('Cache path %s is not a directory' % directory)
+    if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+        raise OSError('Cache directory %s belongs to another user' % directory)
+    if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise OSError('Cache directory %s is writable by other users' % directory)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+###
+### Model transport through tables
+###
+
+def encode_transport(modelBytes, compression='zlib', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Encode serialized model bytes for transport through a table.
+
+    Returns the list of text chunks, in the order of their chunk numbers
+    1, 2, ..., to be stored in one row each.
+    """
+    if compression not in _COMPRESSORS:
+        raise ValueError('Unknown compression %r; use one of %s' % (compression, COMPRESSIONS))
+    payload = base64.b64encode(_COMPRESSORS[compression][0](modelBytes)).decode('ascii')
+    text = '%s:%s:%d:%s' % (TRANSPORT_TAG, compression, len(modelBytes), payload)
+    return [text[start:start + chunk_size] for start in range(0, len(text), chunk_size)]
+
+
+def decode_transport(chunks):
+    """Decode the serialized model bytes from the (chunk number, text) pairs
+    of a transported model, given in any order."""
+    chunks = sorted(chunks)
+    numbers = [number for number, text in chunks]
+    if numbers != list(range(1, len(chunks) + 1)):
+        raise ValueError('Model transport chunks are incomplete: got chunk numbers %s' % numbers)
+    # Strip the blanks that the scripts print around the output values
+    text = ''.join(text.strip() for number, text in chunks)
+    fields = text.split(':', 3)
+    if len(fields) != 4 or fields[0] != TRANSPORT_TAG or fields[1] not in _COMPRESSORS:
+        raise ValueError('Data do not hold a model in the %s transport format' % TRANSPORT_TAG)
+    modelBytes = _COMPRESSORS[fields[1]][1](base64.b64decode(fields[3]))
+    if len(modelBytes) != int(fields[2]):
+        raise ValueError('Transported model has %d bytes rather than %s'
+                         % (len(modelBytes), fields[2]))
+    return modelBytes
+
+
+def split_model_rows(lines, delimiter='\t', required=True):
+    """Separate the model from the data rows in SCRIPT input lines (bytes).
+
+    The last two columns of every line are a chunk number and a model chunk.
+    Model rows carry a chunk of the transported model there, and data rows
+    carry empty values (NULLs). Model texts in the earlier format, the repr
+    of base64 bytes (b'...') in one column without chunk number, are read as
+    well; every line that carries such a model is also a data row.
+    Returns the serialized model bytes and the data lines, the latter with
+    their model column emptied. When the lines carry no model, a ValueError is
+    raised, or None is returned for the model if it is not required.
+    """
+    sep = delimiter.encode('utf-8')
+    chunks = []
+    legacyModel = None
+    dataLines = []
+    for line in lines:
+        line = line.rstrip(b'\r\n')
+        cut = line.rfind(sep)
+        if cut == len(line) - len(sep):
+            dataLines.append(line + b'\n')
+            continue
+        text = line[cut + len(sep):].decode('ascii').strip()
+        if text.startswith("b'"):
+            if legacyModel is None:
+                legacyModel = text
+            dataLines.append(line[:cut + len(sep)] + b'\n')
+        else:
+            number = line[line.rfind(sep, 0, cut) + len(sep):cut]
+            chunks.append((int(number), text))
+    if legacyModel is not None:
+        return base64.b64decode(legacyModel.partition("'")[2]), dataLines
+    if not chunks:
+        if not required:
+            return None, dataLines
+        raise ValueError('The input rows carry no model')
+    return decode_transport(chunks), dataLines
+
+
+###
+### Decoded-model cache
+###
+
+class ModelCache(object):
+    """Node-local cache of decoded models, keyed by model file content.
+
+    Models are cached in the array-based format only, which loads without
+    unpickling; pickled Random Forests are converted to it, and any other
+    pickled model is decoded from its model file every time. The cache
+    directory must belong to the present user and must not be writable by
+    other users; the default directory is created accessible by the present
+    user only. Otherwise, the cache is not used.
+
+    An entry is named <source>-<digest>.rfa, where source identifies the
+    model file path and digest is the hash of the file content. When the
+    content of a model file changes, its new entry replaces the stale ones
+    of the same source. Entries are written to a temporary file first and
+    then renamed, so that concurrent processes on the node never read a
+    partial entry. The total size of the cache is bounded by max_bytes; the
+    least recently used entries are evicted first. Every entry that is read
+    has its modification time renewed to track its last use. With use_mmap,
+    entries in the array-based format are memory-mapped rather than read.
+
+    Cache problems (e.g., a read-only or full file system) never fail the
+    caller: the model is then decoded from the model file as usual.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_CACHE_MB << 20, use_mmap=True):
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.use_mmap = use_mmap
+        self.hits = 0
+        self.misses = 0
+
+    def _entries(self):
+        # (path, size, mtime) of the cache entries, least recently used first
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.rfa'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue   # Removed by another process meanwhile
+            entries.append((path, st.st_size, st.st_mtime))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def _store(self, source, digest, data):
+        if len(data) > self.max_bytes:
+            return
+        _private_directory(self.directory, create=True)
+        fd, tmpPath = tempfile.mkstemp(prefix='.tmp-', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as fOut:
+                fOut.write(data)
+            # An entry that other processes have mapped stays valid for them
+            # when it is replaced or removed.
+            os.replace(tmpPath, os.path.join(self.directory, source + '-' + digest + '.rfa'))
+        except BaseException:
+            _remove(tmpPath)
+            raise
+
+        # Drop the stale entries of the same model file, and then the least
+        # recently used entries until the cache fits in its size bound.
+        entries = self._entries()
+        current = source + '-' + digest
+        total = 0
+        for path, size, mtime in entries:
+            name = os.path.basename(path)
+            if name.startswith(source + '-') and not name.startswith(current):
+                _remove(path)
+            else:
+                total += size
+        for path, size, mtime in entries:
+            if total <= self.max_bytes:
+                break
+            if os.path.basename(path).startswith(current) or not os.path.exists(path):
+                continue
+            _remove(path)
+            total -= size
+
+    def load(self, path):
+        """Load the model from the model file in path through the cache."""
+        with open(path, 'rb') as fIn:   # 'rb' for reading binary file
+            content = fIn.read()
+        # The path as given, since the SCRIPT processes of different AMPs run
+        # in different working directories.
+        source = hashlib.sha1(os.path.normpath(path).encode('utf-8')).hexdigest()[:16]
+        digest = hashlib.sha1(content).hexdigest()
+
+        entry = os.path.join(self.directory, source + '-' + digest + '.rfa')
+        try:
+            _private_directory(self.directory)
+            if self.use_mmap:
+                model = map_model_file(entry)
+            else:
+                with open(entry, 'rb') as fIn:
+                    data = fIn.read()
+                if not is_array_forest(data):
+                    raise ValueError('Cache entry %s is not in the array-based format' % entry)
+                model = ArrayForest.from_bytes(data)
+            os.utime(entry)
+            self.hits += 1
+            return model
+        except (OSError, ValueError):
+            pass
+
+        self.misses += 1
+        modelBytes = content if is_array_forest(content) else base64.b64decode(content)
+        del content
+        model = loads_model(modelBytes)
+        data = _fast_form(modelBytes, model)
+        if data is None:
+            return model
+        try:
+            self._store(source, digest, data)
+            if self.use_mmap:
+                return map_model_file(entry)
+        except (OSError, ValueError):
+            pass
+        # Return the same form of the model as later cache hits will
+        return ArrayForest.from_bytes(data)
+
+
+###
+### Score cache
+###
+
+# Seeds, multipliers, shifts and final mixing constants of the two hashes of
+# row_keys(); the final mixing is the one of MurmurHash3 and of splitmix64.
+_ROW_HASHES = [(0x9E3779B97F4A7C15, 29, (33, 0xFF51AFD7ED558CCD, 33, 0xC4CEB9FE1A85EC53, 33)),
+               (0xC2B2AE3D27D4EB4F, 31, (30, 0xBF58476D1CE4E5B9, 27, 0x94D049BB133111EB, 31))]
+
+
+def file_digest(path):
+    """Hash of the content of a file, such as an installed model file."""
+    with open(path, 'rb') as fIn:
+        return hashlib.sha1(fIn.read()).hexdigest()[:16]
+
+
+def row_keys(X):
+    """Two independent 64-bit hashes of the values of every row of the
+    predictor matrix X: the keys of the rows, and the checks of the keys.
+
+    The values are hashed in single precision, in which the predictors
+    compare them, so that rows with the same key and check get the same
+    probabilities. Negative zeros and NaNs are normalized first.
+    """
+    X = np.array(X, dtype=np.float32) + np.float32(0.0)   # -0.0 becomes 0.0
+    X[np.isnan(X)] = np.nan
+    words = np.ascontiguousarray(X).view(np.uint32).astype(np.uint64)
+    hashes = []
+    with np.errstate(over='ignore'):
+        for seed, shift, (s1, m1, s2, m2, s3) in _ROW_HASHES:
+            mix = np.uint64(seed)
+            keys = np.full(len(words), mix, dtype=np.uint64)
+            for j in range(words.shape[1]):
+                keys = (keys ^ words[:, j]) * mix
+                keys ^= keys >> np.uint64(shift)
+            # Final mixing of the bits
+            keys ^= keys >> np.uint64(s1)
+            keys *= np.uint64(m1)
+            keys ^= keys >> np.uint64(s2)
+            keys *= np.uint64(m2)
+            keys ^= keys >> np.uint64(s3)
+            hashes.append(keys)
+    return hashes[0], hashes[1]
+
+
+class ScoreCache(object):
+    """Node-local cache of the probabilities of scored rows for a model.
+
+    The cache is keyed by the digest of the model file, and by row_keys() of
+    the predictor values of the rows; a row is only found in the cache if
+    the check of its key matches as well. Every scoring process reads the cache
+    segments of the model when it starts, and looks up the rows of every
+    batch in them, largest segment first; only the rows that are not found
+    are scored. At the end, the process writes a new segment with the keys
+    and probabilities of the rows that it has scored. When the model has more
+    than SCORE_CACHE_MAX_SEGMENTS segments then, the process merges them into
+    one, so that a lookup searches a bounded number of segments; a lock file
+    keeps other processes from merging them at the same time. A segment is a
+    NumPy file of records sorted by key, which is memory-mapped read-only,
+    and which is written to a temporary file first and then renamed.
+
+    Every process marks the segments of its model as used when it starts.
+    Segments of other models that have not been used for the last
+    SCORE_CACHE_STALE_HOURS hours, such as the ones of a model that has been
+    re-installed, are dropped when a process saves. The total size of the
+    cache is bounded by max_bytes; the least recently used segments are
+    evicted first. Like the model cache, the score cache is only used in a
+    directory of the present user that other users cannot write to.
+
+    Two rows with the same key but different checks do not share their
+    probabilities; the chance that two different rows share both the key and
+    the check is negligible, at 2^-128 per pair of rows. Cache problems (e.g., a read-only or
+    full file system) never fail the caller: the rows are then scored anew.
+    """
+
+    def __init__(self, digest, n_classes, directory=None,
+                 max_bytes=DEFAULT_SCORE_CACHE_MB << 20):
+        self.digest = digest
+        self.directory = directory or DEFAULT_SCORE_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype([('key', '<u8'), ('check', '<u8'),
+                               ('proba', '<f8', (n_classes,))])
+        self.rows = 0
+        self.hits = 0
+        self.lookup_seconds = 0.0
+        self.score_seconds = 0.0
+        self._scored = []
+        self._segments = []
+        try:
+            _private_directory(self.directory)
+            entries = self._entries()
+        except OSError:
+            entries = []
+        for path, size, mtime in sorted(entries, key=lambda entry: -entry[1]):
+            if not os.path.basename(path).startswith(digest + '-'):
+                continue
+            try:
+                segment = np.load(path, mmap_mode='r')
+            except (OSError, ValueError):
+                continue   # Removed by another process meanwhile
+            if segment.dtype == self.dtype:
+                self._segments.append(segment)
+                try:
+                    os.utime(path)   # Mark the segment as used
+                except OSError:
+                    pass
+        # Scoring time per row of the last run that scored rows, for the
+        # estimate of the time saved
+        self._row_seconds = None
+        if entries:
+            try:
+                self._row_seconds = float(np.load(self._path('.rate-%s.npy' % digest)))
+            except (OSError, ValueError):
+                pass
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _entries(self):
+        # (path, size, mtime) of the cache segments, least recently used first
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith('.npy') or name.startswith('.'):
+                continue
+            path = self._path(name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, st.st_size, st.st_mtime))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def predict_proba(self, predictor, X):
+        """Probabilities of predictor.predict_proba(X), with the rows found
+        in the cache looked up rather than scored."""
+        start = time.perf_counter()
+        keys, checks = row_keys(X)
+        proba = np.empty((len(keys), self.dtype['proba'].shape[0]), dtype=np.float64)
+        missing = np.arange(len(keys))
+        for segment in self._segments:
+            if not missing.size:
+                break
+            where = np.searchsorted(segment['key'], keys[missing])
+            where[where == len(segment)] = 0
+            found = ((segment['key'][where] == keys[missing]) &
+                     (segment['check'][where] == checks[missing]))
+            proba[missing[found]] = segment['proba'][where[found]]
+            missing = missing[~found]
+        self.lookup_seconds += time.perf_counter() - start
+
+        if missing.size:
+            start = time.perf_counter()
+            XMissing = X.iloc[missing] if hasattr(X, 'iloc') else X[missing]
+            proba[missing] = predictor.predict_proba(XMissing)
+            self.score_seconds += time.perf_counter() - start
+            scored = np.empty(missing.size, dtype=self.dtype)
+            scored['key'] = keys[missing]
+            scored['check'] = checks[missing]
+            scored['proba'] = proba[missing]
+            self._scored.append(scored)
+        elif self._row_seconds is None and self.rows == self.hits and len(keys):
+            # Nothing scored so far, and no scoring time of the last run: time
+            # the model on a few rows for the estimate of the time saved
+            nProbe = min(len(keys), SCORE_CACHE_PROBE_ROWS)
+            start = time.perf_counter()
+            predictor.predict_proba(X.iloc[:nProbe] if hasattr(X, 'iloc') else X[:nProbe])
+            self._row_seconds = (time.perf_counter() - start) / nProbe
+        self.rows += len(keys)
+        self.hits += len(keys) - missing.size
+        return proba
+
+    def _write(self, name, array):
+        # Write the array into the named cache file through a temporary file
+        fd, tmpPath = tempfile.mkstemp(prefix='.tmp-', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as fOut:
+                np.save(fOut, array)
+            os.replace(tmpPath, self._path(name))
+        except BaseException:
+            _remove(tmpPath)
+            raise
+
+    def _segment_name(self):
+        return '%s-%d-%d.npy' % (self.digest, time.time() * 1e6, os.getpid())
+
+    def save(self):
+        """Write the rows scored by the process as a new cache segment, merge
+        the segments of the model if there are too many, and drop the
+        segments of other models that are stale or beyond the size bound."""
+        if not self._scored:
+            return
+        scored = np.concatenate(self._scored)
+        self._scored = []
+        scored = scored[np.unique(scored['key'], return_index=True)[1]]
+        if scored.nbytes > self.max_bytes:
+            return
+        try:
+            _private_directory(self.directory, create=True)
+            self._write(self._segment_name(), scored)
+            self._write('.rate-%s.npy' % self.digest,
+                        np.float64(self.score_seconds / (self.rows - self.hits)))
+
+            stale = time.time() - SCORE_CACHE_STALE_HOURS * 3600.0
+            own = []
+            for path, size, mtime in self._entries():
+                digest = os.path.basename(path).split('-', 1)[0]
+                if digest == self.digest:
+                    own.append((path, size, mtime))
+                elif mtime < stale:
+                    _remove(path)
+                    _remove(self._path('.rate-%s.npy' % digest))
+            if len(own) > SCORE_CACHE_MAX_SEGMENTS:
+                self._merge(own)
+
+            entries = self._entries()
+            total = sum(size for path, size, mtime in entries)
+            for path, size, mtime in entries[:-1]:
+                if total <= self.max_bytes:
+                    break
+                _remove(path)
+                total -= size
+        except OSError:
+            pass
+
+    def _merge(self, own):
+        # Merge the given segments of the model into one, with every key once,
+        # unless another process holds the lock of the model; a lock older than
+        # an hour was left behind by a failed process
+        lockPath = self._path('.lock-%s' % self.digest)
+        try:
+            os.close(os.open(lockPath, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+        except OSError:
+            try:
+                if time.time() - os.stat(lockPath).st_mtime > 3600.0:
+                    _remove(lockPath)
+            except OSError:
+                pass
+            return
+        try:
+            segments = []
+            for path, size, mtime in own:
+                try:
+                    segment = np.load(path, mmap_mode='r')
+                except (OSError, ValueError):
+                    continue
+                if segment.dtype == self.dtype:
+                    segments.append(segment)
+            merged = np.concatenate(segments)
+            merged = merged[np.unique(merged['key'], return_index=True)[1]]
+            if merged.nbytes <= self.max_bytes:
+                self._write(self._segment_name(), merged)
+                for path, size, mtime in own:
+                    _remove(path)
+        finally:
+            _remove(lockPath)
+
+    def report(self, stream, label=''):
+        """Write the hit rate, the lookup time and the estimated scoring time
+        that the hits saved to stream.
+
+        The scoring time per row is the one of the rows that the process has
+        scored; with all rows found in the cache, the one of the last run that
+        scored rows, or else the time of a few rows scored for the estimate.
+        When the lookups took longer than the scoring time they saved, the
+        report says so.
+        """
+        if not self.rows:
+            return
+        misses = self.rows - self.hits
+        rowSeconds = self.score_seconds / misses if misses else self._row_seconds
+        line = ('Score cache%s: %d rows, %d hits (%.1f%%), %.3f s lookup, %.3f s scoring'
+                % (label, self.rows, self.hits, 100.0 * self.hits / self.rows,
+                   self.lookup_seconds, self.score_seconds))
+        if rowSeconds is not None:
+            saved = self.hits * rowSeconds
+            line += ', about %.3f s scoring saved' % saved
+            if saved < self.lookup_seconds:
+                line += '; the lookups took longer than they saved'
+        stream.write(line + '\n')
+        stream.flush()
+
+
+###
+### Model directories
+###
+
+class ModelDirectory(object):
+    """Models installed as files in a directory, one file per model key.
+
+    The file of the model with the key k is named pattern.format(k), and
+    holds the model like the model file of use case 1. Every model is loaded
+    once, through the node-local cache if one is given, and is then kept in
+    the process for all further lookups. Keys without model file have the
+    model None.
+    """
+
+    def __init__(self, directory, pattern=DEFAULT_MODEL_PATTERN, cache=None):
+        self.directory = directory
+        self.pattern = pattern
+        self.cache = cache
+        self._models = {}
+
+    def path(self, key):
+        return os.path.join(self.directory, self.pattern.format(key))
+
+    def get(self, key):
+        """The model with the given key, or None if it is not installed."""
+        if key not in self._models:
+            path = self.path(key)
+            if not os.path.exists(path):
+                model = None
+            elif self.cache is not None:
+                model = self.cache.load(path)
+            else:
+                model = loads_model(read_model_file(path))
+            self._models[key] = model
+        return self._models[key]
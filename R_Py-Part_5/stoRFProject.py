@@ -0,0 +1,124 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFProject.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# The present file is a client tool that generates the SCRIPT query of use
+# case 1 of the present demo Part 5 with an input query that sends only the
+# columns that the model uses to the scoring script "stoRFScore.py".
+#
+# The scoring query of use case 1 sends all 28 columns of ADS_Py to the
+# scoring script with SELECT *, but the script only needs cust_id, the label
+# cc_acct_ind, and the predictor columns that the splits of the model test.
+# These are listed by the feature manifest of the model, which the helper
+# module "stoRFForest.py" reads off the trees of a model in either model file
+# format. The generated input query selects these columns only, and casts the
+# integer columns, such as the indicator columns, to the narrowest integer
+# types, so that every value is sent as a plain integer. The SCRIPT_COMMAND
+# clause passes the selected predictor columns to the scoring script with the
+# option "--columns", so that the script reads the same layout.
+#
+# Usage: python3 stoRFProject.py <model file> [options]
+# The query is written to stdout, or to the file of the option "--output".
+# Run the tool with the option "--help" for the other options.
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+################################################################################
+
+import argparse
+import os
+import sys
+
+from stoRFIO import ADS_PY_SCHEMA, SQL_TYPES, project_schema
+from stoRFForest import feature_manifest, loads_model
+from stoRFModel import read_model_file
+
+PREDICTOR_COLUMNS = ["tot_income", "tot_age", "tot_cust_years", "tot_children",
+                     "female_ind", "single_ind", "married_ind", "separated_ind",
+                     "ck_acct_ind", "sv_acct_ind", "ck_avg_bal", "sv_avg_bal",
+                     "ck_avg_tran_amt", "sv_avg_tran_amt", "q1_trans_cnt",
+                     "q2_trans_cnt", "q3_trans_cnt", "q4_trans_cnt"]
+
+
+def input_query(columns, table='ADS_Py'):
+    """SELECT of cust_id, the given predictor columns and cc_acct_ind from
+    table, with the integer columns cast to the types of SQL_TYPES."""
+    items = []
+    for name, dtype in project_schema(ADS_PY_SCHEMA, ['cust_id'] + columns + ['cc_acct_ind']):
+        if name == 'cust_id' or dtype == 'float64':
+            items.append(name)
+        else:
+            items.append('CAST(%s AS %s) AS %s' % (name, SQL_TYPES[dtype], name))
+    return 'SELECT %s\n                FROM %s' % (',\n                       '.join(items), table)
+
+
+def scoring_query(columns, table='ADS_Py', model_file=None):
+    """SCRIPT query of use case 1 that sends the given predictor columns to
+    the scoring script stoRFScore.py."""
+    command = 'python3 ./<DBNAME>/stoRFScore.py'
+    if model_file:
+        command += ' --model-file %s' % model_file
+    command += ' --columns %s' % ','.join(columns)
+    return ('SELECT d.oc1 AS cust_id,\n'
+            '       d.oc3 AS Prob0,\n'
+            '       d.oc4 AS Prob1,\n'
+            '       d.oc5 AS Actual\n'
+            'FROM SCRIPT( ON(%s)\n'
+            "             SCRIPT_COMMAND('%s')\n"
+            "             RETURNS ('oc1 INTEGER, oc3 FLOAT, oc4 FLOAT, oc5 INTEGER')\n"
+            '           ) AS d;\n' % (input_query(columns, table), command))
+
+
+###
+### Command line
+###
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate the SCRIPT scoring query that sends only '
+                                                 'the columns that a model uses.')
+    parser.add_argument('model', help='model file, as installed for the scoring script')
+    parser.add_argument('--output', default=None,
+                        help='file for the SQL query; by default, the query is written to stdout')
+    parser.add_argument('--table', default='ADS_Py',
+                        help='table with the rows to score (default: ADS_Py)')
+    parser.add_argument('--model-file', default=None,
+                        help='path of the installed model file in the SCRIPT_COMMAND clause; '
+                             'default: <DBNAME>/ and the name of the model file')
+    args = parser.parse_args(argv)
+
+    model = loads_model(read_model_file(args.model))
+    manifest = feature_manifest(model, PREDICTOR_COLUMNS)
+    modelFile = args.model_file or '<DBNAME>/' + os.path.basename(args.model)
+    if modelFile == '<DBNAME>/RFmodel_py.out':
+        modelFile = None   # The default model file of the scoring script
+    sql = scoring_query(manifest, args.table, modelFile)
+    if args.output:
+        with open(args.output, 'w') as fOut:
+            fOut.write(sql)
+    else:
+        sys.stdout.write(sql)
+
+    unused = [name for name in PREDICTOR_COLUMNS if name not in manifest]
+    sys.stderr.write('Feature manifest of %s: %d predictor columns%s\n'
+                     % (args.model, len(manifest),
+                        '; not used: %s' % ', '.join(unused) if unused else ''))
+
+
+if __name__ == '__main__':
+    main()
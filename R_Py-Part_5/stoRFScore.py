@@ -40,97 +40,167 @@
 # File Changelog
 #  v.1.0     2019-10-29     First release
 #  v.1.1     2020-04-02     Added change log; no code changes in present file
+#  v.1.2     2026-10-18     Streaming scoring in batches of rows (--batch-size)
+#  v.1.3     2026-10-18     Bulk decoding of FLOAT columns with stoRFIO.py
+#  v.1.4     2026-10-18     Typed input decoding with the stoRFIO.py schema decoder
+#  v.1.5     2026-10-18     Buffered result output; optional rounding (--precision)
+#  v.1.6     2026-10-18     Models in the array-based format of stoRFForest.py
+#  v.1.7     2026-10-18     Node-local cache of decoded models (--cache-dir, --cache-mb)
+#  v.1.8     2026-10-18     Cached models memory-mapped and shared on the node (--no-mmap)
+#  v.1.9     2026-10-18     Optional pipelined reading, scoring and writing (--pipeline)
+#  v.1.10    2026-10-18     Optional early-exit scoring (--early-exit, --early-exit-threshold)
+#  v.1.11    2026-10-18     Selectable scoring engine (--engine)
+#  v.1.12    2026-10-18     Projected input of the columns the model uses (--columns)
+#  v.1.13    2026-10-18     Single-pass scoring of several target models (--target)
+#  v.1.14    2026-10-18     Optional cache of the scores of unchanged rows (--score-cache)
+#  v.1.15    2026-10-18     Deterministic early-exit bound; statistical one on request
 ################################################################################
 
 import sys
+import time
+import argparse
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-import pickle
-import base64
+from stoRFIO import TableDecoder, ResultWriter, ADS_PY_SCHEMA, project_schema, run_pipeline
+from stoRFForest import ArrayForest, EarlyExitStats, loads_model, scoring_engine, feature_manifest
+from stoRFForest import EARLY_EXIT_BLOCK, EARLY_EXIT_BOUNDS, ENGINES
+from stoRFModel import ModelCache, read_model_file, DEFAULT_CACHE_DIR, DEFAULT_CACHE_MB
+from stoRFModel import ScoreCache, file_digest, DEFAULT_SCORE_CACHE_DIR, DEFAULT_SCORE_CACHE_MB
 
 ###
-### Read input
+### Script arguments
 ###
 
+# The script reads its input in batches of rows, and scores and outputs every
+# batch before it reads the next one. This way, the memory used by the script
+# stays constant no matter how many rows an AMP receives. The batch size can be
+# adjusted in the SCRIPT_COMMAND clause of the SCRIPT query; for example,
+#   SCRIPT_COMMAND('python3 ./<DBNAME>/stoRFScore.py --batch-size 50000')
+# Specify a batch size of 0 to read and score all input rows at once.
+# The output probabilities are sent at full precision, unless the option
+# "--precision <N>" asks for them to be rounded to N decimals.
+# The option "--model-file <path>" scores with a model file other than the
+# default RFmodel_py.out; see the model loading section below. The options
+# "--cache-dir <path>" and "--cache-mb <N>" set the location and size of the
+# node-local cache of decoded models; "--cache-mb 0" turns the cache off.
+# Cached models are memory-mapped, unless the option "--no-mmap" is given.
+# The option "--pipeline" reads, scores and writes batches concurrently; see
+# the scoring section below.
+# The options "--early-exit <TOL>" and "--early-exit-threshold <P>" score
+# with early exit, which evaluates fewer trees for most rows; see the scoring
+# section below.
+# The option "--engine quickscorer" scores with the QuickScorer-style
+# predictor of the helper module stoRFForest.py rather than with the predictor
+# of the model; see the model loading section below.
+# The option "--columns <list>" reads input rows with only the columns cust_id,
+# the comma-separated predictor columns of the list, and cc_acct_ind, in this
+# order; see the input decoder section below.
+# The option "--target <name>=<path>", given once for every target column,
+# scores the input rows with the model file of every target in a single pass;
+# see the model loading section below.
+# The option "--score-cache" looks up the rows that the model has scored in
+# earlier runs in a node-local score cache, rather than scoring them anew; see
+# the scoring section below. The options "--score-cache-dir <path>" and
+# "--score-cache-mb <N>" set the location and size bound of this cache.
+parser = argparse.ArgumentParser(description='Score ADS_Py rows with the RFmodel_py model.')
+parser.add_argument('--batch-size', type=int, default=10000,
+                    help='number of input rows to read and score at a time; 0 reads all rows')
+parser.add_argument('--precision', type=int, default=None,
+                    help='number of decimals to round the output probabilities to')
+parser.add_argument('--model-file', default=None,
+                    help='path of the installed model file; default: <DBNAME>/RFmodel_py.out')
+parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                    help='node-local directory of the decoded-model cache')
+parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_MB,
+                    help='size bound of the decoded-model cache in MB; 0 turns the cache off')
+parser.add_argument('--no-mmap', action='store_true',
+                    help='read cached models into private memory rather than memory-map them')
+parser.add_argument('--pipeline', action='store_true',
+                    help='read, score and write batches concurrently')
+parser.add_argument('--pipeline-depth', type=int, default=2,
+                    help='with --pipeline, number of batches queued between the stages')
+parser.add_argument('--early-exit', type=float, default=None, metavar='TOL',
+                    help='stop evaluating the trees once the probabilities of the rows are '
+                         'settled within TOL')
+parser.add_argument('--early-exit-threshold', type=float, default=None, metavar='P',
+                    help='stop evaluating the trees for a row once its class at the '
+                         'probability threshold P is settled')
+parser.add_argument('--early-exit-block', type=int, default=EARLY_EXIT_BLOCK,
+                    help='with early exit, number of trees evaluated between the checks')
+parser.add_argument('--early-exit-bound', choices=EARLY_EXIT_BOUNDS, default='deterministic',
+                    help='with early exit, bound by which a row exits; the statistical bound '
+                         'exits earlier, without a guarantee for a single row')
+parser.add_argument('--engine', choices=ENGINES, default='default',
+                    help='scoring engine; default: the predictor of the model')
+parser.add_argument('--columns', default=None,
+                    help='comma-separated predictor columns of the input rows between cust_id '
+                         'and cc_acct_ind; default: all ADS_Py columns')
+parser.add_argument('--target', action='append', default=None, metavar='NAME=PATH',
+                    help='target column and path of the installed model file for it; give '
+                         'once for every target to score')
+parser.add_argument('--score-cache', action='store_true',
+                    help='look up the rows scored in earlier runs in the node-local score cache')
+parser.add_argument('--score-cache-dir', default=DEFAULT_SCORE_CACHE_DIR,
+                    help='node-local directory of the score cache')
+parser.add_argument('--score-cache-mb', type=int, default=DEFAULT_SCORE_CACHE_MB,
+                    help='size bound of the score cache in MB')
+args = parser.parse_args()
+earlyExit = args.early_exit is not None or args.early_exit_threshold is not None
+if earlyExit and args.engine != 'default':
+    parser.error('early exit works with the default engine only')
+if earlyExit and args.score_cache:
+    parser.error('the score cache works without early exit only')
+
+if args.target:
+    if args.model_file:
+        parser.error('give either --model-file or --target')
+    if not all('=' in spec for spec in args.target):
+        parser.error('give every --target as <target column>=<model file path>')
+    targets = [tuple(part.strip() for part in spec.split('=', 1)) for spec in args.target]
+else:
+    targets = [('cc_acct_ind', args.model_file or '<DBNAME>/RFmodel_py.out')]
+
 delimiter = '\t'
-inputData = []
+batchSize = args.batch_size if args.batch_size > 0 else None
 
-for line in sys.stdin.read().splitlines():
-    line = line.split(delimiter)
-    inputData.append(line)
+###
+### Set up input decoder according to input schema
+###
+
+# Know your data: You must know in advance the number and data types of the
+# incoming columns from the database!
+# The input schema of the ADS_Py table is declared in the helper module
+# stoRFIO.py. The decoder turns every batch of input rows into a DataFrame
+# with typed columns. For numeric columns, the database sends in floats in
+# scientific format with a blank space when the exponential is positive; e.g.,
+# 1.0 is sent as 1.000E 000. The decoder deals with any such blank spaces.
+# The SELECT * input query sends all 28 columns of ADS_Py, but the model only
+# uses the predictor columns. With the option "--columns", the input holds
+# only cust_id, the listed predictor columns and cc_acct_ind, as selected by
+# the input query that the client tool "stoRFProject.py" generates from the
+# feature manifest of the model. The rows are then shorter to send and faster
+# to decode. With several targets, the input ends with the target columns
+# that are not listed, in the order of the "--target" options.
+if args.columns:
+    inputColumns = [name.strip() for name in args.columns.split(',')]
+    schema = project_schema(ADS_PY_SCHEMA, ['cust_id'] + inputColumns +
+                            [name for name, path in targets if name not in inputColumns])
+else:
+    inputColumns = None
+    schema = ADS_PY_SCHEMA
+decoder = TableDecoder(schema, delimiter)
 
 ###
-### If no data received, gracefully exit rather than producing an error later.
+### Read first input batch
 ###
 
-if not inputData:
-    sys.exit()
+df = decoder.read(sys.stdin, batchSize)
 
 ###
-### Set up input DataFrame according to input schema
+### If no data received, gracefully exit rather than producing an error later.
 ###
 
-# Know your data: You must know in advance the number and data types of the
-# incoming columns from the database!
-# For numeric columns, the database sends in floats in scientific format with a
-# blank space when the exponential is positive; e.g., 1.0 is sent as 1.000E 000.
-# The following input data read deals with any such blank spaces in numbers.
-
-columns = ['cust_id', 'tot_income', 'tot_age', 'tot_cust_years', 'tot_children',
-           'female_ind', 'single_ind', 'married_ind', 'separated_ind',
-           'ca_resident_ind', 'ny_resident_ind', 'tx_resident_ind',
-           'il_resident_ind', 'az_resident_ind', 'oh_resident_ind',
-           'ck_acct_ind', 'sv_acct_ind', 'cc_acct_ind',
-           'ck_avg_bal', 'sv_avg_bal', 'cc_avg_bal', 'ck_avg_tran_amt',
-           'sv_avg_tran_amt', 'cc_avg_tran_amt', 'q1_trans_cnt',
-           'q2_trans_cnt', 'q3_trans_cnt', 'q4_trans_cnt']
-
-df = pd.DataFrame(inputData, columns=columns)
-#df = pd.DataFrame.from_records(inputData, exclude=['nRow', 'model'], columns=columns)
-del inputData
-
-df['cust_id'] = pd.to_numeric(df['cust_id'])
-
-df['tot_income'] = df['tot_income'].apply(lambda x: "".join(x.split()))
-df['tot_income'] = pd.to_numeric(df['tot_income'])
-
-df['tot_age'] = pd.to_numeric(df['tot_age'])
-df['tot_cust_years'] = pd.to_numeric(df['tot_cust_years'])
-df['tot_children'] = pd.to_numeric(df['tot_children'])
-df['female_ind'] = pd.to_numeric(df['female_ind'])
-df['single_ind'] = pd.to_numeric(df['single_ind'])
-df['married_ind'] = pd.to_numeric(df['married_ind'])
-df['separated_ind'] = pd.to_numeric(df['separated_ind'])
-df['ca_resident_ind'] = pd.to_numeric(df['ca_resident_ind'])
-df['ny_resident_ind'] = pd.to_numeric(df['ny_resident_ind'])
-df['tx_resident_ind'] = pd.to_numeric(df['tx_resident_ind'])
-df['il_resident_ind'] = pd.to_numeric(df['il_resident_ind'])
-df['az_resident_ind'] = pd.to_numeric(df['az_resident_ind'])
-df['oh_resident_ind'] = pd.to_numeric(df['oh_resident_ind'])
-
-df['ck_acct_ind'] = pd.to_numeric(df['ck_acct_ind'])
-df['sv_acct_ind'] = pd.to_numeric(df['sv_acct_ind'])
-df['cc_acct_ind'] = pd.to_numeric(df['cc_acct_ind'])
-
-df['ck_avg_bal'] = df['ck_avg_bal'].apply(lambda x: "".join(x.split()))
-df['ck_avg_bal'] = pd.to_numeric(df['ck_avg_bal'])
-df['sv_avg_bal'] = df['sv_avg_bal'].apply(lambda x: "".join(x.split()))
-df['sv_avg_bal'] = pd.to_numeric(df['sv_avg_bal'])
-df['cc_avg_bal'] = df['cc_avg_bal'].apply(lambda x: "".join(x.split()))
-df['cc_avg_bal'] = pd.to_numeric(df['cc_avg_bal'])
-
-df['ck_avg_tran_amt'] = df['ck_avg_tran_amt'].apply(lambda x: "".join(x.split()))
-df['ck_avg_tran_amt'] = pd.to_numeric(df['ck_avg_tran_amt'])
-df['sv_avg_tran_amt'] = df['sv_avg_tran_amt'].apply(lambda x: "".join(x.split()))
-df['sv_avg_tran_amt'] = pd.to_numeric(df['sv_avg_tran_amt'])
-df['cc_avg_tran_amt'] = df['cc_avg_tran_amt'].apply(lambda x: "".join(x.split()))
-df['cc_avg_tran_amt'] = pd.to_numeric(df['cc_avg_tran_amt'])
-
-df['q1_trans_cnt'] = pd.to_numeric(df['q1_trans_cnt'])
-df['q2_trans_cnt'] = pd.to_numeric(df['q2_trans_cnt'])
-df['q3_trans_cnt'] = pd.to_numeric(df['q3_trans_cnt'])
-df['q4_trans_cnt'] = pd.to_numeric(df['q4_trans_cnt'])
+if df is None:
+    sys.exit()
 
 ###
 ### Load model from input file
@@ -140,16 +210,55 @@ df['q4_trans_cnt'] = pd.to_numeric(df['q4_trans_cnt'])
 # previously uploaded the model file to. This must be the same database
 # name as the <DBNAME> specified in the Use Case [1] segment of the SQL script
 # file "R_Py_TechBytes-Part_5-Demo.sql".
-fIn = open('<DBNAME>/RFmodel_py.out', 'rb')   # 'rb' for reading binary file
-classifierPklB64 = fIn.read()
-fIn.close()
+# The model file holds the base64-encoded model either as a pickled
+# scikit-learn RandomForestClassifier, or in the compact array-based format
+# of the helper module stoRFForest.py. The format is detected automatically.
+# A model in the array-based format loads much faster, and is scored with
+# NumPy alone; scikit-learn is then not even imported.
+# Every AMP runs its own instance of the script, and every query runs them
+# anew. The first instance on a node decodes the model and stores it in the
+# array-based format in a node-local cache directory, keyed by the content
+# of the model file. The other instances and later queries load it from there.
+# When the model file is re-installed with new content, the stale cache entry
+# is replaced; the least recently used entries are evicted when the cache
+# exceeds its size bound.
+# The cached model is memory-mapped read-only. All script instances on a node
+# then share a single copy of the model in memory, rather than each of them
+# holding a private copy.
+# With the "--target" options, the script loads the model of every target,
+# such as the propensity models for the credit card, checking and savings
+# accounts. Every input batch is then read and decoded once, and scored with
+# all models, rather than once per model in a SCRIPT query of its own.
+if args.cache_mb > 0:
+    cache = ModelCache(args.cache_dir, args.cache_mb << 20, use_mmap=not args.no_mmap)
+
 
-# Decode and unserialize from imported format
-classifierPkl = base64.b64decode(classifierPklB64)
-classifier = pickle.loads(classifierPkl)
+def load_classifier(path):
+    if args.cache_mb > 0:
+        classifier = cache.load(path)
+    else:
+        # Decode and unserialize from imported format
+        classifier = loads_model(read_model_file(path))
+    if earlyExit and not isinstance(classifier, ArrayForest):
+        classifier = ArrayForest.from_sklearn(classifier)
+    return scoring_engine(classifier, args.engine, sys.stderr)
+
+
+# With the option "--engine quickscorer", the trees are not traversed node by
+# node. Instead, the thresholds of every feature are sorted once, and a row is
+# scored by looking up the rank of each of its values among them, and by
+# bitwise ANDs of precomputed bit vectors of the leaves that the row can still
+# reach in every tree, with one 64-bit word for every 64 leaves of a tree. It
+# gives the same probabilities, and pays off most for forests of small trees:
+# it scores forests fitted with a max_depth of 6 about 3 times, and fully grown
+# forests with about 100 leaves per tree about 2 times, as fast as the
+# array-based predictor. Its tables take about 256 bytes per leaf. A forest
+# with trees of more than 2048 leaves, or with tables of more than 128 MB, is
+# scored with the array-based predictor, with a note in the SCRIPT log.
+classifiers = [(name, load_classifier(path)) for name, path in targets]
 
 ###
-### Score the test table data with the given model
+### Score the input data with the given model, one batch at a time
 ###
 predictor_columns = ["tot_income", "tot_age", "tot_cust_years", "tot_children",
                      "female_ind", "single_ind", "married_ind", "separated_ind",
@@ -157,13 +266,131 @@ predictor_columns = ["tot_income", "tot_age", "tot_cust_years", "tot_children",
                      "ck_avg_tran_amt", "sv_avg_tran_amt", "q1_trans_cnt",
                      "q2_trans_cnt", "q3_trans_cnt", "q4_trans_cnt"]
 
-# Specify the rows to be scored by the model and call the predictor.
-X_test = df[predictor_columns]
-PredictionProba = classifier.predict_proba(X_test)
+# With the option "--score-cache", the probabilities of every row that is
+# scored are kept in a node-local cache, keyed by the content of the model
+# file and a hash of the predictor values of the row. When a later run, such
+# as the next nightly run, gets a row with the same predictor values, its
+# probabilities are looked up in the cache rather than computed, and only
+# the new and changed rows are scored by the model. The lookup gives the same
+# probabilities as the model. The cache follows any re-installation of the
+# model, and the cached rows of the previous model are dropped after 12 hours
+# without use. The hit rate, the lookup time and the scoring time saved are
+# written to stderr at the end.
+if args.score_cache:
+    scoreCaches = [ScoreCache(file_digest(path), len(classifier.classes_), args.score_cache_dir,
+                              args.score_cache_mb << 20)
+                   for (target, path), (name, classifier) in zip(targets, classifiers)]
+else:
+    scoreCaches = [None] * len(classifiers)
+
+# Every model is scored on the predictor columns it was fitted with; models
+# fitted without column names on the predictor columns above.
+modelColumns = [list(getattr(classifier, 'feature_names_in_', predictor_columns))
+                for name, classifier in classifiers]
+
+# With a projected input, the predictor columns that the model does not use
+# are not sent; they are set to 0, which does not change the probabilities.
+# All the columns of the feature manifest of the model must be sent.
+if inputColumns is not None:
+    for (name, classifier), columns in zip(classifiers, modelColumns):
+        missing = [column for column in feature_manifest(classifier, columns)
+                   if column not in decoder.columns]
+        if missing:
+            sys.exit('The model of %s uses the predictor columns %s, which are not in the input'
+                     % (name, ', '.join(missing)))
+
+writer = ResultWriter(sys.stdout, delimiter)
+
+# With early exit, the trees of the model are evaluated in blocks of 50 trees
+# (option "--early-exit-block"). As the probabilities of every tree are
+# between 0 and 1, the probabilities of the whole forest after k of its N
+# trees are known up to (N - k) / N. With "--early-exit <TOL>", the trees
+# after the first ones that bound the probabilities within TOL are not
+# evaluated. With "--early-exit-threshold <P>", a row is not evaluated any
+# further once its class at the probability threshold P is settled, and gets
+# the same class as from the whole forest. On a forest of 500 trees and 20000
+# rows (stoRFBench.py earlyexit), the threshold 0.5 evaluates 369 trees per
+# row and scores 1.47 times as fast as without early exit; a tolerance of
+# 0.05 scores 1.24 times as fast. With "--early-exit-bound statistical", the
+# probabilities of the trees evaluated so far rather estimate the ones of the
+# whole forest, and a row exits once the estimate is settled by a confidence
+# bound of 3 standard errors. This scores up to 4.4 times as fast, but
+# changes the class of some rows. The number of trees evaluated per row and
+# the scoring time are written to stderr at the end.
+earlyStats = EarlyExitStats()
+
+
+def score_batch(df):
+    # Specify the rows to be scored by every model and call the predictors.
+    # The models with the same predictor columns share the same input.
+    probas = []
+    inputs = {}
+    for (name, classifier), columns, scoreCache in zip(classifiers, modelColumns, scoreCaches):
+        key = tuple(columns)
+        if key not in inputs:
+            if inputColumns is None:
+                inputs[key] = df[columns]
+            else:
+                inputs[key] = df.reindex(columns=columns, fill_value=0)
+        X_test = inputs[key]
+        if earlyExit:
+            start = time.perf_counter()
+            PredictionProba, used = classifier.predict_proba_early_exit(
+                X_test, tolerance=args.early_exit or 0.0, threshold=args.early_exit_threshold,
+                block_size=args.early_exit_block, bound=args.early_exit_bound)
+            earlyStats.update(used, classifier.n_estimators, time.perf_counter() - start)
+        elif scoreCache is not None:
+            PredictionProba = scoreCache.predict_proba(classifier, X_test)
+        else:
+            PredictionProba = classifier.predict_proba(X_test)
+        if args.precision is not None:
+            PredictionProba = np.round(PredictionProba, args.precision)
+        probas.append(PredictionProba)
+    return df, probas
+
+
+def write_batch(result):
+    # Export results to Advanced SQL Engine through standard output in expected
+    # format. The script has always sent the integer cust_id and cc_acct_ind
+    # values in float format (e.g., 1362480.0), which the RETURNS clause of the
+    # SCRIPT query accepts for its INTEGER columns.
+    # Every row holds cust_id, followed by the probabilities and the actual
+    # value of every target in the order of the targets.
+    df, probas = result
+    columns = [df['cust_id'].values.astype(np.float64)]
+    for (name, path), PredictionProba in zip(targets, probas):
+        columns += [PredictionProba[:, 0], PredictionProba[:, 1],
+                    df[name].values.astype(np.float64)]
+    writer.write(*columns)
+
+
+if args.pipeline:
+    # Pipelined mode: a reader thread reads and decodes the next batches while
+    # the present batch is scored, and a writer thread sends the results of
+    # the previous batches to the database meanwhile. The stages exchange the
+    # batches through bounded queues, and run concurrently as long as they wait
+    # for input or output, or run NumPy or scikit-learn code. At the end, the
+    # time that every stage has spent busy and stalled is written to stderr,
+    # which the SCRIPT Table Operator keeps in its log.
+    pending = [df]
+    del df
+
+    def read_batch():
+        return pending.pop() if pending else decoder.read(sys.stdin, batchSize)
+
+    stats = run_pipeline(read_batch, score_batch, write_batch, args.pipeline_depth)
+    writer.flush()
+    stats.report(sys.stderr)
+else:
+    while df is not None:
+        write_batch(score_batch(df))
+        del df
 
-df = pd.concat([df, pd.DataFrame(data=PredictionProba, columns=['Prob0', 'Prob1'])], axis=1)
+        df = decoder.read(sys.stdin, batchSize)
 
-# Export results to Advanced SQL Engine through standard output in expected format.
-for index, row in df.iterrows():
-    print(row['cust_id'], delimiter,
-          row['Prob0'], delimiter, row['Prob1'], delimiter, row['cc_acct_ind'])
+    writer.flush()
+earlyStats.report(sys.stderr)
+for (name, path), scoreCache in zip(targets, scoreCaches):
+    if scoreCache is not None:
+        scoreCache.save()
+        scoreCache.report(sys.stderr, ' of %s' % name)
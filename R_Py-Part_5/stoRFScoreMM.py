@@ -47,144 +47,241 @@
 # File Changelog
 #  v.1.0     2019-10-29     First release
 #  v.1.1     2020-04-02     Added change log; no code changes in present file
+#  v.1.2     2026-10-18     Bulk decoding of FLOAT columns with stoRFIO.py
+#  v.1.3     2026-10-18     Typed input decoding with the stoRFIO.py schema decoder
+#  v.1.4     2026-10-18     Buffered result output; optional rounding (--precision)
+#  v.1.5     2026-10-18     Models in the array-based format of stoRFForest.py
+#  v.1.6     2026-10-18     Compressed models in chunks of rows
+#  v.1.7     2026-10-18     Scoring with installed model files (--model-dir)
+#  v.1.8     2026-10-18     Optional pipelined scoring with --model-dir (--pipeline)
+#  v.1.9     2026-10-18     Optional early-exit scoring (--early-exit, --early-exit-threshold)
+#  v.1.10    2026-10-18     Selectable scoring engine (--engine)
+#  v.1.11    2026-10-18     Deterministic early-exit bound; statistical one on request
 ################################################################################
 
 import sys
+import time
+import argparse
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-import pickle
-import base64
+from stoRFIO import TableDecoder, ResultWriter, MULTIMODEL_SCHEMA, run_pipeline
+from stoRFForest import ArrayForest, EarlyExitStats, loads_model, scoring_engine
+from stoRFForest import EARLY_EXIT_BLOCK, EARLY_EXIT_BOUNDS, ENGINES
+from stoRFModel import split_model_rows, ModelCache, ModelDirectory
+from stoRFModel import DEFAULT_CACHE_DIR, DEFAULT_CACHE_MB, DEFAULT_MODEL_PATTERN
 
 ###
-### Read input
+### Script arguments
 ###
 
+# The output probabilities are sent at full precision, unless the option
+# "--precision <N>" in the SCRIPT_COMMAND clause of the SCRIPT query asks for
+# them to be rounded to N decimals.
+#
+# By default, the models arrive in the input rows from the RFStateCodeModelsPy
+# table. With the option "--model-dir <path>", the script rather looks up the
+# model of every state code in a model file that is installed in the database,
+# and receives only the data rows; see the section on model directories below.
+#
+# The options "--early-exit <TOL>", "--early-exit-threshold <P>",
+# "--early-exit-block <N>" and "--early-exit-bound <B>" score with early
+# exit, as described in the "stoRFScore.py" script: for most rows, only some
+# of the trees of the model of their state code are evaluated. The number of
+# trees evaluated per row and the scoring time are written to stderr at the
+# end. The option "--engine quickscorer" scores with
+# the QuickScorer-style predictor, as described in the "stoRFScore.py" script.
+parser = argparse.ArgumentParser(description='Score MultiModelTest_Py rows with the state code models.')
+parser.add_argument('--precision', type=int, default=None,
+                    help='number of decimals to round the output probabilities to')
+parser.add_argument('--model-dir', default=None,
+                    help='directory of the installed model files; by default, the models '
+                         'arrive in the input rows')
+parser.add_argument('--model-pattern', default=DEFAULT_MODEL_PATTERN,
+                    help='file name pattern of the installed model files; {} stands for '
+                         'the state code')
+parser.add_argument('--batch-size', type=int, default=10000,
+                    help='with --model-dir, number of input rows to read and score at a time; '
+                         '0 reads all rows')
+parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                    help='with --model-dir, node-local directory of the decoded-model cache')
+parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_MB,
+                    help='with --model-dir, size bound of the decoded-model cache in MB; '
+                         '0 turns the cache off')
+parser.add_argument('--pipeline', action='store_true',
+                    help='with --model-dir, read, score and write batches concurrently')
+parser.add_argument('--pipeline-depth', type=int, default=2,
+                    help='with --pipeline, number of batches queued between the stages')
+parser.add_argument('--early-exit', type=float, default=None, metavar='TOL',
+                    help='stop evaluating the trees once the probabilities of the rows are '
+                         'settled within TOL')
+parser.add_argument('--early-exit-threshold', type=float, default=None, metavar='P',
+                    help='stop evaluating the trees for a row once its class at the '
+                         'probability threshold P is settled')
+parser.add_argument('--early-exit-block', type=int, default=EARLY_EXIT_BLOCK,
+                    help='with early exit, number of trees evaluated between the checks')
+parser.add_argument('--early-exit-bound', choices=EARLY_EXIT_BOUNDS, default='deterministic',
+                    help='with early exit, bound by which a row exits; the statistical bound '
+                         'exits earlier, without a guarantee for a single row')
+parser.add_argument('--engine', choices=ENGINES, default='default',
+                    help='scoring engine; default: the predictor of the model')
+args = parser.parse_args()
+earlyExit = args.early_exit is not None or args.early_exit_threshold is not None
+if earlyExit and args.engine != 'default':
+    parser.error('early exit works with the default engine only')
+
 delimiter = '\t'
-inputData = []
+predictor_columns = ["tot_income", "tot_age", "tot_cust_years", "tot_children",
+                     "female_ind", "single_ind", "married_ind", "separated_ind",
+                     "ck_acct_ind", "sv_acct_ind", "ck_avg_bal", "sv_avg_bal",
+                     "ck_avg_tran_amt", "sv_avg_tran_amt", "q1_trans_cnt",
+                     "q2_trans_cnt", "q3_trans_cnt", "q4_trans_cnt"]
+earlyStats = EarlyExitStats()
 
-try:
-    line = input()
-    if line == '':   # Exit if user provides blank line
-        pass
-    else:
-        allArgs = line.split(delimiter)
-        inputData.append(allArgs[0:-2])
-        modelSerB64 = allArgs[-1]
-except (EOFError):   # Exit if reached EOF or CTRL-D
-    pass
-
-while 1:
-    try:
-        line = input()
-        if line == '':   # Exit if user provides blank line
-            break
-        else:
-            allArgs = line.split(delimiter)
-            inputData.append(allArgs[0:-2])
-    except (EOFError):   # Exit if reached EOF or CTRL-D
-        break
-
-#for line in sys.stdin.read().splitlines():
-#    line = line.split(delimiter)
-#    inputData.append(line)
+
+def predict_proba(classifier, X):
+    # Class probabilities of the rows of X, with early exit if requested
+    if not earlyExit:
+        return classifier.predict_proba(X)
+    if not isinstance(classifier, ArrayForest):
+        classifier = ArrayForest.from_sklearn(classifier)
+    start = time.perf_counter()
+    proba, used = classifier.predict_proba_early_exit(
+        X, tolerance=args.early_exit or 0.0, threshold=args.early_exit_threshold,
+        block_size=args.early_exit_block, bound=args.early_exit_bound)
+    earlyStats.update(used, classifier.n_estimators, time.perf_counter() - start)
+    return proba
 
 ###
-### If no data received, gracefully exit rather than producing an error later.
+### Scoring with installed model files
 ###
 
-if not inputData:
+# In this mode, the model of every state code is installed in the database as
+# a model file, such as RFmodel_CA.out for the state code CA. The SCRIPT query
+# sends only the MultiModelTest_Py rows, and needs no PARTITION BY clause, as
+# every script instance finds the model for any state code in the installed
+# files. Every model is loaded once per script instance; through the node-local
+# cache of decoded models, later script instances and queries on the node load
+# it from its shared memory-mapped copy. The script reads and scores the rows
+# in batches, like "stoRFScore.py" does. Rows of state codes without installed
+# model file are not scored, just as the join with the RFStateCodeModelsPy
+# table drops them otherwise.
+# With the option "--pipeline", the batches are read, scored and written
+# concurrently, as described in "stoRFScore.py".
+if args.model_dir is not None:
+    decoder = TableDecoder(MULTIMODEL_SCHEMA, delimiter)
+    cache = ModelCache(args.cache_dir, args.cache_mb << 20) if args.cache_mb > 0 else None
+    models = ModelDirectory(args.model_dir, args.model_pattern, cache)
+    writer = ResultWriter(sys.stdout, delimiter)
+    batchSize = args.batch_size if args.batch_size > 0 else None
+    # Predictors of the models for the scoring engine, by state code
+    predictors = {}
+
+    def read_batch():
+        return decoder.read(sys.stdin, batchSize)
+
+    def score_batch(df):
+        # Score the rows of every state code in the batch with its own model,
+        # and keep the rows in their input order.
+        PredictionProba = np.zeros((len(df), 2))
+        scored = np.zeros(len(df), dtype=bool)
+        for statecode, rows in df.groupby('statecode', observed=True).indices.items():
+            key = str(statecode).strip()
+            if key not in predictors:
+                model = models.get(key)
+                predictors[key] = (None if model is None
+                                   else scoring_engine(model, args.engine, sys.stderr))
+            classifier = predictors[key]
+            if classifier is None:
+                continue
+            PredictionProba[rows] = predict_proba(classifier, df[predictor_columns].iloc[rows])
+            scored[rows] = True
+        if args.precision is not None:
+            PredictionProba = np.round(PredictionProba, args.precision)
+        return df, PredictionProba, scored
+
+    def write_batch(result):
+        df, PredictionProba, scored = result
+        writer.write(df['cust_id'].values[scored], df['statecode'].values[scored],
+                     PredictionProba[scored, 0], PredictionProba[scored, 1],
+                     df['cc_acct_ind'].values[scored])
+
+    if args.pipeline:
+        stats = run_pipeline(read_batch, score_batch, write_batch, args.pipeline_depth)
+        writer.flush()
+        stats.report(sys.stderr)
+    else:
+        df = read_batch()
+        while df is not None:
+            write_batch(score_batch(df))
+            del df
+
+            df = read_batch()
+        writer.flush()
+    earlyStats.report(sys.stderr)
     sys.exit()
 
-## In the input information, all rows have the same number of column elements
-## except for the first row. The latter also contains the model info in its
-## last column. Isolate the serialized model from the end of first row.
-#modelSerB64 = inputData[0][-1]
+# The remainder of the script scores with the models in the input rows.
 
 ###
-### Set up input DataFrame according to input schema
+### Read input
 ###
 
 # Know your data: You must know in advance the number and data types of the
 # incoming columns from the database!
-# For numeric columns, the database sends in floats in scientific format with a
-# blank space when the exponential is positive; e.g., 1.0 is sent as 1.000E 000.
-# The following input data read deals with any such blank spaces in numbers.
-
-columns = ['cust_id', 'tot_income', 'tot_age', 'tot_cust_years', 'tot_children',
-           'female_ind', 'single_ind', 'married_ind', 'separated_ind',
-           'statecode', 'ck_acct_ind', 'sv_acct_ind', 'cc_acct_ind',
-           'ck_avg_bal', 'sv_avg_bal', 'cc_avg_bal', 'ck_avg_tran_amt',
-           'sv_avg_tran_amt', 'cc_avg_tran_amt', 'q1_trans_cnt',
-           'q2_trans_cnt', 'q3_trans_cnt', 'q4_trans_cnt', 'SAMPLE_ID']
-
-df = pd.DataFrame(inputData, columns=columns)
-#df = pd.DataFrame.from_records(inputData, exclude=['nRow', 'model'], columns=columns)
-del inputData
-
-df['cust_id'] = pd.to_numeric(df['cust_id'])
-
-df['tot_income'] = df['tot_income'].apply(lambda x: "".join(x.split()))
-df['tot_income'] = pd.to_numeric(df['tot_income'])
-
-df['tot_age'] = pd.to_numeric(df['tot_age'])
-df['tot_cust_years'] = pd.to_numeric(df['tot_cust_years'])
-df['tot_children'] = pd.to_numeric(df['tot_children'])
-df['female_ind'] = pd.to_numeric(df['female_ind'])
-df['single_ind'] = pd.to_numeric(df['single_ind'])
-df['married_ind'] = pd.to_numeric(df['married_ind'])
-df['separated_ind'] = pd.to_numeric(df['separated_ind'])
-df['statecode'] = df['statecode'].apply(lambda x: x.replace('"', ''))
-df['ck_acct_ind'] = pd.to_numeric(df['ck_acct_ind'])
-df['sv_acct_ind'] = pd.to_numeric(df['sv_acct_ind'])
-df['cc_acct_ind'] = pd.to_numeric(df['cc_acct_ind'])
-df['sv_acct_ind'] = pd.to_numeric(df['sv_acct_ind'])
-df['cc_acct_ind'] = pd.to_numeric(df['cc_acct_ind'])
-
-df['ck_avg_bal'] = df['ck_avg_bal'].apply(lambda x: "".join(x.split()))
-df['ck_avg_bal'] = pd.to_numeric(df['ck_avg_bal'])
-df['sv_avg_bal'] = df['sv_avg_bal'].apply(lambda x: "".join(x.split()))
-df['sv_avg_bal'] = pd.to_numeric(df['sv_avg_bal'])
-df['cc_avg_bal'] = df['cc_avg_bal'].apply(lambda x: "".join(x.split()))
-df['cc_avg_bal'] = pd.to_numeric(df['cc_avg_bal'])
-df['ck_avg_tran_amt'] = df['ck_avg_tran_amt'].apply(lambda x: "".join(x.split()))
-df['ck_avg_tran_amt'] = pd.to_numeric(df['ck_avg_tran_amt'])
-df['sv_avg_tran_amt'] = df['sv_avg_tran_amt'].apply(lambda x: "".join(x.split()))
-df['sv_avg_tran_amt'] = pd.to_numeric(df['sv_avg_tran_amt'])
-df['cc_avg_tran_amt'] = df['cc_avg_tran_amt'].apply(lambda x: "".join(x.split()))
-df['cc_avg_tran_amt'] = pd.to_numeric(df['cc_avg_tran_amt'])
-
-df['q1_trans_cnt'] = pd.to_numeric(df['q1_trans_cnt'])
-df['q2_trans_cnt'] = pd.to_numeric(df['q2_trans_cnt'])
-df['q3_trans_cnt'] = pd.to_numeric(df['q3_trans_cnt'])
-df['q4_trans_cnt'] = pd.to_numeric(df['q4_trans_cnt'])
-df['SAMPLE_ID'] = pd.to_numeric(df['SAMPLE_ID'])
+# The input schema of the MultiModelTest_Py table is declared in the helper
+# module stoRFIO.py. In addition, the input here carries the nRow and rf_model
+# columns with the model chunks, which the decoder reads past. For numeric
+# columns, the database sends in floats in scientific format with a blank space
+# when the exponential is positive; e.g., 1.0 is sent as 1.000E 000. The
+# decoder deals with any such blank spaces.
+
+decoder = TableDecoder(MULTIMODEL_SCHEMA + [('nRow', 'skip'), ('rf_model', 'skip')],
+                       delimiter)
+inputLines = sys.stdin.buffer.readlines()
+
+###
+### If no data received, gracefully exit rather than producing an error later.
+###
+
+if not inputLines:
+    sys.exit()
+
+# In the input information, the model arrives in separate model rows ahead of
+# or among the data rows: every model row carries the chunk number in its nRow
+# column, and a chunk of the compressed model in its rf_model column, while
+# its data columns are NULL. Isolate the model chunks, and decode the data rows
+# without them. Input in the earlier format, where the data rows carry the
+# whole model in their last column, is accepted as well.
+modelSer, dataLines = split_model_rows(inputLines, delimiter)
+del inputLines
+if not dataLines:
+    sys.exit()
+df = decoder.decode(dataLines)
+del dataLines
 
 ###
 ### Unpack the transformed serialized fitted model
 ###
-modelSerB64 = modelSerB64.partition("'")[2]
-modelSer = base64.b64decode(modelSerB64)
-classifier = pickle.loads(modelSer)
+# The model is either a pickled scikit-learn RandomForestClassifier, or a model
+# in the compact array-based format of the helper module stoRFForest.py, as
+# produced by "stoRFFitMM.py --model-format arrays". The format is detected
+# automatically.
+classifier = scoring_engine(loads_model(modelSer), args.engine, sys.stderr)
 
 ###
 ### Score the test table data with the given model
 ###
 
-predictor_columns = ["tot_income", "tot_age", "tot_cust_years", "tot_children",
-                     "female_ind", "single_ind", "married_ind", "separated_ind",
-                     "ck_acct_ind", "sv_acct_ind", "ck_avg_bal", "sv_avg_bal",
-                     "ck_avg_tran_amt", "sv_avg_tran_amt", "q1_trans_cnt",
-                     "q2_trans_cnt", "q3_trans_cnt", "q4_trans_cnt"]
-
 # Specify the rows to be scored by the model and call the predictor.
 X_test = df[predictor_columns]
 #Prediction = classifier.predict(X_test)
-PredictionProba = classifier.predict_proba(X_test)
+PredictionProba = predict_proba(classifier, X_test)
 
-df = pd.concat([df, pd.DataFrame(data=PredictionProba, columns=['Prob0', 'Prob1'])], axis=1)
+if args.precision is not None:
+    PredictionProba = np.round(PredictionProba, args.precision)
 
 # Export results to NewSQL Engine through standard output in expected format.
-for index, row in df.iterrows():
-    print(row['cust_id'], delimiter, row['statecode'], delimiter,
-          row['Prob0'], delimiter, row['Prob1'], delimiter, row['cc_acct_ind'])
+writer = ResultWriter(sys.stdout, delimiter)
+writer.write(df['cust_id'].values, df['statecode'].values,
+             PredictionProba[:, 0], PredictionProba[:, 1], df['cc_acct_ind'].values)
+writer.flush()
+earlyStats.report(sys.stderr)
@@ -0,0 +1,351 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFToSQL.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# The present file is a client tool that compiles the Random Forest models of
+# the present demo Part 5 into a plain SQL query, which scores the rows of a
+# table in the Vantage Advanced SQL Engine without the SCRIPT Table Operator.
+#
+# Every tree of a forest becomes a nested CASE expression that tests the split
+# conditions of the tree on the columns of a row, and results in the
+# probability of the positive class in the leaf of the row. The query adds up
+# the expressions of all trees, and divides the sum by the number of trees, as
+# the predict_proba() method of the model does. The database then evaluates
+# the model itself, and no Python process is started on the AMPs, and no rows
+# are sent through the SCRIPT text pipe. Since the size of the query grows
+# with the number of tree nodes, this suits compact forests, such as forests
+# of shallow trees, or forests compressed by "stoRFCompress.py". The options
+# "--max-trees <N>" and "--max-depth <D>" compile only the first N trees of a
+# forest, and cut the trees off at the depth D, where the cut nodes predict
+# the class probabilities of their training rows. Deep trees can also exceed
+# the nesting limit of CASE expressions in the SQL parser; the flat layout
+# compiles every tree into a single CASE expression with a WHEN clause for
+# every leaf instead, which tests all splits on the path to the leaf, at a
+# larger query size. By default, the tool compiles trees of a depth up to 16
+# into nested CASE expressions, and deeper trees in the flat layout; the
+# option "--layout nested" or "--layout flat" sets the layout. The tool warns
+# when the query exceeds the 1 MB limit of the database on the size of a SQL
+# request. For example, the first 20 trees of the model of use case 1, cut off
+# at the depth 6, compile into a query of 93 KB:
+#   python3 stoRFToSQL.py RFmodel_py.out --max-trees 20 --max-depth 6
+#
+# The tool compiles the model file of use case 1 into a query on the ADS_Py
+# table, or the model files "RFmodel_<statecode>.out" of use case 2 into a
+# query on the MultiModelTest_Py table, which scores the rows of every state
+# code with the model of the state code. The query returns the same columns
+# as the scoring scripts "stoRFScore.py" and "stoRFScoreMM.py", respectively.
+#
+# Usage: python3 stoRFToSQL.py RFmodel_py.out [options]
+#        python3 stoRFToSQL.py CA=RFmodel_CA.out NY=RFmodel_NY.out ... [options]
+# With the option "--check <CSV file>", the tool runs the query on the rows of
+# the CSV file in a local SQLite database, and compares the probabilities with
+# the ones of the compiled models. Run the tool with the option "--help" for
+# the other options.
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+#  v.1.3     2026-10-18     Layout chosen from the tree depth by default (--layout auto)
+################################################################################
+
+import argparse
+import sqlite3
+import sys
+import numpy as np
+import pandas as pd
+from pandas.io.sql import DatabaseError
+
+from stoRFForest import ArrayForest, loads_model
+from stoRFModel import read_model_file
+from stoRFFit import select_trees
+from stoRFCompress import node_depths
+
+# Largest size of the text of a SQL request in the Vantage Advanced SQL Engine
+MAX_REQUEST_BYTES = 1024 * 1024
+
+# Largest tree depth compiled into nested CASE expressions by default; the
+# SQLite parser of the "--check" option overflows from the depth 18 on.
+MAX_NESTED_DEPTH = 16
+
+PREDICTOR_COLUMNS = ["tot_income", "tot_age", "tot_cust_years", "tot_children",
+                     "female_ind", "single_ind", "married_ind", "separated_ind",
+                     "ck_acct_ind", "sv_acct_ind", "ck_avg_bal", "sv_avg_bal",
+                     "ck_avg_tran_amt", "sv_avg_tran_amt", "q1_trans_cnt",
+                     "q2_trans_cnt", "q3_trans_cnt", "q4_trans_cnt"]
+
+
+def sql_float(value):
+    # FLOAT literal at full double precision; the exponent makes the literal a
+    # FLOAT rather than a DECIMAL in Teradata SQL.
+    return '%.17E' % value
+
+
+def cap_forest(forest, max_trees=None, max_depth=None):
+    """The ArrayForest of the first max_trees trees of forest, cut off at the
+    depth max_depth. The nodes at the depth max_depth become leaves with the
+    class probabilities of the training rows that reach them."""
+    if max_trees is not None and max_trees < forest.n_estimators:
+        forest = select_trees(forest, range(max_trees))
+    if max_depth is None or max_depth >= forest.max_depth:
+        return forest
+    arrays = dict((name, np.array(getattr(forest, name))) for name in ArrayForest._ARRAYS)
+    cut = np.flatnonzero((node_depths(forest) >= max_depth) & (arrays['feature'] >= 0))
+    arrays['feature'][cut] = -1
+    arrays['children'][cut] = cut[:, np.newaxis]
+    header = dict(forest.header)
+    header['max_depth'] = max_depth
+    return ArrayForest(header, arrays)
+
+
+def split_tests(forest, node, columns):
+    """SQL conditions for the rows that go left and right at the split node;
+    None for a condition that holds for all rows, and False for one that
+    holds for no row."""
+    # The predictor compares the values in single precision: the value x of a
+    # row goes left if float32(x) <= threshold32. For a value x in double
+    # precision, this is the case if x is below the midpoint of threshold32
+    # and the next larger float32 number. NULL values stand for the missing
+    # values; a comparison with NULL is never true.
+    t32 = forest.threshold32[node]
+    midpoint = (float(t32) + float(np.nextafter(t32, np.float32(np.inf)))) / 2.0
+    column = columns[forest.feature[node]]
+    if not np.isfinite(midpoint):
+        # Split of the missing values from all other values
+        if forest.missing_left[node]:
+            return None, False
+        return '%s IS NOT NULL' % column, '%s IS NULL' % column
+    if forest.missing_left[node]:
+        return ('(%s < %s OR %s IS NULL)' % (column, sql_float(midpoint), column),
+                '%s >= %s' % (column, sql_float(midpoint)))
+    return ('%s < %s' % (column, sql_float(midpoint)),
+            '(%s >= %s OR %s IS NULL)' % (column, sql_float(midpoint), column))
+
+
+def tree_sql(forest, root, columns, positive, layout='nested'):
+    """CASE expression of the tree with the given root node, with the
+    probability of the class index positive in the leaves.
+
+    The nested layout has a CASE expression for every split node, in the
+    THEN and ELSE branches of the CASE expression of its parent. The flat
+    layout has a single CASE expression with a WHEN clause for every leaf,
+    which tests all the splits on the path to the leaf. The flat layout is
+    larger, but does not nest deeper than the SQL parser allows for deep
+    trees.
+    """
+    if layout == 'nested':
+        def node_sql(node):
+            if forest.feature[node] < 0:
+                return sql_float(forest.value[node, positive])
+            left, right = forest.children[node]
+            test = split_tests(forest, node, columns)[0]
+            if test is None:
+                return node_sql(left)
+            return 'CASE WHEN %s THEN %s ELSE %s END' % (test, node_sql(left), node_sql(right))
+        return node_sql(root)
+
+    leaves = []
+    stack = [(root, [])]
+    while stack:
+        node, tests = stack.pop()
+        if forest.feature[node] < 0:
+            leaves.append((tests, sql_float(forest.value[node, positive])))
+            continue
+        # Push the right child first, so that the leaves are in tree order
+        for child, test in reversed(list(zip(forest.children[node],
+                                             split_tests(forest, node, columns)))):
+            if test is not False:
+                stack.append((child, tests if test is None else tests + [test]))
+    if len(leaves) == 1:
+        return leaves[0][1]
+    whens = ['WHEN %s THEN %s' % (' AND '.join(tests), value) for tests, value in leaves[:-1]]
+    return 'CASE %s ELSE %s END' % (' '.join(whens), leaves[-1][1])
+
+
+def choose_layout(forests):
+    """The nested layout if no tree of the list of forests is deeper than
+    MAX_NESTED_DEPTH, else the flat layout."""
+    if max(forest.max_depth for forest in forests) <= MAX_NESTED_DEPTH:
+        return 'nested'
+    return 'flat'
+
+
+def forest_sql(forest, positive=1, layout='nested'):
+    """SQL expression of the probability of the class positive."""
+    classes = list(forest.classes_)
+    if positive not in classes:
+        return sql_float(0.0)
+    columns = (list(forest.feature_names_in_) if hasattr(forest, 'feature_names_in_')
+               else PREDICTOR_COLUMNS)
+    trees = [tree_sql(forest, root, columns, classes.index(positive), layout) for root in forest.roots]
+    return '(%s\n             ) / %s' % ('\n           + '.join(trees),
+                                         sql_float(forest.n_estimators))
+
+
+def scoring_sql(forests, table, id_column='cust_id', label_column='cc_acct_ind',
+                key_column='statecode', layout='nested'):
+    """SELECT statement that scores the rows of table with the forests.
+
+    forests is either a single ArrayForest, or a dict of the ArrayForest of
+    every key in the key column, in which case the rows of every key are
+    scored with its own forest, and rows of other keys are not scored.
+    """
+    if isinstance(forests, dict):
+        keys = sorted(forests)
+        prob1 = ('CASE %s\n             %s\n             END'
+                 % (key_column, '\n             '.join(
+                     "WHEN '%s' THEN %s" % (key, forest_sql(forests[key], layout=layout)) for key in keys)))
+        keyed = '%s, ' % key_column
+        outKey = '       d.%s,\n' % key_column
+        where = '\n      WHERE %s IN (%s)' % (key_column, ', '.join("'%s'" % key for key in keys))
+    else:
+        prob1 = forest_sql(forests, layout=layout)
+        keyed = outKey = where = ''
+    return ('SELECT d.%s,\n%s'
+            '       1.0E0 - d.Prob1 AS Prob0,\n'
+            '       d.Prob1 AS Prob1,\n'
+            '       d.%s AS Actual\n'
+            'FROM (SELECT %s, %s%s,\n'
+            '             %s AS Prob1\n'
+            '      FROM %s%s) AS d;\n'
+            % (id_column, outKey, label_column, id_column, keyed, label_column, prob1,
+               table, where))
+
+
+def check_sql(sql, forests, rows, table, id_column, key_column):
+    """Maximum absolute difference between the probabilities of the query on
+    the rows in a local SQLite database and the ones of the forests."""
+    connection = sqlite3.connect(':memory:')
+    try:
+        rows.to_sql(table, connection, index=False)
+        result = pd.read_sql_query(sql.rstrip().rstrip(';'), connection)
+    finally:
+        connection.close()
+    result = result.set_index(id_column)
+    if isinstance(forests, dict):
+        expected = np.full((len(rows), 2), np.nan)
+        for key, forest in forests.items():
+            isKey = (rows[key_column] == key).values
+            if isKey.any():
+                expected[isKey] = forest.predict_proba(rows[isKey])
+        scored = ~np.isnan(expected[:, 0])
+        if len(result) != int(scored.sum()):
+            raise ValueError('The query scored %d rows rather than %d' % (len(result), scored.sum()))
+        expected = expected[scored]
+        result = result.loc[rows[id_column].values[scored]]
+    else:
+        expected = forests.predict_proba(rows)
+        result = result.loc[rows[id_column]]
+    return float(np.max(np.abs(result[['Prob0', 'Prob1']].values - expected)))
+
+
+###
+### Command line
+###
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compile Random Forest model files into a '
+                                                 'SQL scoring query.')
+    parser.add_argument('models', nargs='+',
+                        help='model file, or <statecode>=<model file> for every state code')
+    parser.add_argument('--output', default=None,
+                        help='file for the SQL query; by default, the query is written to stdout')
+    parser.add_argument('--table', default=None,
+                        help='table with the rows to score; default: ADS_Py for a single model, '
+                             'MultiModelTest_Py for state code models')
+    parser.add_argument('--id-column', default='cust_id')
+    parser.add_argument('--label-column', default='cc_acct_ind')
+    parser.add_argument('--key-column', default='statecode')
+    parser.add_argument('--max-trees', type=int, default=None,
+                        help='compile only the first N trees of every forest')
+    parser.add_argument('--max-depth', type=int, default=None,
+                        help='cut the trees off at this depth')
+    parser.add_argument('--layout', choices=('auto', 'nested', 'flat'), default='auto',
+                        help='nested CASE expressions for every split, or a flat CASE expression '
+                             'with a WHEN clause for every leaf of a tree, for trees that are too '
+                             'deep for the nesting limit of the SQL parser; by default, nested up '
+                             'to a tree depth of %d, else flat' % MAX_NESTED_DEPTH)
+    parser.add_argument('--check', default=None, metavar='CSV',
+                        help='run the query on the rows of the CSV file in SQLite, and compare '
+                             'the probabilities with the ones of the compiled models')
+    parser.add_argument('--tolerance', type=float, default=1e-9,
+                        help='with --check, largest allowed absolute difference of the '
+                             'probabilities (default: 1e-9)')
+    args = parser.parse_args(argv)
+
+    keyed = ['=' in spec for spec in args.models]
+    if any(keyed) and not all(keyed):
+        parser.error('give either one model file, or <statecode>=<model file> for every model')
+    if not any(keyed) and len(args.models) > 1:
+        parser.error('give <statecode>=<model file> for every model of several state codes')
+
+    def load(path):
+        model = loads_model(read_model_file(path))
+        forest = model if isinstance(model, ArrayForest) else ArrayForest.from_sklearn(model)
+        return cap_forest(forest, args.max_trees, args.max_depth)
+
+    if all(keyed):
+        forests = dict((key.strip(), load(path)) for key, path in
+                       (spec.split('=', 1) for spec in args.models))
+        table = args.table or 'MultiModelTest_Py'
+        compiled = list(forests.values())
+    else:
+        forests = load(args.models[0])
+        table = args.table or 'ADS_Py'
+        compiled = [forests]
+    layout = choose_layout(compiled) if args.layout == 'auto' else args.layout
+    sql = scoring_sql(forests, table, args.id_column, args.label_column, args.key_column,
+                      layout)
+    sql = ('-- Random Forest scoring query compiled by stoRFToSQL.py from %s\n%s'
+           % (', '.join(args.models), sql))
+    if args.output:
+        with open(args.output, 'w') as fOut:
+            fOut.write(sql)
+    else:
+        sys.stdout.write(sql)
+
+    sys.stderr.write('Compiled %d trees with %d nodes and a maximum depth of %d into %.1f KB of SQL '
+                     'in the %s layout\n'
+                     % (sum(f.n_estimators for f in compiled),
+                        sum(int(np.sum(f.feature >= 0)) * 2 + f.n_estimators for f in compiled),
+                        max(f.max_depth for f in compiled), len(sql) / 1000.0, layout))
+    if len(sql.encode('utf-8')) > MAX_REQUEST_BYTES:
+        sys.stderr.write('Warning: the query exceeds the %d KB limit of the database on the size '
+                         'of a SQL request; compile fewer trees with "--max-trees", cut them off '
+                         'with "--max-depth", such as with "--max-trees 20 --max-depth 6", or '
+                         'compress the model with stoRFCompress.py\n'
+                         % (MAX_REQUEST_BYTES // 1024))
+    if args.check:
+        rows = pd.read_csv(args.check)
+        try:
+            difference = check_sql(sql, forests, rows, table, args.id_column, args.key_column)
+        except (sqlite3.Error, DatabaseError) as exc:
+            # The message of pandas quotes the whole query before the SQLite error
+            hint = ('"--layout flat" or "--max-depth"' if layout == 'nested'
+                    else '"--max-depth"')
+            raise SystemExit('SQLite cannot run the query: %s\nThe trees may be too deep or too '
+                             'large for the SQL parser; compile them with %s'
+                             % (str(exc).rsplit(': ', 1)[-1], hint))
+        sys.stderr.write('SQLite check on %d rows: largest probability difference %.3g\n'
+                         % (len(rows), difference))
+        if not difference <= args.tolerance:
+            raise SystemExit('The probabilities of the query differ by more than %g'
+                             % args.tolerance)
+
+
+if __name__ == '__main__':
+    main()
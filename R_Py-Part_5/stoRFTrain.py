@@ -0,0 +1,144 @@
+################################################################################
+# The contents of this file are Teradata Public Content and have been released
+# to the Public Domain.
+# Teradata TechBytes - October 2026 - v.1.2
+# Copyright (c) 2026 by Teradata
+# Licensed under BSD; see "license.txt" file in the bundle root folder.
+#
+################################################################################
+# R and Python TechBytes Demo - Part 5: Python in-nodes with SCRIPT
+# ------------------------------------------------------------------------------
+# File: stoRFTrain.py
+# ------------------------------------------------------------------------------
+# The R and Python TechBytes Demo comprises of 5 parts:
+# Part 1 consists of only a Powerpoint overview of R and Python in Vantage
+# Part 2 demonstrates the Teradata R package tdplyr for clients
+# Part 3 demonstrates the Teradata Python package teradataml for clients
+# Part 4 demonstrates using R in-nodes with the SCRIPT and ExecR Table Operators
+# Part 5 demonstrates using Python in-nodes with the SCRIPT Table Operator
+################################################################################
+#
+# This TechBytes demo utilizes a use case to predict the propensity of a
+# financial services customer base to open a credit card account.
+#
+# The present file is the Python model training script to be used with the
+# SCRIPT table operator, as an alternative to the client-side model fitting in
+# the following use case 1 of the present demo Part 5:
+#
+# 1) Fitting and scoring a single model
+#
+#    Rather than fitting the Random Forest model on a Python client with a
+#    25% sample of the analytic data set, we fit it in the Advanced SQL Engine
+#    on all of the data. The SCRIPT query splits the rows of the ADS_Py table
+#    into as many hash slices as there are AMPs, and runs the present script
+#    with a PARTITION BY slice in the query. Every script instance fits a
+#    partial forest with its share of the trees on the rows of its slice.
+#    The "stoRFMerge.py" script then joins the partial forests into one model,
+#    which is saved into a model file and scored with "stoRFScore.py" as the
+#    model of the client.
+#
+#    For this use case, we start from the same analytic data set that was
+#    used in the teradataml demo (Part 3).
+################################################################################
+# File Changelog
+#  v.1.2     2026-10-18     First release
+################################################################################
+
+import sys
+import argparse
+from sklearn.ensemble import RandomForestClassifier
+import pickle
+from stoRFIO import TableDecoder, ResultWriter, ADS_PY_SCHEMA
+from stoRFForest import export_forest
+from stoRFModel import encode_transport, COMPRESSIONS, DEFAULT_CHUNK_SIZE
+from stoRFFit import fit_forest, worker_count, sub_forest_trees, BACKENDS
+
+###
+### Script arguments
+###
+
+# The options "--model-format", "--compression", "--chunk-size", "--n-jobs",
+# "--amps-per-node" and "--backend" in the SCRIPT_COMMAND clause of the SCRIPT
+# query work as with the "stoRFFitMM.py" script. The option "--trees <N>" sets
+# the number of trees of the joined forest (default: 500).
+parser = argparse.ArgumentParser(description='Fit a partial forest on a hash slice of ADS_Py.')
+parser.add_argument('--trees', type=int, default=500,
+                    help='number of trees of the forest that the partial forests are joined into')
+parser.add_argument('--model-format', choices=['pickle', 'arrays'], default='pickle',
+                    help='serialization format of the fitted models')
+parser.add_argument('--compression', choices=COMPRESSIONS, default='zlib',
+                    help='compression of the serialized models')
+parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                    help='maximum number of characters of a model chunk in an output row')
+parser.add_argument('--n-jobs', type=int, default=1,
+                    help='number of tree building workers; 0 uses the whole per-AMP CPU budget')
+parser.add_argument('--amps-per-node', type=int, default=1,
+                    help='number of AMPs that share the CPU cores of a node')
+parser.add_argument('--backend', choices=sorted(BACKENDS), default='threads',
+                    help='worker pool for the tree building')
+args = parser.parse_args()
+
+###
+### Read input
+###
+
+# Know your data: You must know in advance the number and data types of the
+# incoming columns from the database!
+# The input schema of the ADS_Py table is declared in the helper module
+# stoRFIO.py. In addition, the input here carries the number of the hash slice
+# that a row belongs to, and the number of slices. For numeric columns, the
+# database sends in floats in scientific format with a blank space when the
+# exponential is positive; e.g., 1.0 is sent as 1.000E 000. The decoder deals
+# with any such blank spaces.
+
+delimiter = '\t'
+decoder = TableDecoder(ADS_PY_SCHEMA + [('slice_id', 'int32'), ('n_slices', 'int32')],
+                       delimiter)
+df = decoder.read(sys.stdin)
+
+###
+### If no data received, gracefully exit rather than producing an error later.
+###
+
+if df is None:
+    sys.exit()
+
+###
+### Perform classification model fitting
+###
+
+predictor_columns = ["tot_income", "tot_age", "tot_cust_years", "tot_children",
+                     "female_ind", "single_ind", "married_ind", "separated_ind",
+                     "ck_acct_ind", "sv_acct_ind", "ck_avg_bal", "sv_avg_bal",
+                     "ck_avg_tran_amt", "sv_avg_tran_amt", "q1_trans_cnt",
+                     "q2_trans_cnt", "q3_trans_cnt", "q4_trans_cnt"]
+# For the classifier, specify the same parameters as for the client model:
+# ntree: n_estimators=500, mtry: max_features=5, nodesize: min_samples_leaf=1 (default; skipped)
+# The partial forest of a slice gets its share of the trees, and a different
+# random seed for every slice.
+sliceId = int(df['slice_id'].iloc[0])
+nTrees = sub_forest_trees(args.trees, sliceId, int(df['n_slices'].iloc[0]))
+classifier = RandomForestClassifier(n_estimators=nTrees, max_features=5, random_state=sliceId)
+X = df[predictor_columns]
+y = df["cc_acct_ind"]
+nJobs = worker_count(args.n_jobs, args.amps_per_node)
+classifier = fit_forest(classifier, X, y, nJobs, args.backend)
+
+# Serialize the model for export
+if args.model_format == 'arrays':
+    modelSer = export_forest(classifier)
+else:
+    modelSer = pickle.dumps(classifier)
+modelChunks = encode_transport(modelSer, args.compression, args.chunk_size)
+
+###
+### Send the slice number and partial forest as output from the present AMP.
+###
+
+# Export results to Advanced SQL Engine through standard output in expected
+# format: one row per model chunk with the slice number, the chunk number 1, 2,
+# ..., and the chunk text.
+nChunks = len(modelChunks)
+writer = ResultWriter(sys.stdout, delimiter)
+writer.write([sliceId] * nChunks, list(range(1, nChunks + 1)), modelChunks)
+writer.flush()